@@ -0,0 +1,111 @@
+"""
+Lasttest des HTTP-Dienstes (lawinen.dienst): Einzelanfragen mit und ohne Sammeln.
+
+Startet den Dienst je Einstellung in einem eigenen Prozess und schickt über --verbindungen
+gleichzeitige Keep-Alive-Verbindungen je --anfragen Einzelbewertungen an /bewerten.
+Gemeldet werden Anfragen/s, p50/p99 der Latenz beim Client und die mittlere Stapelgröße
+laut /metriken. --max-stapel 1 entspricht der Bewertung jeder Anfrage für sich.
+
+Aufruf (im Wurzelverzeichnis):
+    python benchmarks/dienst_last.py
+    python benchmarks/dienst_last.py --verbindungen 256 --anfragen 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+WURZEL = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WURZEL))
+
+from lawinen.katalog import KATALOG  # noqa: E402
+
+# (Bezeichnung, Sammelfenster ms, max. Stapelgröße)
+EINSTELLUNGEN = [("einzeln", 0.0, 1), ("sammeln 0 ms", 0.0, 1024), ("sammeln 2 ms", 2.0, 1024)]
+
+
+def zufaellige_bewertung(rng):
+    zeile = {f"tool1_{i}": rng.randint(0, 3) for i in range(1, len(KATALOG.tool1) + 1)}
+    zeile.update(ns=rng.randint(0, 100), temp=rng.randint(-20, 5), stunden=rng.randint(0, 72))
+    zeile.update({f"tool2_{i}": rng.randint(1, 4) for i in range(1, 6)})
+    zeile["tool2_6" if rng.random() < 0.5 else "tool2_7"] = rng.randint(1, 4)
+    return zeile
+
+
+async def _anfrage(leser, schreiber, pfad, daten=None):
+    koerper = json.dumps(daten).encode() if daten is not None else b""
+    methode = "POST" if daten is not None else "GET"
+    schreiber.write(f"{methode} {pfad} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(koerper)}\r\n\r\n".encode() + koerper)
+    await schreiber.drain()
+    kopf = {}
+    await leser.readline()
+    while (zeile := await leser.readline()) != b"\r\n":
+        name, _, wert = zeile.decode().partition(":")
+        kopf[name.lower()] = wert.strip()
+    return json.loads(await leser.readexactly(int(kopf["content-length"])))
+
+
+async def _client(port, anfragen, latenzen, seed):
+    rng = random.Random(seed)
+    leser, schreiber = await asyncio.open_connection("127.0.0.1", port)
+    for _ in range(anfragen):
+        start = time.perf_counter()
+        await _anfrage(leser, schreiber, "/bewerten", zufaellige_bewertung(rng))
+        latenzen.append((time.perf_counter() - start) * 1000)
+    schreiber.close()
+
+
+async def _last(port, verbindungen, anfragen):
+    latenzen = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(port, anfragen, latenzen, seed) for seed in range(verbindungen)))
+    dauer = time.perf_counter() - start
+    leser, schreiber = await asyncio.open_connection("127.0.0.1", port)
+    metriken = await _anfrage(leser, schreiber, "/metriken")
+    schreiber.close()
+    return dauer, sorted(latenzen), metriken
+
+
+async def _warten_bis_bereit(port):
+    for _ in range(200):
+        try:
+            _, schreiber = await asyncio.open_connection("127.0.0.1", port)
+            schreiber.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.05)
+    raise RuntimeError("Dienst startet nicht")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lasttest des Bewertungsdienstes")
+    parser.add_argument("--verbindungen", type=int, default=64)
+    parser.add_argument("--anfragen", type=int, default=100, help="Anfragen pro Verbindung")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    print(f"{args.verbindungen} Verbindungen x {args.anfragen} Anfragen")
+    print(f"{'Einstellung':14} {'Anfragen/s':>11} {'p50 ms':>8} {'p99 ms':>8} {'Stapel':>7}")
+    for name, fenster_ms, max_stapel in EINSTELLUNGEN:
+        dienst = subprocess.Popen(
+            [sys.executable, "-m", "lawinen.dienst", "--port", str(args.port),
+             "--fenster-ms", str(fenster_ms), "--max-stapel", str(max_stapel)],
+            cwd=WURZEL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            asyncio.run(_warten_bis_bereit(args.port))
+            dauer, latenzen, metriken = asyncio.run(_last(args.port, args.verbindungen, args.anfragen))
+        finally:
+            dienst.terminate()
+            dienst.wait()
+        p50 = latenzen[int(0.50 * (len(latenzen) - 1))]
+        p99 = latenzen[int(0.99 * (len(latenzen) - 1))]
+        print(f"{name:14} {len(latenzen) / dauer:11,.0f} {p50:8.2f} {p99:8.2f} {metriken['mittlere_stapelgroesse']:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Import-Zeit der Streamlit-Seiten beim Kaltstart (python -X importtime).
+
+Für jede Seite streamlit_*.py werden die Import-Anweisungen auf Modulebene per ast
+herausgelöst und in einem frischen Interpreter mit -X importtime ausgeführt. Gemeldet
+werden der Median der Gesamtzeit über mehrere Läufe und welche schweren Module
+(numpy, pandas, matplotlib, PIL) dabei schon geladen werden.
+
+Aufruf (im Wurzelverzeichnis):
+    python benchmarks/importzeit.py
+    python benchmarks/importzeit.py --wiederholungen 10 --json importzeit.json
+"""
+import argparse
+import ast
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+WURZEL = Path(__file__).resolve().parent.parent
+SCHWERE_MODULE = ("numpy", "pandas", "matplotlib", "PIL")
+
+
+def import_code(pfad):
+    """Nur die Import-Anweisungen auf Modulebene einer Seite als Quelltext."""
+    baum = ast.parse(pfad.read_text(encoding="utf-8"), filename=str(pfad))
+    imports = [knoten for knoten in baum.body if isinstance(knoten, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(knoten) for knoten in imports)
+
+
+def messe(code):
+    """
+    Führt code mit -X importtime in einem neuen Interpreter aus.
+    Gibt die Gesamtzeit der Importe in ms und die geladenen schweren Module zurück.
+    """
+    lauf = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=WURZEL, capture_output=True, text=True, check=True,
+    )
+    gesamt_us = 0
+    geladen = set()
+    for zeile in lauf.stderr.splitlines():
+        if not zeile.startswith("import time:") or "cumulative" in zeile:
+            continue
+        _, kumuliert, name = zeile[len("import time:"):].split("|")
+        if not name.startswith("  "):  # nur Importe der obersten Ebene zählen
+            gesamt_us += int(kumuliert)
+        if name.strip() in SCHWERE_MODULE:
+            geladen.add(name.strip())
+    return gesamt_us / 1000, sorted(geladen)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-Zeit der Streamlit-Seiten beim Kaltstart")
+    parser.add_argument("--wiederholungen", type=int, default=5)
+    parser.add_argument("--seiten", nargs="*", help="Dateinamen der Seiten (Standard: alle streamlit_*.py)")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON-Zeile an diese Datei anhängen")
+    args = parser.parse_args(argv)
+
+    seiten = [WURZEL / name for name in args.seiten] if args.seiten else sorted(WURZEL.glob("streamlit_*.py"))
+    ergebnisse = {}
+    print(f"{'Seite':28} {'Median ms':>10} {'Min ms':>8}  schwere Module")
+    for pfad in seiten:
+        try:
+            code = import_code(pfad)
+        except SyntaxError as e:
+            print(f"{pfad.name:28} {'-':>10} {'-':>8}  Syntaxfehler in Zeile {e.lineno}")
+            continue
+        zeiten = []
+        for _ in range(args.wiederholungen):
+            ms, geladen = messe(code)
+            zeiten.append(ms)
+        ergebnisse[pfad.name] = {"median_ms": statistics.median(zeiten), "min_ms": min(zeiten), "module": geladen}
+        print(f"{pfad.name:28} {statistics.median(zeiten):10.1f} {min(zeiten):8.1f}  {', '.join(geladen) or '-'}")
+
+    if args.json:
+        with open(args.json, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"zeitpunkt": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0],
+                                "seiten": ergebnisse}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Skalierung der parallelen Neubewertung (lawinen.parallel) über die Anzahl der Prozesse.
+
+Erzeugt zufällige Codematrizen für Tool 1 und Tool 2 (oder liest ein Archiv) und misst
+bewerte_parallel mit 1, 2, 4, ... Prozessen bis zur Anzahl der Kerne. Gemeldet werden
+der Median der Laufzeit, Zeilen/s, der Speedup gegenüber einem Prozess und die Effizienz
+(Speedup / Prozesse). Vor der Messung wird geprüft, dass alle Läufe dasselbe Ergebnis liefern.
+
+Aufruf (im Wurzelverzeichnis):
+    python benchmarks/parallel_skalierung.py --zeilen 20000000
+    python benchmarks/parallel_skalierung.py --archiv archiv/ --prozesse 1 8 16 32
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+WURZEL = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WURZEL))
+
+from lawinen.batch import SPALTEN_TOOL1  # noqa: E402
+from lawinen.parallel import archiv_parallel, bewerte_parallel  # noqa: E402
+from lawinen.tool2 import FRAGEN  # noqa: E402
+
+
+def zufaellige_codes(zeilen, seed=0):
+    """Codematrizen wie aus dem Archiv; bei Tool 2 ist meist genau eine von Frage 6/7 beantwortet."""
+    rng = np.random.default_rng(seed)
+    tool1 = rng.integers(0, 4, (zeilen, len(SPALTEN_TOOL1)), dtype=np.uint8)
+    tool2 = rng.integers(1, 5, (zeilen, len(FRAGEN)), dtype=np.uint8)
+    frage6 = rng.random(zeilen) < 0.5
+    tool2[frage6, 6] = 0
+    tool2[~frage6, 5] = 0
+    return tool1, tool2
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Skalierung der parallelen Neubewertung")
+    parser.add_argument("--zeilen", type=int, default=5_000_000)
+    parser.add_argument("--archiv", help="Archivverzeichnis statt zufälliger Codes")
+    parser.add_argument("--prozesse", type=int, nargs="*", help="Standard: 1, 2, 4, ... bis zur Anzahl der Kerne")
+    parser.add_argument("--laeufe", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    kerne = os.cpu_count()
+    # Ein Prozess ist immer dabei, er ist die Basis für den Speedup
+    prozesse = sorted({1, *(args.prozesse or [2 ** i for i in range(kerne.bit_length())] + [kerne])})
+
+    if args.archiv:
+        bewerten = lambda p: archiv_parallel(args.archiv, prozesse=p)  # noqa: E731
+    else:
+        tool1, tool2 = zufaellige_codes(args.zeilen)
+        bewerten = lambda p: bewerte_parallel(tool1, tool2, prozesse=p)  # noqa: E731
+
+    referenz = bewerten(1)
+    zeilen = len(referenz.gesamtrisiko)
+    print(f"{zeilen} Zeilen, {kerne} Kerne")
+    print(f"{'Prozesse':>8} {'Median s':>9} {'Zeilen/s':>14} {'Speedup':>8} {'Effizienz':>9}")
+
+    basis = None
+    for p in prozesse:
+        zeiten = []
+        for _ in range(args.laeufe):
+            start = time.perf_counter()
+            ergebnis = bewerten(p)
+            zeiten.append(time.perf_counter() - start)
+        if not all(np.array_equal(a, b, equal_nan=True) for a, b in zip(ergebnis, referenz)):
+            raise RuntimeError(f"Ergebnis mit {p} Prozessen weicht von einem Prozess ab")
+        median = statistics.median(zeiten)
+        if p == 1:
+            basis = median
+        speedup = basis / median
+        print(f"{p:8d} {median:9.3f} {zeilen / median:14,.0f} {speedup:8.2f} {speedup / p:9.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Laufzeit der Tool-1-Auswertung pro Rerun, vorher/nachher.
+
+1. Typ-Bestimmung im Formular: die frühere Variante aus streamlit_kombi2.py baute für jede
+   beantwortete Frage die flache Liste aller Optionen neu auf und prüfte mit `in` (O(n²) in
+   der Katalog-Größe); jetzt liefert Frage.typen den Typ per Dict-Nachschlagen. Gemessen mit
+   dem echten Katalog und mit künstlich vergrößerten Katalogen.
+2. Ganzer Rerun der Seite mit streamlit.testing (falls streamlit installiert ist): Median der
+   Skriptlaufzeit nach dem Absenden, für die aktuelle Seite und optional für den Stand
+   einer älteren Git-Revision.
+
+Aufruf (im Wurzelverzeichnis):
+    python benchmarks/tool1_formular.py
+    python benchmarks/tool1_formular.py --seite streamlit_kombi2.py --alt db17900^
+"""
+import argparse
+import importlib.util
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+WURZEL = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WURZEL))
+
+from lawinen.katalog import _frage, lade_katalog  # noqa: E402
+
+
+def typen_alt(fragen_definitions, auswahlen):
+    """Typ-Bestimmung wie früher in kombi2: flache Optionsliste pro beantworteter Frage."""
+    typen = []
+    for frage, auswahl in auswahlen.items():
+        if auswahl:
+            if auswahl in [item for sublist in [list(fragen_definitions[k].keys())[1:] for k in fragen_definitions] for item in sublist]:
+                typen.append(auswahl[0])
+            else:
+                typen.append("")
+    return typen
+
+
+def typen_neu(fragen, auswahlen):
+    """Typ-Bestimmung über die vorberechneten Zuordnungen des Katalogs."""
+    return [fragen[frage].typen[auswahl] for frage, auswahl in auswahlen.items() if auswahl]
+
+
+def kuenstlicher_katalog(anzahl_fragen):
+    """Tool-1-Katalog mit anzahl_fragen Fragen zu je drei Optionen."""
+    eintraege = [
+        {"frage": f"Frage {i}", "optionen": [{"text": f"{typ}: Option {typ} zu Frage {i}", "punkte": typ} for typ in (1, 2, 3)]}
+        for i in range(anzahl_fragen)
+    ]
+    return tuple(_frage(eintrag, mit_typ=True) for eintrag in eintraege)
+
+
+def vergleiche_typen(fragen_tool1, wiederholungen):
+    fragen = {f.frage: f for f in fragen_tool1}
+    fragen_definitions = {f.frage: {"": 0, **f.punkte} for f in fragen_tool1}
+    auswahlen = {f.frage: f.texte[1 + i % 3] for i, f in enumerate(fragen_tool1)}  # alle Fragen beantwortet
+
+    alt = min(timeit.repeat(lambda: typen_alt(fragen_definitions, auswahlen), number=wiederholungen, repeat=5)) / wiederholungen
+    neu = min(timeit.repeat(lambda: typen_neu(fragen, auswahlen), number=wiederholungen, repeat=5)) / wiederholungen
+    return alt * 1e6, neu * 1e6
+
+
+def messe_rerun(seite, laeufe):
+    """Median der Skriptlaufzeit eines Reruns nach dem Absenden des Tool-1-Formulars (ms)."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(seite), default_timeout=60).run()
+    for radio in at.radio[:9]:
+        radio.set_value(radio.options[1])
+    if at.checkbox:
+        at.checkbox[0].check()
+    [b for b in at.button if b.label.startswith(("Berechnung", "Formular"))][0].click().run()
+
+    zeiten = []
+    for _ in range(laeufe):
+        start = time.perf_counter()
+        at.run()
+        zeiten.append((time.perf_counter() - start) * 1000)
+    if at.exception:
+        raise RuntimeError(f"{seite.name}: {at.exception[0].value}")
+    return statistics.median(zeiten)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tool-1-Formular: Laufzeit pro Rerun vorher/nachher")
+    parser.add_argument("--seite", default="streamlit_kombi2.py")
+    parser.add_argument("--alt", help="Git-Revision, deren Stand der Seite zum Vergleich gemessen wird")
+    parser.add_argument("--laeufe", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print("Typ-Bestimmung pro Rerun (µs)")
+    print(f"{'Fragen':>7} {'vorher':>10} {'nachher':>10}")
+    katalog = lade_katalog()
+    for anzahl, fragen_tool1 in [(len(katalog.tool1), katalog.tool1)] + [(n, kuenstlicher_katalog(n)) for n in (30, 100, 300)]:
+        alt, neu = vergleiche_typen(fragen_tool1, wiederholungen=max(1, 3000 // anzahl))
+        print(f"{anzahl:7d} {alt:10.1f} {neu:10.1f}")
+
+    if importlib.util.find_spec("streamlit") is None:
+        print("streamlit ist nicht installiert – Rerun-Messung übersprungen")
+        return
+
+    print(f"\nRerun von {args.seite} nach dem Absenden (Median ms über {args.laeufe} Läufe)")
+    print(f"  aktuell: {messe_rerun(WURZEL / args.seite, args.laeufe):8.1f}")
+    if args.alt:
+        quelltext = subprocess.run(["git", "show", f"{args.alt}:{args.seite}"], cwd=WURZEL,
+                                   capture_output=True, text=True, check=True).stdout
+        with tempfile.TemporaryDirectory() as verzeichnis:
+            alte_seite = Path(verzeichnis) / args.seite
+            alte_seite.write_text(quelltext, encoding="utf-8")
+            print(f"  {args.alt}: {messe_rerun(alte_seite, args.laeufe):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
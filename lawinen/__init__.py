@@ -0,0 +1,96 @@
+"""
+Bewertungslogik der Lawinen-Tools ohne Streamlit-Abhängigkeit.
+
+Tool 1 (Selbstauslösung), Tool 2 (Lawinengröße & Reichweite) und die
+kombinierte Gesamtbewertung aus streamlit_kombi2.py, einzeln oder
+vektorisiert für ganze Archive (lawinen.batch).
+"""
+from .katalog import KATALOG, Frage, Katalog, Option, lade_katalog
+from .setzung import (
+    SETZUNG_OPTIONEN,
+    Setzungsverlauf,
+    berechne_setzung_excel,
+    lese_temperaturen,
+    setzung_code,
+    setzung_codes,
+    setzung_nachschlagen,
+    setzung_punkte,
+    setzung_tabelle,
+    setzungsgrad_verlauf,
+)
+from .tool1 import (
+    FRAGEN_DEFINITIONS,
+    FRAGEN_TOOL1,
+    KAT_GERING,
+    KAT_HOCH,
+    KAT_MODERAT,
+    KAT_UNGUELTIG,
+    KATEGORIEN,
+    SCHWELLE_HOCH,
+    SCHWELLE_MODERAT,
+    Tool1Ergebnis,
+    bewerte_tool1,
+    kategorie_tool1,
+)
+from .tool2 import (
+    FARB_SCHWELLENWERTE,
+    FEHLER_FRAGE6_ODER_7,
+    FEHLER_FRAGE6_UND_7,
+    FEHLER_KEINER,
+    FEHLER_PFLICHTFRAGEN,
+    FRAGEN,
+    GEWICHTE,
+    KATEGORIEN_TOOL2,
+    Tool2Ergebnis,
+    bewerte_tool2,
+    get_bewertung_farbe,
+    kategorie_tool2,
+    pruefe_antworten,
+)
+from .gesamt import GESAMT_STUFEN, GESAMTRISIKO, Gesamtrisiko, gesamtrisiko
+
+# Die NumPy-Stapelbewertung wird erst beim ersten Zugriff importiert, damit die
+# Fragebogen-Seiten ohne numpy starten.
+_BATCH_NAMEN = {
+    "SPALTEN_TOOL1",
+    "Tool1Stapel",
+    "Tool2Stapel",
+    "bewerte_tool1_batch",
+    "bewerte_tool2_batch",
+    "gesamtrisiko_batch",
+    "kategorie_tool2_batch",
+    "kodiere_tool1",
+    "punkte_tabelle_tool1",
+    "punkte_tabelle_tool2",
+}
+
+__all__ = [
+    # katalog
+    "KATALOG", "Frage", "Katalog", "Option", "lade_katalog",
+    # setzung
+    "SETZUNG_OPTIONEN", "Setzungsverlauf", "berechne_setzung_excel", "lese_temperaturen", "setzung_code",
+    "setzung_codes", "setzung_nachschlagen", "setzung_punkte", "setzung_tabelle", "setzungsgrad_verlauf",
+    # tool1
+    "FRAGEN_DEFINITIONS", "FRAGEN_TOOL1", "KAT_GERING", "KAT_HOCH", "KAT_MODERAT", "KAT_UNGUELTIG", "KATEGORIEN",
+    "SCHWELLE_HOCH", "SCHWELLE_MODERAT", "Tool1Ergebnis", "bewerte_tool1", "kategorie_tool1",
+    # tool2
+    "FARB_SCHWELLENWERTE", "FEHLER_FRAGE6_ODER_7", "FEHLER_FRAGE6_UND_7", "FEHLER_KEINER", "FEHLER_PFLICHTFRAGEN",
+    "FRAGEN", "GEWICHTE", "KATEGORIEN_TOOL2", "Tool2Ergebnis", "bewerte_tool2", "get_bewertung_farbe",
+    "kategorie_tool2", "pruefe_antworten",
+    # gesamt
+    "GESAMT_STUFEN", "GESAMTRISIKO", "Gesamtrisiko", "gesamtrisiko",
+    # batch (erst beim Zugriff geladen, siehe _BATCH_NAMEN)
+    "SPALTEN_TOOL1", "Tool1Stapel", "Tool2Stapel", "bewerte_tool1_batch", "bewerte_tool2_batch",
+    "gesamtrisiko_batch", "kategorie_tool2_batch", "kodiere_tool1", "punkte_tabelle_tool1", "punkte_tabelle_tool2",
+]
+
+
+def __getattr__(name):
+    if name in _BATCH_NAMEN:
+        from . import batch
+        return getattr(batch, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | _BATCH_NAMEN)
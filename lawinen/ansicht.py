@@ -0,0 +1,243 @@
+"""
+Gemeinsame Streamlit-Bausteine der Seiten.
+
+Wird nicht über lawinen/__init__ importiert, damit die Bewertungslogik ohne Streamlit
+nutzbar bleibt.
+"""
+import io
+import logging
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+import streamlit as st
+
+LOGO_PFAD = Path(__file__).resolve().parent.parent / "mein_logo.jpg"
+LOGO_BREITE = 200  # angezeigte Breite in Pixel
+
+logger = logging.getLogger(__name__)
+
+# Einmal pro Prozess beim Import prüfen, statt bei jedem Cache-Fehlschlag von lade_logo
+LOGO_VORHANDEN = LOGO_PFAD.is_file()
+if not LOGO_VORHANDEN:
+    logger.warning("Logo %s nicht gefunden, die Seiten werden ohne Logo angezeigt", LOGO_PFAD)
+
+
+@st.cache_resource(show_spinner=False)
+def lade_logo(pfad=str(LOGO_PFAD), breite=LOGO_BREITE):
+    """
+    Dekodiert das Logo einmal pro Prozess, verkleinert es auf die angezeigte Breite und
+    gibt es als JPEG-Bytes zurück. Fehlt das Standard-Logo, wurde das schon beim Import
+    geloggt; bei anderen Fehlern wird hier geloggt. In beiden Fällen wird None geliefert.
+    """
+    if pfad == str(LOGO_PFAD) and not LOGO_VORHANDEN:
+        return None
+    from PIL import Image
+
+    try:
+        with Image.open(pfad) as bild:
+            bild.draft("RGB", (breite, breite * bild.height // bild.width))  # JPEG gleich verkleinert dekodieren
+            bild = bild.convert("RGB")
+            hoehe = round(bild.height * breite / bild.width)
+            bild = bild.resize((breite, hoehe), Image.LANCZOS)
+    except (OSError, ValueError) as e:
+        logger.warning("Logo %s konnte nicht geladen werden: %s", pfad, e)
+        return None
+
+    puffer = io.BytesIO()
+    bild.save(puffer, format="JPEG", quality=90)
+    return puffer.getvalue()
+
+
+def zeige_logo(caption=None, breite=LOGO_BREITE):
+    """Zeigt das zwischengespeicherte Logo an; ohne Logo-Datei bleibt die Stelle leer."""
+    logo = lade_logo(breite=breite)
+    if logo is not None:
+        st.image(logo, caption=caption, width=breite)
+
+
+@st.cache_resource(show_spinner=False)
+def bewertungsspeicher():
+    """Gemeinsamer Bewertungsspeicher des Prozesses; die Datei lässt sich über LAWINEN_DB festlegen."""
+    from .speicher import SPEICHER_PFAD, Bewertungsspeicher
+
+    return Bewertungsspeicher(os.environ.get("LAWINEN_DB", SPEICHER_PFAD))
+
+
+class Setzungseingabe(NamedTuple):
+    """Ergebnis von setzung_eingeben; temp ist bei einer Stationsreihe deren gerundetes Mittel."""
+    beschreibung: str
+    punktwert: float
+    ns: int
+    temp: int
+    stunden: int
+
+
+def zeige_setzung(beschreibung):
+    """Farbiger Kasten mit dem Ergebnis der automatischen Setzung."""
+    farbe = "#ff4b4b" if beschreibung.startswith("1") else "#ffa500" if beschreibung.startswith("2") else "#4CAF50"
+    st.markdown(f"""
+        <div style='padding: 10px; background-color: {farbe}; color: white; border-radius: 8px; text-align: center;'>
+            <strong>Automatische Setzung:</strong><br>{beschreibung}
+        </div>
+    """, unsafe_allow_html=True)
+
+
+def setzung_eingeben(praefix, titel="➕ Setzung des Neuschnees eingeben"):
+    """
+    Aufklappbereich für die Setzung: drei Regler, optional eine Stations-CSV mit stündlichen
+    Temperaturen, die Temperatur und Stunden ersetzt (Gradstunden-Modell, lawinen.setzung.Setzungsverlauf).
+    Ohne Umschalter, damit der Bereich auch innerhalb eines st.form funktioniert.
+    Gibt eine Setzungseingabe zurück; Beschreibung und Punktwert wie bei berechne_setzung_excel.
+    """
+    import math
+
+    from .setzung import Setzungsverlauf, lese_temperaturen, setzung_nachschlagen, setzungsgrad_verlauf
+
+    with st.expander(titel):
+        ns = st.slider("Neuschneemenge (cm)", 0, 150, 0, 5, key=f"ns_{praefix}")
+        temp = st.slider("Temperatur (°C)", -20, 10, 0, 1, key=f"temp_{praefix}")
+        stunden = st.slider("vergangene Stunden", 0, 72, 0, 1, key=f"stunden_{praefix}")
+        datei = st.file_uploader(
+            "Oder Stations-CSV mit Stundenwerten ab Ende des Schneefalls (Spalte temp, optional station)",
+            type=["csv", "txt"], key=f"setzung_csv_{praefix}",
+        )
+
+        reihen = {}
+        if datei is not None:
+            try:
+                reihen = lese_temperaturen(datei.getvalue().decode("utf-8-sig"))
+            except (UnicodeDecodeError, ValueError) as e:
+                st.error(f"Stationsdatei nicht lesbar: {e}")
+            reihen = {station: werte for station, werte in reihen.items() if werte}
+
+        if reihen:
+            station = st.selectbox("Station", list(reihen), key=f"setzung_station_{praefix}") if len(reihen) > 1 else next(iter(reihen))
+            reihe = reihen[station]
+            verlauf = Setzungsverlauf(ns)
+            verlauf.reihe(reihe)
+            beschreibung, punktwert = verlauf.ergebnisse()[0]
+            gemessen = [wert for wert in reihe if not math.isnan(wert)]
+            temp = round(sum(gemessen) / len(gemessen)) if gemessen else 0
+            stunden = len(reihe)
+            st.caption(f"Stationsreihe: {stunden} Stunden, Setzungsgrad {verlauf.grad[0]:.0f} % (Regler für Temperatur und Stunden ignoriert)")
+            st.line_chart(setzungsgrad_verlauf(reihe)[0], x_label="Stunde", y_label="Setzungsgrad (%)")
+        else:
+            beschreibung, punktwert = setzung_nachschlagen(ns, temp, stunden)
+        if beschreibung:
+            zeige_setzung(beschreibung)
+    return Setzungseingabe(beschreibung, punktwert, ns, temp, stunden)
+
+
+def station_vorbelegen(schluessel, praefix):
+    """
+    Aufklappbereich zum Hochladen einer Stationsdatei (lawinen.station). Belegt die daraus
+    ableitbaren Fragen einmal pro Datei vor, indem st.session_state[schluessel.format(frage)]
+    gesetzt wird; muss daher vor dem Formular aufgerufen werden. Die Antworten bleiben änderbar.
+    """
+    from .station import FRAGEN, antworten, lese_datei, letzte_werte
+
+    with st.expander("📡 Antworten aus Wetterstation vorbelegen"):
+        datei = st.file_uploader(
+            "Stationsdatei (SMET oder CSV mit zeit, ta, hs, psum, vw)", type=["smet", "csv", "txt"], key=f"station_{praefix}",
+        )
+        if datei is None:
+            return
+        zustand = f"station_werte_{praefix}"
+        if st.session_state.get(zustand, (None,))[0] != datei.file_id:
+            try:
+                werte = letzte_werte(lese_datei(io.StringIO(datei.getvalue().decode("utf-8-sig"))))
+            except (UnicodeDecodeError, ValueError) as e:
+                st.error(f"Stationsdatei nicht lesbar: {e}")
+                return
+            if werte is None:
+                st.warning("Die Stationsdatei enthält keine Messungen.")
+                return
+            gewaehlt = antworten(werte, 0)
+            for frage, text in gewaehlt.items():
+                st.session_state[schluessel.format(frage)] = text
+            st.session_state[zustand] = (datei.file_id, str(werte.zeit[0]).replace("T", " "), gewaehlt)
+
+        _, zeitpunkt, gewaehlt = st.session_state[zustand]
+        st.caption(f"Letzte Messung {zeitpunkt}:")
+        for frage in FRAGEN.values():
+            st.markdown(f"- **{frage}**: {gewaehlt.get(frage, 'nicht bestimmbar')}")
+
+
+EXPOSITIONEN = {"N": 0, "NO": 45, "O": 90, "SO": 135, "S": 180, "SW": 225, "W": 270, "NW": 315}
+
+
+def sonne_vorbelegen(schluessel, praefix):
+    """
+    Aufklappbereich, der die Sonneneinstrahlung eines Hangs für Datum und Zeitfenster berechnet
+    (lawinen.sonne) und die Frage "Exposition/Sonneneinstrahlung" vorbelegt. Wie
+    station_vorbelegen vor dem Formular aufrufen; die Antwort bleibt änderbar.
+    """
+    with st.expander("☀️ Sonneneinstrahlung berechnen"):
+        links, rechts = st.columns(2)
+        datum = links.date_input("Datum", key=f"sonne_datum_{praefix}")
+        von, bis = rechts.slider("Zeitfenster (Uhr, Ortszeit)", 0, 24, (9, 16), key=f"sonne_fenster_{praefix}")
+        neigung = links.slider("Hangneigung (°)", 0, 60, 35, key=f"sonne_neigung_{praefix}")
+        exposition = rechts.select_slider("Exposition", list(EXPOSITIONEN), "S", key=f"sonne_exposition_{praefix}")
+        horizont = links.slider("Horizont in Sonnenrichtung (°)", 0, 40, 0, key=f"sonne_horizont_{praefix}")
+        breite = rechts.number_input("Geogr. Breite (°N)", 44.0, 49.0, 47.0, 0.1, key=f"sonne_breite_{praefix}")
+        zustand = f"sonne_werte_{praefix}"
+        if st.button("Berechnen und übernehmen", key=f"sonne_knopf_{praefix}"):
+            if von >= bis:
+                st.error("Das Zeitfenster ist leer.")
+                return
+            from .sonne import FRAGE, antwort, einstrahlung, sonnen_codes, sonnenstand
+
+            energie = float(einstrahlung(neigung, EXPOSITIONEN[exposition], sonnenstand(datum, breite, von=von, bis=bis), horizont))
+            text = antwort(int(sonnen_codes(energie)))
+            st.session_state[schluessel.format(FRAGE)] = text
+            st.session_state[zustand] = (energie, text)
+        if zustand in st.session_state:
+            energie, text = st.session_state[zustand]
+            st.caption(f"{energie:.1f} kWh/m² bei klarem Himmel: **{text}**")
+
+
+def unsicherheit_eingeben(fragen, auswahlen, praefix):
+    """
+    Aufklappbereich, in dem pro Frage eine Alternative mit ihrer Wahrscheinlichkeit angegeben
+    werden kann. Gibt dict Frage -> {Optionstext: Gewicht} für lawinen.unsicherheit.verteilungen
+    zurück; ohne Angaben ein leeres dict.
+    """
+    unsicher = {}
+    with st.expander("🎲 Unsicher? Alternative Antworten gewichten"):
+        st.caption("Wählen Sie bei unsicheren Fragen die zweite in Frage kommende Antwort und wie wahrscheinlich sie ist.")
+        for definition in fragen:
+            links, rechts = st.columns([3, 1])
+            alternative = links.selectbox(
+                f"Alternative zu: {definition.frage}", definition.texte,
+                format_func=lambda text: text or "– keine –", key=f"{praefix}_alternative_{definition.frage}",
+            )
+            prozent = rechts.slider("Wahrscheinlichkeit (%)", 0, 100, 0, 5, key=f"{praefix}_prozent_{definition.frage}")
+            gewaehlt = auswahlen.get(definition.frage, "")
+            if alternative and prozent and alternative != gewaehlt:
+                unsicher[definition.frage] = {gewaehlt: 100 - prozent, alternative: prozent}
+    return unsicher
+
+
+def zeige_anteile(namen, anteile):
+    """Zeigt Wahrscheinlichkeiten nebeneinander an, z. B. der Kategorien einer Simulation."""
+    spalten = st.columns(len(namen))
+    for spalte, name, anteil in zip(spalten, namen, anteile):
+        spalte.metric(name, f"{anteil:.0%}")
+
+
+def zeige_unsicherheit(unsicherheit, namen):
+    """
+    Kategorie-Wahrscheinlichkeiten und 90-%-Bereich einer Simulation (lawinen.unsicherheit).
+    namen: Bezeichnungen der Kategorien hoch, mittel, gering (ungültig wird angehängt).
+    """
+    from .unsicherheit import quantile
+
+    anteile = unsicherheit.anteile
+    if anteile[0]:
+        zeige_anteile([*namen, "ungültig"], [*anteile[1:], anteile[0]])
+    else:
+        zeige_anteile(namen, anteile[1:])
+    bereich = quantile(unsicherheit)
+    if bereich:
+        st.caption(f"90 % der Ziehungen liegen zwischen {bereich[0]:.2f} und {bereich[2]:.2f} (Median {bereich[1]:.2f}).")
@@ -0,0 +1,325 @@
+"""
+Spaltenweises Bewertungsarchiv für Saison-Auswertungen.
+
+Ein Archiv ist ein Verzeichnis mit einer Rohdatei pro Spalte (<name>.bin, feste Breite in
+Little Endian) und schema.json (Format, Katalog-Version, Spalten, Hang-Wörterbuch und
+Importmarke). Neue Bewertungen werden angehängt, nachträglich ergänzte ersetzen ihre Zeile;
+gelesen wird per np.memmap ohne Kopie, sodass Auswertungen wie "Kategorien pro Woche" nur
+die benötigten Spalten berühren.
+
+Antworten liegen als kleine Integer-Codes vor (siehe lawinen.batch); die Ergebnisspalten
+werden beim Anhängen mit der Stapelbewertung berechnet.
+
+Aufruf:
+    python -m lawinen.archiv import bewertungen.sqlite3 archiv/
+    python -m lawinen.archiv bericht archiv/
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .batch import SPALTEN_TOOL1, bewerte_tool1_batch, bewerte_tool2_batch
+from .katalog import KATALOG
+from .setzung import SETZUNG_OPTIONEN
+from .tool1 import KATEGORIEN
+from .tool2 import FRAGEN, KATEGORIEN_TOOL2
+
+FORMAT = 2
+SCHEMA_DATEI = "schema.json"
+
+# Spaltenname -> (dtype, Breite pro Zeile)
+SPALTEN = {
+    "id": ("S32", 1),                          # id aus lawinen.speicher, leer bei anderen Quellen
+    "tag": ("<i4", 1),                         # Tage seit 1970-01-01
+    "hang": ("<u4", 1),                        # Index in schema["haenge"], 0 = unbekannt
+    "tool1": ("u1", len(SPALTEN_TOOL1)),       # Antwortcodes 0..3 inkl. Setzung
+    "tool2": ("u1", len(FRAGEN)),              # Antwortcodes 0..4
+    "gefahrenindex": ("<f4", 1),
+    "kategorie_tool1": ("u1", 1),              # KAT_* aus tool1
+    "fehler_tool2": ("u1", 1),                 # FEHLER_* aus tool2
+    "mw_gew": ("<f4", 1),                      # NaN bei Fehler
+    "kategorie_tool2": ("u1", 1),
+}
+
+
+def _schema_lesen(verzeichnis):
+    with open(Path(verzeichnis) / SCHEMA_DATEI, encoding="utf-8") as f:
+        schema = json.load(f)
+    if schema.get("format") != FORMAT:
+        raise ValueError(f"{verzeichnis} ist kein Bewertungsarchiv im Format {FORMAT}")
+    return schema
+
+
+def _schema_schreiben(verzeichnis, schema):
+    # Erst in eine Hilfsdatei schreiben und dann ersetzen, damit Leser nie ein halbes Schema sehen
+    pfad = Path(verzeichnis) / SCHEMA_DATEI
+    with open(pfad.with_suffix(".tmp"), "w", encoding="utf-8") as f:
+        json.dump(schema, f, ensure_ascii=False, indent=1)
+    os.replace(pfad.with_suffix(".tmp"), pfad)
+
+
+def _vollstaendige_zeilen(verzeichnis, spalten):
+    """Anzahl Zeilen, die in allen Spalten vollständig geschrieben sind."""
+    return min(
+        (Path(verzeichnis) / f"{name}.bin").stat().st_size // (np.dtype(info["dtype"]).itemsize * info["breite"])
+        for name, info in spalten.items()
+    )
+
+
+def anlegen(verzeichnis):
+    """Legt ein leeres Archiv an (oder prüft ein vorhandenes) und gibt das Schema zurück."""
+    verzeichnis = Path(verzeichnis)
+    if (verzeichnis / SCHEMA_DATEI).exists():
+        return _schema_lesen(verzeichnis)
+    verzeichnis.mkdir(parents=True, exist_ok=True)
+    schema = {
+        "format": FORMAT,
+        "katalog_version": KATALOG.version,
+        "spalten": {name: {"dtype": dtype, "breite": breite} for name, (dtype, breite) in SPALTEN.items()},
+        "haenge": [""],
+    }
+    for name in SPALTEN:
+        (verzeichnis / f"{name}.bin").touch()
+    _schema_schreiben(verzeichnis, schema)
+    return schema
+
+
+def _spalten_berechnen(verzeichnis, schema, tage, tool1_codes, tool2_codes, haenge, ids):
+    """Bewertet einen Stapel und gibt (n, {Spaltenname: Array im Archiv-dtype}) zurück."""
+    tool1_codes = np.asarray(tool1_codes, dtype=np.uint8)
+    n = tool1_codes.shape[0]
+    if tool2_codes is None:
+        tool2_codes = np.zeros((n, len(FRAGEN)), dtype=np.uint8)
+    tool2_codes = np.asarray(tool2_codes, dtype=np.uint8)
+
+    tage = np.asarray(tage)
+    if not np.issubdtype(tage.dtype, np.integer):
+        tage = tage.astype("datetime64[D]").astype(np.int64)
+
+    hang_ids = np.zeros(n, dtype=np.uint32)
+    if haenge is not None:
+        index = {name: i for i, name in enumerate(schema["haenge"])}
+        for zeile, name in enumerate(haenge):
+            if name not in index:
+                index[name] = len(schema["haenge"])
+                schema["haenge"].append(name)
+            hang_ids[zeile] = index[name]
+        _schema_schreiben(verzeichnis, schema)
+
+    ergebnis1 = bewerte_tool1_batch(tool1_codes)
+    ergebnis2 = bewerte_tool2_batch(tool2_codes)
+    werte = {
+        "id": [b""] * n if ids is None else [i.encode("ascii") for i in ids],
+        "tag": tage,
+        "hang": hang_ids,
+        "tool1": tool1_codes,
+        "tool2": tool2_codes,
+        "gefahrenindex": ergebnis1.gefahrenindex,
+        "kategorie_tool1": ergebnis1.kategorie,
+        "fehler_tool2": ergebnis2.fehler,
+        "mw_gew": ergebnis2.mw_gew,
+        "kategorie_tool2": ergebnis2.kategorie_gew,
+    }
+    spalten = {}
+    for name, (dtype, breite) in SPALTEN.items():
+        spalten[name] = np.ascontiguousarray(werte[name], dtype=dtype)
+        if spalten[name].size != n * breite:
+            raise ValueError(f"Spalte {name}: {spalten[name].size} Werte, erwartet {n * breite}")
+    return n, spalten
+
+
+def _schema_pruefen(verzeichnis):
+    schema = anlegen(verzeichnis)
+    if schema["katalog_version"] != KATALOG.version:
+        raise ValueError(f"Archiv gehört zu Katalog-Version {schema['katalog_version']}, aktuell ist {KATALOG.version}")
+    return schema
+
+
+def anhaengen(verzeichnis, tage, tool1_codes, tool2_codes=None, haenge=None, ids=None):
+    """
+    Bewertet einen Stapel mit der Stapelbewertung und hängt ihn an das Archiv an.
+
+    tage: Datumsangaben (datetime64, "2025-01-31" oder Tage seit 1970-01-01), eine pro Zeile
+    tool1_codes: Codematrix (n x 10) wie für bewerte_tool1_batch
+    tool2_codes: Codematrix (n x 7) oder None, wenn Tool 2 nicht ausgefüllt wurde
+    haenge: Hangnamen pro Zeile oder None
+    ids: ids der Bewertungen (lawinen.speicher, höchstens 32 Zeichen) oder None
+    """
+    schema = _schema_pruefen(verzeichnis)
+    n, spalten = _spalten_berechnen(verzeichnis, schema, tage, tool1_codes, tool2_codes, haenge, ids)
+
+    # Reste eines abgebrochenen Anhängens abschneiden, sonst verrutschen die neuen Zeilen zwischen den Spalten
+    zeilen = _vollstaendige_zeilen(verzeichnis, schema["spalten"])
+    for name, (dtype, breite) in SPALTEN.items():
+        with open(Path(verzeichnis) / f"{name}.bin", "r+b") as f:
+            f.truncate(zeilen * np.dtype(dtype).itemsize * breite)
+            f.seek(0, os.SEEK_END)
+            spalten[name].tofile(f)
+    return n
+
+
+def ueberschreiben(verzeichnis, zeilen, tage, tool1_codes, tool2_codes=None, haenge=None, ids=None):
+    """Wie anhaengen, ersetzt aber die vorhandenen Archivzeilen zeilen (z. B. nachträglich ergänzte Bewertungen)."""
+    schema = _schema_pruefen(verzeichnis)
+    n, spalten = _spalten_berechnen(verzeichnis, schema, tage, tool1_codes, tool2_codes, haenge, ids)
+    zeilen = np.asarray(zeilen, dtype=np.intp)
+    anzahl = _vollstaendige_zeilen(verzeichnis, schema["spalten"])
+    if len(zeilen) != n or (n and (zeilen.min() < 0 or zeilen.max() >= anzahl)):
+        raise ValueError(f"Zeilen zum Überschreiben passen nicht zum Archiv mit {anzahl} Zeilen")
+    if not n:
+        return 0
+    for name, (dtype, breite) in SPALTEN.items():
+        form = (anzahl,) if breite == 1 else (anzahl, breite)
+        spalte = np.memmap(Path(verzeichnis) / f"{name}.bin", dtype=dtype, mode="r+", shape=form)
+        spalte[zeilen] = spalten[name].reshape((n,) + form[1:])
+        spalte.flush()
+        del spalte
+    return n
+
+
+def aus_speicher(speicher, verzeichnis, von=None, bis=None):
+    """
+    Überträgt Bewertungen aus einem Bewertungsspeicher (lawinen.speicher) in das Archiv.
+
+    Das Schema merkt sich die höchste übertragene Änderungsnummer des Speichers; wiederholte
+    Aufrufe übertragen nur neue oder seitdem ergänzte Bewertungen. Ergänzte Bewertungen
+    (z. B. Tool 2 nach Tool 1) ersetzen ihre Archivzeile. Mit von/bis eingegrenzte Läufe
+    verschieben die Marke nicht. Gibt die Anzahl übertragener Bewertungen zurück.
+    """
+    schema = _schema_pruefen(verzeichnis)
+    marke = schema.get("importiert_bis")
+    eintraege = speicher.aenderungen(seit=marke, von=von, bis=bis)
+    if not eintraege:
+        return 0
+    bewertungen = [bewertung for _, bewertung in eintraege]
+
+    setzung_codes = {beschreibung: code for code, beschreibung in enumerate(SETZUNG_OPTIONEN)}
+    tool1 = np.zeros((len(bewertungen), len(SPALTEN_TOOL1)), dtype=np.uint8)
+    tool2 = np.zeros((len(bewertungen), len(FRAGEN)), dtype=np.uint8)
+    for zeile, bewertung in enumerate(bewertungen):
+        for spalte, frage in enumerate(KATALOG.tool1):
+            tool1[zeile, spalte] = frage.codes.get(bewertung.antworten_tool1.get(frage.frage, ""), 0)
+        tool1[zeile, -1] = setzung_codes.get(bewertung.setzung or "", 0)
+        for spalte, (frage, text) in enumerate(zip(KATALOG.tool2, bewertung.antworten_tool2 or ())):
+            tool2[zeile, spalte] = frage.codes.get(text, 0)
+    tage = np.array([bewertung.zeitpunkt[:10] for bewertung in bewertungen], dtype="datetime64[D]")
+    haenge = [bewertung.hang or "" for bewertung in bewertungen]
+    ids = [bewertung.id for bewertung in bewertungen]
+
+    # Bereits archivierte ids (auch aus einem abgebrochenen Lauf) werden ersetzt statt doppelt angehängt
+    archiv_ids = Archiv(verzeichnis).spalte("id")
+    treffer = np.flatnonzero(np.isin(archiv_ids, np.array(ids, dtype=SPALTEN["id"][0])))
+    vorhanden = dict(zip(archiv_ids[treffer].tolist(), treffer.tolist()))
+    alt = np.array([i.encode("ascii") in vorhanden for i in ids], dtype=bool)
+    del archiv_ids
+    if alt.any():
+        auswahl = np.flatnonzero(alt)
+        ueberschreiben(verzeichnis, [vorhanden[ids[i].encode("ascii")] for i in auswahl], tage[auswahl],
+                       tool1[auswahl], tool2[auswahl], [haenge[i] for i in auswahl], [ids[i] for i in auswahl])
+    if not alt.all():
+        auswahl = np.flatnonzero(~alt)
+        anhaengen(verzeichnis, tage[auswahl], tool1[auswahl], tool2[auswahl], [haenge[i] for i in auswahl],
+                  [ids[i] for i in auswahl])
+
+    # Marke erst nach dem Schreiben setzen: ein Abbruch dazwischen wiederholt den Lauf beim nächsten Mal
+    if von is None and bis is None:
+        schema = _schema_lesen(verzeichnis)
+        schema["importiert_bis"] = max(aenderung for aenderung, _ in eintraege)
+        _schema_schreiben(verzeichnis, schema)
+    return len(bewertungen)
+
+
+class Archiv:
+    """Lesezugriff auf ein Archiv; Spalten werden ohne Kopie eingeblendet (memory-mapped)."""
+
+    def __init__(self, verzeichnis):
+        self.verzeichnis = Path(verzeichnis)
+        self.schema = _schema_lesen(verzeichnis)
+        # Ein abgebrochenes Anhängen kann einzelne Spalten länger hinterlassen; es zählen nur vollständige Zeilen
+        # (das nächste anhaengen schneidet den Rest ab)
+        self.zeilen = _vollstaendige_zeilen(self.verzeichnis, self.schema["spalten"])
+        self._spalten = {}
+
+    def __len__(self):
+        return self.zeilen
+
+    def spalte(self, name):
+        """Spalte als nur lesbares Array (n,) oder (n, breite)."""
+        if name not in self._spalten:
+            info = self.schema["spalten"][name]
+            form = (self.zeilen,) if info["breite"] == 1 else (self.zeilen, info["breite"])
+            if self.zeilen == 0:
+                self._spalten[name] = np.empty(form, dtype=info["dtype"])
+            else:
+                self._spalten[name] = np.memmap(self.verzeichnis / f"{name}.bin", dtype=info["dtype"], mode="r", shape=form)
+        return self._spalten[name]
+
+    @property
+    def haenge(self):
+        return self.schema["haenge"]
+
+    def wochen(self):
+        """Wochenindex (Montag als Wochenbeginn) pro Zeile; 1970-01-01 war ein Donnerstag."""
+        return (self.spalte("tag") + 3) // 7
+
+    def verteilung_pro_woche(self, name="kategorie_tool1", werte=4, maske=None):
+        """
+        Häufigkeit der Codes 0..werte-1 einer Spalte pro Woche.
+        Gibt die Montage der Wochen (datetime64[D]) und eine Matrix (Wochen x werte) zurück.
+        """
+        wochen = self.wochen()
+        codes = self.spalte(name)
+        if maske is not None:
+            wochen, codes = wochen[maske], codes[maske]
+        if wochen.size == 0:
+            return np.empty(0, dtype="datetime64[D]"), np.zeros((0, werte), dtype=np.int64)
+        erste = int(wochen.min())
+        anzahl_wochen = int(wochen.max()) - erste + 1
+        zaehler = np.bincount((wochen - erste) * werte + codes, minlength=anzahl_wochen * werte)
+        montage = ((np.arange(anzahl_wochen) + erste) * 7 - 3).astype("datetime64[D]")
+        return montage, zaehler.reshape(anzahl_wochen, werte)
+
+    def hang_maske(self, name):
+        """Boolesche Maske der Zeilen eines Hangs."""
+        if name not in self.haenge:
+            return np.zeros(self.zeilen, dtype=bool)
+        return self.spalte("hang") == self.haenge.index(name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lawinen.archiv", description="Spaltenweises Bewertungsarchiv")
+    unter = parser.add_subparsers(dest="befehl", required=True)
+    importieren = unter.add_parser("import", help="Bewertungen aus einer SQLite-Ablage anhängen")
+    importieren.add_argument("datenbank")
+    importieren.add_argument("verzeichnis")
+    bericht = unter.add_parser("bericht", help="Kategorien pro Woche ausgeben")
+    bericht.add_argument("verzeichnis")
+    bericht.add_argument("--tool", type=int, choices=[1, 2], default=1)
+    args = parser.parse_args(argv)
+
+    if args.befehl == "import":
+        from .speicher import Bewertungsspeicher
+
+        speicher = Bewertungsspeicher(args.datenbank)
+        print(f"{aus_speicher(speicher, args.verzeichnis)} neue oder ergänzte Bewertungen nach {args.verzeichnis} übertragen")
+        speicher.schliessen()
+        return
+
+    archiv = Archiv(args.verzeichnis)
+    kategorien = KATEGORIEN if args.tool == 1 else KATEGORIEN_TOOL2
+    start = time.perf_counter()
+    montage, zaehler = archiv.verteilung_pro_woche(f"kategorie_tool{args.tool}")
+    dauer = (time.perf_counter() - start) * 1000
+    print(f"{'Woche ab':10} " + " ".join(f"{str(k or 'ungültig'):>9}" for k in kategorien))
+    for montag, zeile in zip(montage, zaehler):
+        if zeile.any():
+            print(f"{montag!s:10} " + " ".join(f"{anzahl:9d}" for anzahl in zeile))
+    print(f"{len(archiv)} Bewertungen, ausgewertet in {dauer:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
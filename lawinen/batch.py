@@ -0,0 +1,176 @@
+"""
+Vektorisierte Stapelbewertung mit NumPy.
+
+Antworten werden als Integer-Codes übergeben: 0 = nicht beantwortet,
+1..n = Position der Option in der Fragendefinition (ohne die leere Option).
+Bei Tool 1 entspricht der Code damit dem Gefahren-Typ (1, 2 oder 3).
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from .gesamt import GESAMT_STUFEN, GESAMTRISIKO
+from .katalog import KATALOG
+from .setzung import SETZUNG_OPTIONEN
+from .tool1 import (
+    FRAGEN_DEFINITIONS,
+    KAT_GERING,
+    KAT_HOCH,
+    KAT_MODERAT,
+    KAT_UNGUELTIG,
+    KATEGORIEN,
+    SCHWELLE_HOCH,
+    SCHWELLE_MODERAT,
+)
+from .tool2 import (
+    FARB_SCHWELLENWERTE,
+    FEHLER_FRAGE6_ODER_7,
+    FEHLER_FRAGE6_UND_7,
+    FEHLER_KEINER,
+    FEHLER_PFLICHTFRAGEN,
+    FRAGEN,
+    GEWICHTE,
+    KATEGORIEN_TOOL2,
+)
+
+# Spalten der Tool-1-Codematrix: die neun Fragen und das Setzungsergebnis
+SPALTEN_TOOL1 = list(FRAGEN_DEFINITIONS) + ["Setzung"]
+
+
+class Tool1Stapel(NamedTuple):
+    """Ergebnis von bewerte_tool1_batch, ein Array-Eintrag pro Bewertung."""
+    gefahrenindex: np.ndarray   # float64, 0 wenn keine Frage beantwortet wurde
+    typ1: np.ndarray            # uint8
+    typ2: np.ndarray            # uint8
+    typ3: np.ndarray            # uint8
+    anzahl: np.ndarray          # uint8, Anzahl der beantworteten Fragen (inkl. Setzung)
+    gueltig: np.ndarray         # bool, mindestens 3 Antworten mit dem gleichen Typ
+    kategorie: np.ndarray       # uint8, KAT_HOCH / KAT_MODERAT / KAT_GERING oder KAT_UNGUELTIG
+
+
+class Tool2Stapel(NamedTuple):
+    """Ergebnis von bewerte_tool2_batch. Zeilen mit Fehlercode haben NaN als Mittelwert."""
+    fehler: np.ndarray          # uint8, FEHLER_* aus tool2 pro Zeile
+    mw_ung: np.ndarray          # float64
+    mw_gew: np.ndarray          # float64
+    kategorie_ung: np.ndarray   # uint8, KAT_HOCH / KAT_MODERAT (mäßig) / KAT_GERING oder KAT_UNGUELTIG
+    kategorie_gew: np.ndarray   # uint8
+
+
+def punkte_tabelle_tool1(fragen_definitions=FRAGEN_DEFINITIONS):
+    """
+    Baut die Punktetabelle (10 x 4) für die Codematrix: Zeile = Spalte der Matrix,
+    Spalte = Antwortcode. Code 0 (nicht beantwortet) hat immer 0 Punkte.
+    """
+    zeilen = [list(optionen.values()) for optionen in fragen_definitions.values()]
+    zeilen.append(list(SETZUNG_OPTIONEN.values()))
+    return np.array(zeilen, dtype=np.float64)
+
+
+def kodiere_tool1(auswahlen, setzung=("", 0)):
+    """Wandelt Antworttexte (dict Frage -> Option) und das Setzungsergebnis in eine Codezeile um."""
+    codes = [frage.codes[auswahlen.get(frage.frage, "")] for frage in KATALOG.tool1]
+    beschreibung, punktwert_setzung = setzung
+    codes.append(list(SETZUNG_OPTIONEN).index(beschreibung) if punktwert_setzung else 0)
+    return codes
+
+
+def bewerte_tool1_batch(codes, punkte_tabelle=None):
+    """
+    Bewertet viele Tool-1-Bewertungen auf einmal.
+
+    codes: Integer-Matrix (n x 10), Spalten wie SPALTEN_TOOL1, Werte 0..3
+    punkte_tabelle: optional eine geänderte Tabelle aus punkte_tabelle_tool1()
+    """
+    codes = np.asarray(codes)
+    if codes.ndim != 2 or codes.shape[1] != len(SPALTEN_TOOL1):
+        raise ValueError(f"Codematrix muss die Form (n, {len(SPALTEN_TOOL1)}) haben, nicht {codes.shape}")
+    if codes.size and (codes.min() < 0 or codes.max() > 3):
+        raise ValueError("Antwortcodes müssen zwischen 0 und 3 liegen")
+    if punkte_tabelle is None:
+        punkte_tabelle = punkte_tabelle_tool1()
+
+    punkte = punkte_tabelle[np.arange(codes.shape[1]), codes]
+    summe = punkte.sum(axis=1)
+    anzahl = np.count_nonzero(codes, axis=1).astype(np.uint8)
+
+    typ1 = np.count_nonzero(codes == 1, axis=1).astype(np.uint8)
+    typ2 = np.count_nonzero(codes == 2, axis=1).astype(np.uint8)
+    typ3 = np.count_nonzero(codes == 3, axis=1).astype(np.uint8)
+    gueltig = (typ1 >= 3) | (typ2 >= 3) | (typ3 >= 3)
+
+    gefahrenindex = np.divide(summe, anzahl, out=np.zeros_like(summe), where=anzahl > 0)
+
+    kategorie = np.full(codes.shape[0], KAT_GERING, dtype=np.uint8)
+    kategorie[gefahrenindex >= SCHWELLE_MODERAT] = KAT_MODERAT
+    kategorie[gefahrenindex >= SCHWELLE_HOCH] = KAT_HOCH
+    kategorie[~gueltig] = KAT_UNGUELTIG
+
+    return Tool1Stapel(gefahrenindex, typ1, typ2, typ3, anzahl, gueltig, kategorie)
+
+
+def punkte_tabelle_tool2(fragen=FRAGEN):
+    """Baut die Punktetabelle (7 x 5) für Tool 2; Code 0 (nicht beantwortet) hat 0 Punkte."""
+    return np.array([[0] + [wert for _, wert in optionen] for _, optionen, _ in fragen], dtype=np.float64)
+
+
+def kategorie_tool2_batch(werte):
+    """Vektorisierte Variante von tool2.kategorie_tool2; NaN ergibt KAT_UNGUELTIG."""
+    kategorie = np.full(werte.shape, KAT_HOCH, dtype=np.uint8)
+    kategorie[werte <= FARB_SCHWELLENWERTE["maessig"]["wert"]] = KAT_MODERAT
+    kategorie[werte <= FARB_SCHWELLENWERTE["gering"]["wert"]] = KAT_GERING
+    kategorie[np.isnan(werte)] = KAT_UNGUELTIG
+    return kategorie
+
+
+def bewerte_tool2_batch(codes, gewichte=GEWICHTE, punkte_tabelle=None):
+    """
+    Bewertet viele Tool-2-Bewertungen auf einmal.
+
+    codes: Integer-Matrix (n x 7), eine Spalte pro Frage, Werte 0..4 (0 = nicht beantwortet)
+    gewichte: Gewichte der sieben Fragen
+    Statt st.stop() wird pro Zeile ein Fehlercode zurückgegeben.
+    """
+    codes = np.asarray(codes)
+    if codes.ndim != 2 or codes.shape[1] != len(FRAGEN):
+        raise ValueError(f"Codematrix muss die Form (n, {len(FRAGEN)}) haben, nicht {codes.shape}")
+    if codes.size and (codes.min() < 0 or codes.max() > 4):
+        raise ValueError("Antwortcodes müssen zwischen 0 und 4 liegen")
+    if punkte_tabelle is None:
+        punkte_tabelle = punkte_tabelle_tool2()
+    gewichte = np.asarray(gewichte, dtype=np.float64)
+
+    # Maske der beantworteten Fragen; bei gültigen Zeilen enthält sie genau eine von Frage 6/7
+    beantwortet = codes > 0
+    frage6 = beantwortet[:, 5]
+    frage7 = beantwortet[:, 6]
+
+    fehler = np.full(codes.shape[0], FEHLER_KEINER, dtype=np.uint8)
+    fehler[~frage6 & ~frage7] = FEHLER_FRAGE6_ODER_7
+    fehler[frage6 & frage7] = FEHLER_FRAGE6_UND_7
+    fehler[~beantwortet[:, :5].all(axis=1)] = FEHLER_PFLICHTFRAGEN
+    ok = fehler == FEHLER_KEINER
+
+    werte = punkte_tabelle[np.arange(codes.shape[1]), codes]
+    mw_ung = np.full(codes.shape[0], np.nan)
+    mw_gew = np.full(codes.shape[0], np.nan)
+    mw_ung[ok] = werte[ok].sum(axis=1) / beantwortet[ok].sum(axis=1)
+    mw_gew[ok] = (werte[ok] @ gewichte) / (beantwortet[ok] @ gewichte)
+
+    return Tool2Stapel(fehler, mw_ung, mw_gew, kategorie_tool2_batch(mw_ung), kategorie_tool2_batch(mw_gew))
+
+
+def gesamtrisiko_tabelle():
+    """Tabelle (4 x 4) Kategorie Tool 1 x Kategorie Tool 2 -> Index in GESAMT_STUFEN."""
+    tabelle = np.zeros((len(KATEGORIEN), len(KATEGORIEN_TOOL2)), dtype=np.uint8)
+    for (kategorie1, kategorie2), risiko in GESAMTRISIKO.items():
+        tabelle[KATEGORIEN.index(kategorie1), KATEGORIEN_TOOL2.index(kategorie2)] = GESAMT_STUFEN.index(risiko.stufe)
+    return tabelle
+
+
+def gesamtrisiko_batch(kategorie_tool1, kategorie_tool2_gew):
+    """
+    Vektorisierte Variante von gesamt.gesamtrisiko über die Kategorie-Codes beider Tools.
+    Gibt den Index in GESAMT_STUFEN zurück; 0 ("keine"), wenn eines der Tools ungültig ist.
+    """
+    return gesamtrisiko_tabelle()[np.asarray(kategorie_tool1), np.asarray(kategorie_tool2_gew)]
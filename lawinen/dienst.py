@@ -0,0 +1,295 @@
+"""
+HTTP-Dienst für die Bewertung (asyncio, nur Standardbibliothek und numpy).
+
+Endpunkte (JSON, Eingabezeilen wie bei lawinen.stapel):
+    POST /bewerten          eine Bewertung -> ein Ergebnis
+    POST /bewerten/stapel   Liste von Bewertungen -> Liste von Ergebnissen
+    GET  /metriken          Anzahl, p50/p99 der Latenz und mittlere Stapelgröße
+    GET  /gesund            {"ok": true}
+
+Gleichzeitige Einzelanfragen werden gesammelt: der erste Eintrag öffnet ein Zeitfenster
+(--fenster-ms), alles, was bis dahin eintrifft (höchstens --max-stapel), wird mit der
+NumPy-Stapelbewertung in einem Aufruf bewertet.
+
+Aufruf:
+    python -m lawinen.dienst --port 8080
+    curl -d '{"tool1_1": 1, "tool1_2": 2, "tool1_3": 1, "stunden": 0}' localhost:8080/bewerten
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from http import HTTPStatus
+
+from .stapel import bewerte_block, ergebnis_werte
+
+FENSTER_MS = 2.0
+MAX_STAPEL = 1024
+MAX_KOERPER = 16 * 1024 * 1024
+LATENZEN = 10_000   # so viele Messwerte pro Endpunkt gehen in p50/p99 ein
+ENDPUNKTE = ("/bewerten", "/bewerten/stapel", "/metriken", "/gesund")
+
+logger = logging.getLogger(__name__)
+
+
+def bewerte_zeilen(zeilen):
+    """
+    Bewertet eine Liste von Eingabezeilen; gibt pro Zeile ein Ergebnis-dict zurück.
+    Jeder Fehler der Bewertung wird als ValueError (Antwort 400) weitergegeben.
+    """
+    try:
+        werte = ergebnis_werte(bewerte_block(zeilen))
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.exception("Bewertung fehlgeschlagen")
+        raise ValueError(f"Eingabe nicht bewertbar ({type(e).__name__}: {e})") from None
+    return [{name: spalte[i] for name, spalte in werte.items()} for i in range(len(zeilen))]
+
+
+class Sammler:
+    """Sammelt Einzelanfragen für kurze Zeit und bewertet sie gemeinsam."""
+
+    def __init__(self, fenster_ms=FENSTER_MS, max_stapel=MAX_STAPEL):
+        self.fenster = fenster_ms / 1000
+        self.max_stapel = max_stapel
+        self.stapel = 0
+        self.zeilen = 0
+        self._warteschlange = asyncio.Queue()
+        self._aufgabe = None
+
+    def starten(self):
+        self._aufgabe = asyncio.create_task(self._sammeln())
+
+    async def stoppen(self):
+        if self._aufgabe:
+            self._aufgabe.cancel()
+            await asyncio.gather(self._aufgabe, return_exceptions=True)
+
+    async def bewerten(self, zeile):
+        ergebnis = asyncio.get_running_loop().create_future()
+        self._warteschlange.put_nowait((zeile, ergebnis))
+        return await ergebnis
+
+    async def _sammeln(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            eintraege = [await self._warteschlange.get()]
+            frist = loop.time() + self.fenster
+            while len(eintraege) < self.max_stapel:
+                rest = frist - loop.time()
+                try:
+                    eintraege.append(self._warteschlange.get_nowait() if rest <= 0 else
+                                     await asyncio.wait_for(self._warteschlange.get(), rest))
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+            try:
+                self._bewerte(eintraege)
+            except Exception as e:
+                # Die Sammelschleife muss weiterlaufen, sonst hängen alle folgenden Anfragen
+                logger.exception("Stapel konnte nicht bewertet werden")
+                for _, ziel in eintraege:
+                    _setzen(ziel, fehler=ValueError(f"Bewertung fehlgeschlagen ({type(e).__name__})"))
+
+    def _bewerte(self, eintraege):
+        self.stapel += 1
+        self.zeilen += len(eintraege)
+        try:
+            ergebnisse = bewerte_zeilen([zeile for zeile, _ in eintraege])
+        except Exception:
+            # Eine ungültige Zeile darf die anderen nicht mitreißen: einzeln wiederholen
+            for zeile, ziel in eintraege:
+                try:
+                    ergebnis = bewerte_zeilen([zeile])[0]
+                except ValueError as e:
+                    _setzen(ziel, fehler=e)
+                else:
+                    _setzen(ziel, ergebnis)
+            return
+        for (_, ziel), ergebnis in zip(eintraege, ergebnisse):
+            _setzen(ziel, ergebnis)
+
+
+def _setzen(ziel, ergebnis=None, fehler=None):
+    if ziel.done():  # Verbindung inzwischen abgebrochen
+        return
+    if fehler is not None:
+        ziel.set_exception(fehler)
+    else:
+        ziel.set_result(ergebnis)
+
+
+class Metriken:
+    """Latenzen der letzten LATENZEN Anfragen pro Endpunkt."""
+
+    def __init__(self):
+        self.anzahl = {}
+        self._latenzen = {}
+
+    def erfassen(self, endpunkt, sekunden):
+        self.anzahl[endpunkt] = self.anzahl.get(endpunkt, 0) + 1
+        self._latenzen.setdefault(endpunkt, deque(maxlen=LATENZEN)).append(sekunden * 1000)
+
+    def bericht(self, sammler):
+        endpunkte = {}
+        for endpunkt, latenzen in self._latenzen.items():
+            sortiert = sorted(latenzen)
+            endpunkte[endpunkt] = {
+                "anzahl": self.anzahl[endpunkt],
+                "p50_ms": round(sortiert[int(0.50 * (len(sortiert) - 1))], 3),
+                "p99_ms": round(sortiert[int(0.99 * (len(sortiert) - 1))], 3),
+            }
+        return {
+            "endpunkte": endpunkte,
+            "stapel": sammler.stapel,
+            "mittlere_stapelgroesse": round(sammler.zeilen / sammler.stapel, 2) if sammler.stapel else 0,
+        }
+
+
+class HttpFehler(Exception):
+    def __init__(self, status, text=None):
+        super().__init__(text or status.phrase)
+        self.status = status
+
+
+class Dienst:
+    def __init__(self, fenster_ms=FENSTER_MS, max_stapel=MAX_STAPEL):
+        self.sammler = Sammler(fenster_ms, max_stapel)
+        self.metriken = Metriken()
+
+    async def starten(self, host="127.0.0.1", port=8080):
+        self.sammler.starten()
+        return await asyncio.start_server(self._verbindung, host, port)
+
+    async def stoppen(self):
+        await self.sammler.stoppen()
+
+    async def _verbindung(self, leser, schreiber):
+        try:
+            while True:
+                anfrage = await _lese_anfrage(leser)
+                if anfrage is None:
+                    break
+                methode, pfad, kopf, koerper = anfrage
+                start = time.perf_counter()
+                try:
+                    status, antwort = HTTPStatus.OK, await self._bearbeiten(methode, pfad, koerper)
+                except HttpFehler as e:
+                    status, antwort = e.status, {"fehler": str(e)}
+                except ValueError as e:
+                    status, antwort = HTTPStatus.BAD_REQUEST, {"fehler": str(e)}
+                offen = kopf.get("connection", "").lower() != "close"
+                _schreibe_antwort(schreiber, status, antwort, offen)
+                await schreiber.drain()
+                self.metriken.erfassen(pfad if pfad in ENDPUNKTE else "andere", time.perf_counter() - start)
+                if not offen:
+                    break
+        except HttpFehler as e:
+            _schreibe_antwort(schreiber, e.status, {"fehler": str(e)}, offen=False)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            schreiber.close()
+
+    async def _bearbeiten(self, methode, pfad, koerper):
+        if pfad == "/gesund":
+            return {"ok": True}
+        if pfad == "/metriken":
+            return self.metriken.bericht(self.sammler)
+        if pfad not in ENDPUNKTE:
+            raise HttpFehler(HTTPStatus.NOT_FOUND)
+        if methode != "POST":
+            raise HttpFehler(HTTPStatus.METHOD_NOT_ALLOWED)
+
+        if pfad == "/bewerten":
+            daten = _json(koerper)
+            if not isinstance(daten, dict):
+                raise ValueError("JSON-Objekt erwartet")
+            return await self.sammler.bewerten(daten)
+        # Große Stapel (bis MAX_KOERPER) samt JSON im Thread-Pool, damit Einzelanfragen und Sammler nicht warten
+        return await asyncio.to_thread(_stapel_bewerten, koerper)
+
+
+def _json(koerper):
+    try:
+        return json.loads(koerper)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"kein gültiges JSON ({e.msg})") from None
+
+
+def _stapel_bewerten(koerper):
+    """Liest, bewertet und kodiert einen Stapel; gibt den fertigen Antwortkörper (bytes) zurück."""
+    daten = _json(koerper)
+    if not isinstance(daten, list) or not all(isinstance(zeile, dict) for zeile in daten):
+        raise ValueError("Liste von JSON-Objekten erwartet")
+    return _kodieren(bewerte_zeilen(daten) if daten else [])
+
+
+def _kodieren(antwort):
+    return json.dumps(antwort, ensure_ascii=False).encode("utf-8")
+
+
+async def _lese_anfrage(leser):
+    """Liest eine HTTP/1.1-Anfrage; None, wenn die Verbindung vorher geschlossen wurde."""
+    zeile = await leser.readline()
+    if not zeile:
+        return None
+    try:
+        methode, ziel, _ = zeile.decode("latin-1").split()
+    except ValueError:
+        raise HttpFehler(HTTPStatus.BAD_REQUEST) from None
+    kopf = {}
+    while (zeile := await leser.readline()) not in (b"\r\n", b"\n", b""):
+        name, _, wert = zeile.decode("latin-1").partition(":")
+        kopf[name.strip().lower()] = wert.strip()
+    try:
+        laenge = int(kopf.get("content-length", 0) or 0)
+    except ValueError:
+        raise HttpFehler(HTTPStatus.BAD_REQUEST, "ungültige Content-Length") from None
+    if laenge < 0:
+        raise HttpFehler(HTTPStatus.BAD_REQUEST, "ungültige Content-Length")
+    if laenge > MAX_KOERPER:
+        raise HttpFehler(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    koerper = await leser.readexactly(laenge) if laenge else b""
+    return methode, ziel.split("?", 1)[0], kopf, koerper
+
+
+def _schreibe_antwort(schreiber, status, antwort, offen):
+    koerper = antwort if isinstance(antwort, bytes) else _kodieren(antwort)
+    schreiber.write(
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(koerper)}\r\n"
+        f"Connection: {'keep-alive' if offen else 'close'}\r\n\r\n".encode("latin-1") + koerper
+    )
+
+
+async def _betreiben(host, port, fenster_ms, max_stapel):
+    dienst = Dienst(fenster_ms, max_stapel)
+    server = await dienst.starten(host, port)
+    logger.info("Bewertungsdienst auf http://%s:%d (Fenster %.1f ms)", host, port, fenster_ms)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await dienst.stoppen()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lawinen.dienst", description="HTTP-Dienst für die Bewertung")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--fenster-ms", type=float, default=FENSTER_MS, help="Sammelfenster für Einzelanfragen")
+    parser.add_argument("--max-stapel", type=int, default=MAX_STAPEL)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    try:
+        asyncio.run(_betreiben(args.host, args.port, args.fenster_ms, args.max_stapel))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Geländemodus: Hangneigung und Exposition aus Höhenrastern (Tool 1, "Hangneigung / Exposition").
+
+Ein Raster ist eine .npy-Datei (float32 Höhen bzw. uint8 Codes, Zeile 0 = Norden) mit einer
+gleichnamigen .json-Datei für die Georeferenz (linke untere Ecke, Zellgröße, Ausdehnung).
+ESRI-ASCII-Grids werden einmal zeilenweise in dieses Format übertragen; GeoTIFFs lassen sich
+vorher z. B. mit "gdal_translate -of AAIGrid" umwandeln. Gelesen wird per memory-map in
+Kacheln mit einer Zelle Rand, sodass auch Täler mit mehreren hundert Millionen Zellen mit
+beschränktem Speicher verarbeitet werden.
+
+Neigung und Exposition folgen dem Horn-Verfahren (3x3-Differenzen). Zellen am Rasterrand oder
+mit fehlenden Höhen in der Nachbarschaft erhalten Code 0 (nicht bestimmbar).
+
+Aufruf:
+    python -m lawinen.gelaende import tal.asc tal.npy
+    python -m lawinen.gelaende codes tal.npy tal_hang.npy
+    python -m lawinen.gelaende abfrage tal_hang.npy 2634500 1164200
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from .katalog import KATALOG
+
+FRAGE = "Hangneigung / Exposition"
+KACHEL = 1024                 # Zellen pro Kachelseite
+STEIL = 35                    # Grad; darüber Code 1 bei ungünstiger Exposition
+MITTEL = 30                   # Grad; ab hier mindestens Code 2
+# Ungünstige Expositionen als Sektor im Uhrzeigersinn (Grad, 0 = Nord): NW über N bis O
+UNGUENSTIG = (315, 90)
+
+
+class Georeferenz(NamedTuple):
+    """Lage eines Rasters: linke untere Ecke (x, y), Zellgröße und Ausdehnung in Zellen."""
+    x: float
+    y: float
+    zellgroesse: float
+    zeilen: int
+    spalten: int
+
+    def zelle(self, x, y):
+        """(Zeile, Spalte) der Zelle, die den Punkt enthält; ValueError außerhalb des Rasters."""
+        spalte = int((x - self.x) // self.zellgroesse)
+        zeile = self.zeilen - 1 - int((y - self.y) // self.zellgroesse)
+        if not (0 <= zeile < self.zeilen and 0 <= spalte < self.spalten):
+            raise ValueError(f"Punkt ({x}, {y}) liegt außerhalb des Rasters")
+        return zeile, spalte
+
+
+def _json_pfad(pfad):
+    return Path(pfad).with_suffix(".json")
+
+
+def lade_georeferenz(pfad):
+    with open(_json_pfad(pfad), encoding="utf-8") as f:
+        return Georeferenz(**json.load(f))
+
+
+def _raster_anlegen(pfad, georeferenz, dtype):
+    with open(_json_pfad(pfad), "w", encoding="utf-8") as f:
+        json.dump(georeferenz._asdict(), f, indent=2)
+    return np.lib.format.open_memmap(pfad, mode="w+", dtype=dtype, shape=(georeferenz.zeilen, georeferenz.spalten))
+
+
+def oeffnen(pfad):
+    """Raster als nur lesbares memory-map und seine Georeferenz."""
+    return np.load(pfad, mmap_mode="r"), lade_georeferenz(pfad)
+
+
+def ascii_importieren(quelle, ziel, zeilen_pro_block=256):
+    """
+    Überträgt ein ESRI-ASCII-Grid zeilenweise in ein float32-Raster (NODATA -> NaN).
+    Gibt die Georeferenz zurück. Der Speicherbedarf hängt nur von zeilen_pro_block ab.
+    """
+    with open(quelle, encoding="ascii") as f:
+        kopf = {}
+        while len(kopf) < 6:
+            position = f.tell()
+            zeile = f.readline()
+            name, _, wert = zeile.strip().partition(" ")
+            if not name or not name[0].isalpha():
+                f.seek(position)  # NODATA_value fehlt, die Daten beginnen
+                break
+            kopf[name.lower()] = float(wert)
+        spalten, zeilen, zellgroesse = int(kopf["ncols"]), int(kopf["nrows"]), kopf["cellsize"]
+        x = kopf["xllcorner"] if "xllcorner" in kopf else kopf["xllcenter"] - zellgroesse / 2
+        y = kopf["yllcorner"] if "yllcorner" in kopf else kopf["yllcenter"] - zellgroesse / 2
+        georeferenz = Georeferenz(x, y, zellgroesse, zeilen, spalten)
+        nodata = kopf.get("nodata_value")
+
+        raster = _raster_anlegen(ziel, georeferenz, np.float32)
+        puffer = np.empty(0, dtype=np.float32)
+        zeile = 0
+        while zeile < zeilen:
+            text = "".join(f.readline() for _ in range(zeilen_pro_block))
+            if not text:
+                raise ValueError(f"{quelle}: nach {zeile} von {zeilen} Zeilen zu Ende")
+            werte = np.array(text.split(), dtype=np.float32)
+            puffer = np.concatenate([puffer, werte]) if puffer.size else werte
+            fertig = min(puffer.size // spalten, zeilen - zeile)
+            if fertig:
+                block = puffer[:fertig * spalten].reshape(fertig, spalten)
+                if nodata is not None:
+                    block[block == nodata] = np.nan
+                raster[zeile:zeile + fertig] = block
+                zeile += fertig
+                puffer = puffer[fertig * spalten:]
+        raster.flush()
+    return georeferenz
+
+
+def kacheln(zeilen, spalten, groesse=KACHEL):
+    """Kacheln (zeile_von, zeile_bis, spalte_von, spalte_bis) über das ganze Raster."""
+    for zeile in range(0, zeilen, groesse):
+        for spalte in range(0, spalten, groesse):
+            yield zeile, min(zeile + groesse, zeilen), spalte, min(spalte + groesse, spalten)
+
+
+def fenster(raster, kachel, rand=1):
+    """Ausschnitt einer Kachel mit rand Zellen ringsum als float64; außerhalb des Rasters NaN."""
+    z0, z1, s0, s1 = kachel
+    zeilen, spalten = raster.shape
+    ausschnitt = np.full((z1 - z0 + 2 * rand, s1 - s0 + 2 * rand), np.nan)
+    von_z, bis_z, von_s, bis_s = max(z0 - rand, 0), min(z1 + rand, zeilen), max(s0 - rand, 0), min(s1 + rand, spalten)
+    ausschnitt[von_z - (z0 - rand):bis_z - (z0 - rand), von_s - (s0 - rand):bis_s - (s0 - rand)] = raster[von_z:bis_z, von_s:bis_s]
+    return ausschnitt
+
+
+def neigung_exposition(hoehen, zellgroesse):
+    """
+    Neigung (Grad) und Exposition (Grad im Uhrzeigersinn ab Nord, Richtung hangabwärts) nach Horn
+    für die inneren Zellen eines Höhenausschnitts (Ergebnis um je eine Zelle pro Seite kleiner).
+    """
+    a, b, c = hoehen[:-2, :-2], hoehen[:-2, 1:-1], hoehen[:-2, 2:]
+    d, f = hoehen[1:-1, :-2], hoehen[1:-1, 2:]
+    g, h, i = hoehen[2:, :-2], hoehen[2:, 1:-1], hoehen[2:, 2:]
+    dz_ost = ((c + 2 * f + i) - (a + 2 * d + g)) / (8 * zellgroesse)
+    dz_sued = ((g + 2 * h + i) - (a + 2 * b + c)) / (8 * zellgroesse)
+    neigung = np.degrees(np.arctan(np.hypot(dz_ost, dz_sued)))
+    exposition = np.degrees(np.arctan2(-dz_ost, dz_sued)) % 360
+    neigung[np.isnan(hoehen[1:-1, 1:-1])] = np.nan  # die Zelle selbst geht in Horn nicht ein
+    return neigung, exposition
+
+
+def unguenstige_exposition(exposition, sektor=UNGUENSTIG):
+    """True für Expositionen im Sektor (von, bis) im Uhrzeigersinn, auch über Nord hinweg."""
+    von, bis = sektor
+    if von <= bis:
+        return (exposition >= von) & (exposition <= bis)
+    return (exposition >= von) | (exposition <= bis)
+
+
+def hang_codes(neigung, exposition, sektor=UNGUENSTIG):
+    """
+    Code der Frage "Hangneigung / Exposition" pro Zelle: 1 über STEIL Grad mit ungünstiger
+    Exposition, 2 ab MITTEL Grad (steiler bei günstiger Exposition: "teils ungünstig"),
+    3 darunter; 0 ohne gültige Neigung.
+    """
+    codes = np.full(neigung.shape, 3, dtype=np.uint8)
+    codes[neigung >= MITTEL] = 2
+    codes[(neigung > STEIL) & unguenstige_exposition(exposition, sektor)] = 1
+    codes[np.isnan(neigung)] = 0
+    return codes
+
+
+def codes_berechnen(quelle, ziel, kachel=KACHEL, sektor=UNGUENSTIG):
+    """
+    Schreibt für ein Höhenraster das uint8-Raster der Hang-Codes (gleiche Georeferenz).
+    Gibt die Anzahl der Zellen je Code 0..3 zurück.
+    """
+    hoehen, georeferenz = oeffnen(quelle)
+    codes = _raster_anlegen(ziel, georeferenz, np.uint8)
+    anzahl = np.zeros(4, dtype=np.int64)
+    for teil in kacheln(*hoehen.shape, kachel):
+        z0, z1, s0, s1 = teil
+        with np.errstate(invalid="ignore"):
+            neigung, exposition = neigung_exposition(fenster(hoehen, teil), georeferenz.zellgroesse)
+            block = hang_codes(neigung, exposition, sektor)
+        codes[z0:z1, s0:s1] = block
+        anzahl += np.bincount(block.ravel(), minlength=4)
+    codes.flush()
+    return anzahl
+
+
+def antwort(code):
+    """Optionstext der Frage "Hangneigung / Exposition" zu einem Code ("" für 0)."""
+    frage = next(frage for frage in KATALOG.tool1 if frage.frage == FRAGE)
+    return frage.texte[code]
+
+
+def bewerten(codes_pfad, ziel, auswahlen, setzung=("", 0), kachel=KACHEL):
+    """
+    Tool-1-Kategorie (KAT_*) pro Zelle: die übrigen Antworten (auswahlen, setzung) gelten für
+    das ganze Gebiet, "Hangneigung / Exposition" kommt aus dem Code-Raster. Da nur die vier
+    Codes 0..3 vorkommen, wird viermal bewertet und pro Kachel nachgeschlagen. Zellen ohne
+    Hang-Code (Code 0) bleiben ungültig.
+    Gibt die Anzahl der Zellen je Kategorie zurück.
+    """
+    from .batch import SPALTEN_TOOL1, bewerte_tool1_batch, kodiere_tool1
+    from .tool1 import KAT_UNGUELTIG
+
+    spalte = SPALTEN_TOOL1.index(FRAGE)
+    zeile = np.array(kodiere_tool1(auswahlen, setzung), dtype=np.uint8)
+    varianten = np.repeat(zeile[None, :], 4, axis=0)
+    varianten[:, spalte] = np.arange(4)
+    kategorie = bewerte_tool1_batch(varianten).kategorie
+    kategorie[0] = KAT_UNGUELTIG  # Zellen ohne Hang-Code (Rand, fehlende Höhen)
+
+    codes, georeferenz = oeffnen(codes_pfad)
+    ergebnis = _raster_anlegen(ziel, georeferenz, np.uint8)
+    anzahl = np.zeros(4, dtype=np.int64)
+    for z0, z1, s0, s1 in kacheln(*codes.shape, kachel):
+        block = kategorie[codes[z0:z1, s0:s1]]
+        ergebnis[z0:z1, s0:s1] = block
+        anzahl += np.bincount(block.ravel(), minlength=4)
+    ergebnis.flush()
+    return anzahl
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lawinen.gelaende", description="Hangneigung und Exposition aus Höhenrastern")
+    unter = parser.add_subparsers(dest="befehl", required=True)
+    importieren = unter.add_parser("import", help="ESRI-ASCII-Grid in ein .npy-Raster übertragen")
+    importieren.add_argument("quelle")
+    importieren.add_argument("ziel")
+    codes = unter.add_parser("codes", help="Hang-Codes für jedes Feld berechnen")
+    codes.add_argument("hoehen")
+    codes.add_argument("ziel")
+    codes.add_argument("--kachel", type=int, default=KACHEL)
+    abfrage = unter.add_parser("abfrage", help="Antwort an einem Punkt ausgeben")
+    abfrage.add_argument("codes")
+    abfrage.add_argument("x", type=float)
+    abfrage.add_argument("y", type=float)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        if args.befehl == "import":
+            georeferenz = ascii_importieren(args.quelle, args.ziel)
+            print(f"{georeferenz.zeilen} x {georeferenz.spalten} Zellen nach {args.ziel} übertragen")
+        elif args.befehl == "codes":
+            anzahl = codes_berechnen(args.hoehen, args.ziel, args.kachel)
+            for code, n in enumerate(anzahl):
+                print(f"{n:12d}  {antwort(code) or 'nicht bestimmbar'}")
+        else:
+            raster, georeferenz = oeffnen(args.codes)
+            zeile, spalte = georeferenz.zelle(args.x, args.y)
+            print(f"{FRAGE}: {antwort(int(raster[zeile, spalte])) or 'nicht bestimmbar'}")
+            return
+    except (OSError, ValueError, KeyError) as e:
+        parser.exit(1, f"Fehler: {e}\n")
+    print(f"Dauer {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Kombinierte Gesamtbewertung aus Tool 1 (Auslösung) und Tool 2 (Ausmaß)."""
+from typing import NamedTuple
+
+from .tool2 import kategorie_tool2
+
+
+class Gesamtrisiko(NamedTuple):
+    stufe: str
+    text: str
+    farbe: str
+
+
+# Stufen in aufsteigender Reihenfolge; der Index ist der Code der Stapelbewertung (batch.gesamtrisiko_batch)
+GESAMT_STUFEN = ("keine", "gering", "moderat", "hoch", "sehr hoch", "extrem hoch")
+
+KEINE_GESAMTBEWERTUNG = Gesamtrisiko("keine", "Keine eindeutige Gesamtbewertung möglich.", "#ccc")
+
+# (Kategorie Tool 1, Kategorie Tool 2 gewichtet) -> Gesamtrisiko
+GESAMTRISIKO = {
+    ("gering", "gering"): Gesamtrisiko("gering", "✅ **Gesamtrisiko: GERING** (Geringe Auslösung, geringes Ausmaß)", "#4CAF50"),
+    ("gering", "maessig"): Gesamtrisiko("moderat", "🟡 **Gesamtrisiko: MODERAT** (Geringe Auslösung, aber mittleres Ausmaß möglich)", "#ffa500"),
+    ("gering", "hoch"): Gesamtrisiko("hoch", "🔴 **Gesamtrisiko: HOCH** (Geringe Auslösung, aber hohes Ausmaß möglich)", "#ff4b4b"),
+    ("moderat", "gering"): Gesamtrisiko("moderat", "🟡 **Gesamtrisiko: MODERAT** (Moderate Auslösung, aber geringes Ausmaß)", "#ffa500"),
+    ("moderat", "maessig"): Gesamtrisiko("hoch", "🔴 **Gesamtrisiko: HOCH** (Moderate Auslösung, mittleres Ausmaß)", "#ff4b4b"),
+    ("moderat", "hoch"): Gesamtrisiko("sehr hoch", "💥 **Gesamtrisiko: SEHR HOCH** (Moderate Auslösung, hohes Ausmaß)", "#8B0000"),  # Dunkelrot
+    ("hoch", "gering"): Gesamtrisiko("hoch", "🔴 **Gesamtrisiko: HOCH** (Hohe Auslösung, aber geringes Ausmaß)", "#ff4b4b"),
+    ("hoch", "maessig"): Gesamtrisiko("extrem hoch", "🔥🔥 **Gesamtrisiko: EXTREM HOCH** (Hohe Auslösung, hohes Ausmaß)", "#B22222"),
+    ("hoch", "hoch"): Gesamtrisiko("extrem hoch", "🔥🔥 **Gesamtrisiko: EXTREM HOCH** (Hohe Auslösung, hohes Ausmaß)", "#B22222"),
+}
+
+
+def gesamtrisiko(tool1_kategorie, mw_gew):
+    """Kombiniert die Kategorie aus Tool 1 mit dem gewichteten Mittelwert aus Tool 2."""
+    if tool1_kategorie is None or mw_gew is None:
+        return KEINE_GESAMTBEWERTUNG
+    return GESAMTRISIKO.get((tool1_kategorie, kategorie_tool2(mw_gew)), KEINE_GESAMTBEWERTUNG)
@@ -0,0 +1,330 @@
+"""
+Anpassung der Tool-2-Gewichte (und optional der Punkte) an beobachtete Lawinenereignisse.
+
+Modell: P(Lawine) = 1 / (1 + exp(-steilheit * (mw_gew - mitte))), mw_gew wie bei
+bewerte_tool2_batch. Angepasst wird mit Adam über die logarithmierten Gewichte (bleiben positiv)
+und, mit punkte=True, die Punkte der Optionen (bleiben >= 0 und in ihrer Reihenfolge aufsteigend).
+Ein Strafterm hält die Werte nahe am aktuellen Katalog.
+
+Tool 2 hat nur 4^5 * 4 * 2 gültige Antwortmuster. Die Bewertungen werden deshalb vorab
+pro Muster zu (Anzahl, Lawinen) zusammengefasst; ein Optimierungsschritt kostet danach
+unabhängig von der Datenmenge höchstens ein paar tausend Zeilen. Die Folds der
+Kreuzvalidierung laufen parallel in einem Prozess-Pool.
+
+Mit --export entsteht ein neuer Katalog mit erhöhter Version, den die Seiten über die
+Umgebungsvariable LAWINEN_KATALOG laden (siehe lawinen.katalog). Die Schwellen von Tool 2
+werden dabei so verschoben, dass sie dieselbe Lawinenwahrscheinlichkeit markieren wie vorher.
+
+Aufruf:
+    python -m lawinen.gewichte bewertungen.csv --ereignis lawine
+    python -m lawinen.gewichte bewertungen.csv --punkte --export katalog_2025.json
+    python -m lawinen.gewichte archiv/ --ereignisse lawinen.npy --folds 10 --prozesse 8
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+import numpy as np
+
+from .batch import bewerte_tool2_batch, punkte_tabelle_tool2
+from .kalibrierung import kurven, roc_auc
+from .katalog import KATALOG, KATALOG_PFAD
+from .tool2 import FEHLER_KEINER, GEWICHTE
+
+FOLDS = 5
+SCHRITTE = 1500
+LERNRATE = 0.05
+REGULARISIERUNG = 0.01
+_BASIS = 5  # Codes 0..4 pro Frage
+
+
+class Anpassung(NamedTuple):
+    """Ergebnis von anpassen(); gewichte und punkte_tabelle passen direkt zu bewerte_tool2_batch."""
+    gewichte: np.ndarray        # float64, auf die Summe der Ausgangsgewichte skaliert
+    punkte_tabelle: np.ndarray  # float64 (7 x 5), Spalte 0 = nicht beantwortet
+    steilheit: float
+    mitte: float                # mw_gew mit 50 % Lawinenwahrscheinlichkeit
+    verlust: float              # mittlere Log-Loss auf den Trainingsdaten
+
+
+class Fold(NamedTuple):
+    """Ergebnis eines Folds: Log-Loss und ROC-AUC auf den zurückgehaltenen Bewertungen."""
+    verlust_katalog: float
+    verlust_angepasst: float
+    auc_katalog: float
+    auc_angepasst: float
+
+
+def muster_zaehlen(codes, ereignisse, folds=1, seed=0):
+    """
+    Fasst gültige Tool-2-Bewertungen pro Antwortmuster zusammen.
+    Gibt (muster (m x 7), anzahl (folds x m), lawinen (folds x m)) zurück; jede Bewertung
+    landet zufällig in einem der Folds.
+    """
+    codes = np.asarray(codes)
+    ereignisse = np.asarray(ereignisse).astype(bool)
+    if len(codes) != len(ereignisse):
+        raise ValueError(f"{len(codes)} Bewertungen, aber {len(ereignisse)} Ereignisse")
+    gueltig = bewerte_tool2_batch(codes).fehler == FEHLER_KEINER
+    codes, ereignisse = codes[gueltig], ereignisse[gueltig]
+
+    stellen = _BASIS ** np.arange(codes.shape[1], dtype=np.int64)
+    schluessel = codes.astype(np.int64) @ stellen
+    vorhanden, schluessel = np.unique(schluessel, return_inverse=True)
+    fold = np.random.default_rng(seed).integers(0, folds, len(codes))
+    index = fold * len(vorhanden) + schluessel
+    anzahl = np.bincount(index, minlength=folds * len(vorhanden)).reshape(folds, -1)
+    lawinen = np.bincount(index, weights=ereignisse, minlength=folds * len(vorhanden)).reshape(folds, -1)
+    muster = (vorhanden[:, None] // stellen) % _BASIS
+    return muster.astype(np.uint8), anzahl.astype(np.float64), lawinen
+
+
+def _mittelwerte(muster, gewichte, tabelle):
+    beantwortet = muster > 0
+    werte = tabelle[np.arange(muster.shape[1]), muster]
+    nenner = beantwortet @ gewichte
+    return (werte @ gewichte) / nenner, werte, beantwortet, nenner
+
+
+def _verlust(mw, steilheit, mitte, anzahl, lawinen):
+    z = steilheit * (mw - mitte)
+    # log(1 + exp(z)) numerisch stabil; Verlust = Summe n * log(1 + e^z) - e * z
+    return float((anzahl @ np.logaddexp(0, z) - lawinen @ z) / max(anzahl.sum(), 1))
+
+
+def anpassen(muster, anzahl, lawinen, gewichte=GEWICHTE, punkte_tabelle=None, mit_gewichten=True,
+             punkte=False, regularisierung=REGULARISIERUNG, schritte=SCHRITTE, lernrate=LERNRATE):
+    """
+    Passt Gewichte (mit_gewichten), Punkte (punkte) sowie Steilheit und Mitte der Lawinenwahrscheinlichkeit
+    an zusammengefasste Bewertungen (siehe muster_zaehlen, eine Zeile von anzahl/lawinen) an.
+    Mit mit_gewichten=False und punkte=False wird nur die Wahrscheinlichkeit des Katalogs kalibriert.
+    """
+    anzahl = np.asarray(anzahl, dtype=np.float64)
+    lawinen = np.asarray(lawinen, dtype=np.float64)
+    gesamt = max(anzahl.sum(), 1)
+    start_gewichte = np.asarray(gewichte, dtype=np.float64)
+    start_tabelle = punkte_tabelle_tool2() if punkte_tabelle is None else np.asarray(punkte_tabelle, dtype=np.float64)
+    spalten = np.arange(muster.shape[1])
+
+    log_gewichte = np.log(start_gewichte)
+    tabelle = start_tabelle.copy()
+    mw, *_ = _mittelwerte(muster, start_gewichte, tabelle)
+    rate = lawinen.sum() / gesamt
+    streuung = np.sqrt(anzahl @ (mw - mw @ anzahl / gesamt) ** 2 / gesamt) or 1.0
+    parameter = [log_gewichte, tabelle, np.array([1 / streuung, mw @ anzahl / gesamt])]
+    if 0 < rate < 1:
+        # Mitte so verschieben, dass die mittlere Wahrscheinlichkeit anfangs zur Lawinenrate passt
+        parameter[2][1] += np.log(1 / rate - 1) * streuung
+    momente = [(np.zeros_like(p), np.zeros_like(p)) for p in parameter]
+    beta1, beta2 = 0.9, 0.999
+
+    for schritt in range(1, schritte + 1):
+        gewichte_ = np.exp(log_gewichte)
+        steilheit, mitte = parameter[2]
+        mw, werte, beantwortet, nenner = _mittelwerte(muster, gewichte_, tabelle)
+        p = 1 / (1 + np.exp(-steilheit * (mw - mitte)))
+        g = (anzahl * p - lawinen) / gesamt  # Ableitung des Verlusts nach z pro Muster
+
+        gradienten = [np.zeros_like(log_gewichte), np.zeros_like(tabelle), np.zeros(2)]
+        gradienten[2][0] = g @ (mw - mitte)
+        gradienten[2][1] = -steilheit * g.sum()
+        g_mw = steilheit * g / nenner
+        if mit_gewichten:
+            # d mw / d w_j = (punkte_j - mw) * beantwortet_j / nenner
+            gradienten[0] = (g_mw @ ((werte - mw[:, None]) * beantwortet)) * gewichte_
+            gradienten[0] += 2 * regularisierung * (log_gewichte - np.log(start_gewichte))
+        if punkte:
+            # d mw / d punkte[j, k] = w_j / nenner für jedes Muster mit Code k in Frage j
+            index = (spalten * _BASIS + muster).ravel()
+            beitrag = (g_mw[:, None] * gewichte_[None, :]).ravel()
+            gradienten[1] = np.bincount(index, weights=beitrag, minlength=tabelle.size).reshape(tabelle.shape)
+            optionen = start_tabelle > 0
+            gradienten[1][optionen] += 2 * regularisierung * (tabelle - start_tabelle)[optionen] / start_tabelle[optionen] ** 2
+            gradienten[1][:, 0] = 0
+
+        for p_, g_, (m, v) in zip(parameter, gradienten, momente):
+            m *= beta1
+            m += (1 - beta1) * g_
+            v *= beta2
+            v += (1 - beta2) * g_ ** 2
+            p_ -= lernrate * (m / (1 - beta1 ** schritt)) / (np.sqrt(v / (1 - beta2 ** schritt)) + 1e-8)
+        if punkte:
+            # Nicht beantwortet bleibt 0, Punkte >= 0 und innerhalb einer Frage aufsteigend
+            tabelle[:, 0] = 0
+            optionen = tabelle[:, 1:]
+            optionen[:] = np.maximum.accumulate(np.maximum(optionen, 0), axis=1)
+            optionen[start_tabelle[:, 1:] == 0] = 0  # Frage mit weniger Optionen
+
+    gewichte_ = np.exp(log_gewichte)
+    skala = start_gewichte.sum() / gewichte_.sum()  # mw_gew hängt nicht von der Skala der Gewichte ab
+    steilheit, mitte = parameter[2]
+    mw, *_ = _mittelwerte(muster, gewichte_, tabelle)
+    return Anpassung(gewichte_ * skala, tabelle, float(steilheit), float(mitte), _verlust(mw, steilheit, mitte, anzahl, lawinen))
+
+
+def bewerten(anpassung, muster, anzahl, lawinen):
+    """Log-Loss und ROC-AUC einer Anpassung auf zusammengefassten Bewertungen."""
+    mw, *_ = _mittelwerte(muster, anpassung.gewichte, anpassung.punkte_tabelle)
+    verlust = _verlust(mw, anpassung.steilheit, anpassung.mitte, anzahl, lawinen)
+    # AUC über die einzelnen Bewertungen: jedes Muster so oft, wie es mit und ohne Lawine vorkommt
+    mit, ohne = lawinen.astype(np.int64), (anzahl - lawinen).astype(np.int64)
+    werte = np.concatenate([np.repeat(mw, mit), np.repeat(mw, ohne)])
+    ereignisse = np.concatenate([np.ones(mit.sum(), dtype=bool), np.zeros(ohne.sum(), dtype=bool)])
+    return verlust, roc_auc(kurven(werte, ereignisse, strikt=True))
+
+
+def _fold(auftrag):
+    muster, training, test, punkte, regularisierung, schritte = auftrag
+    katalog = anpassen(muster, *training, mit_gewichten=False, schritte=schritte)
+    angepasst = anpassen(muster, *training, punkte=punkte, regularisierung=regularisierung, schritte=schritte)
+    verlust_k, auc_k = bewerten(katalog, muster, *test)
+    verlust_a, auc_a = bewerten(angepasst, muster, *test)
+    return Fold(verlust_k, verlust_a, auc_k, auc_a)
+
+
+def kreuzvalidierung(muster, anzahl, lawinen, punkte=False, regularisierung=REGULARISIERUNG,
+                     schritte=SCHRITTE, prozesse=None):
+    """
+    k-fache Kreuzvalidierung über die Folds von muster_zaehlen (eine Zeile pro Fold).
+    Vergleicht pro Fold die Katalogwerte mit der Anpassung; die Folds laufen parallel.
+    """
+    auftraege = []
+    for k in range(len(anzahl)):
+        training = (anzahl.sum(axis=0) - anzahl[k], lawinen.sum(axis=0) - lawinen[k])
+        auftraege.append((muster, training, (anzahl[k], lawinen[k]), punkte, regularisierung, schritte))
+    prozesse = min(prozesse or os.cpu_count(), len(auftraege))
+    if prozesse == 1:
+        return [_fold(auftrag) for auftrag in auftraege]
+    with ProcessPoolExecutor(prozesse) as pool:
+        return list(pool.map(_fold, auftraege))
+
+
+def schwellen_anpassen(katalog, anpassung, schwellen=None):
+    """
+    Verschiebt die Tool-2-Schwellen auf die neue mw_gew-Skala: jede Schwelle behält die
+    Lawinenwahrscheinlichkeit, die sie unter katalog (anpassen mit mit_gewichten=False) hatte.
+    """
+    schwellen = dict(KATALOG.schwellen_tool2 if schwellen is None else schwellen)
+    if katalog.steilheit <= 0 or anpassung.steilheit <= 0:
+        raise ValueError("Lawinenwahrscheinlichkeit steigt nicht mit mw_gew, Schwellen nicht übertragbar")
+    faktor = katalog.steilheit / anpassung.steilheit
+    return {name: anpassung.mitte + (wert - katalog.mitte) * faktor for name, wert in schwellen.items()}
+
+
+def exportieren(anpassung, ziel, katalog, quelle=KATALOG_PFAD, punkte=False):
+    """
+    Schreibt einen neuen Katalog mit angepassten Tool-2-Gewichten (und Punkten), dazu
+    passenden Schwellen (schwellen_anpassen mit katalog) und um 1 erhöhter Version.
+    Gibt die neue Version zurück.
+    """
+    with open(quelle, encoding="utf-8") as f:
+        daten = json.load(f)
+    daten["version"] += 1
+    alte = {**KATALOG.schwellen_tool2, **daten.get("schwellen_tool2", {})}
+    daten["schwellen_tool2"] = {
+        name: round(float(wert), 2) for name, wert in schwellen_anpassen(katalog, anpassung, alte).items()
+    }
+    for zeile, eintrag in enumerate(daten["tool2"]):
+        eintrag["gewicht"] = round(float(anpassung.gewichte[zeile]), 2)
+        if punkte:
+            for code, option in enumerate(eintrag["optionen"], start=1):
+                option["punkte"] = round(float(anpassung.punkte_tabelle[zeile, code]), 2)
+    with open(ziel, "w", encoding="utf-8") as f:
+        json.dump(daten, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    return daten["version"]
+
+
+def lade_csv(pfad, ereignis):
+    """Liest Tool-2-Antworten (Spalten wie bei lawinen.stapel) und eine 0/1-Spalte für beobachtete Lawinen."""
+    from .stapel import BLOCK, bloecke, kodiere_block
+
+    codes, ereignisse = [], []
+    with open(pfad, encoding="utf-8", newline="") as f:
+        zeilen = (zeile for zeile in csv.DictReader(f) if zeile.get(ereignis) not in (None, ""))
+        erste_zeile = 1
+        for block in bloecke(zeilen, BLOCK):
+            codes.append(kodiere_block(block, erste_zeile)[1])
+            ereignisse.extend(zeile[ereignis].strip().lower() in ("1", "true", "ja", "x") for zeile in block)
+            erste_zeile += len(block)
+    if not codes:
+        return np.zeros((0, len(KATALOG.tool2)), dtype=np.uint8), np.zeros(0, dtype=bool)
+    return np.concatenate(codes), np.array(ereignisse)
+
+
+def lade_archiv(verzeichnis, ereignisse_pfad):
+    """Tool-2-Codes aus einem Archiv (lawinen.archiv) und Ereignisse aus einer .npy-Datei in Zeilenreihenfolge."""
+    from .archiv import Archiv
+
+    archiv = Archiv(verzeichnis)
+    ereignisse = np.load(ereignisse_pfad, mmap_mode="r")[:len(archiv)]
+    return archiv.spalte("tool2")[:len(ereignisse)], ereignisse
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lawinen.gewichte", description="Tool-2-Gewichte an Lawinenereignissen anpassen")
+    parser.add_argument("quelle", help="CSV-Datei mit Tool-2-Antworten oder Archivverzeichnis")
+    parser.add_argument("--ereignis", default="lawine", help="CSV-Spalte mit 1 = Lawine beobachtet, 0 = keine")
+    parser.add_argument("--ereignisse", help="bei einem Archiv: .npy-Datei mit einem 0/1-Wert pro Zeile")
+    parser.add_argument("--punkte", action="store_true", help="auch die Punkte der Optionen anpassen")
+    parser.add_argument("--folds", type=int, default=FOLDS)
+    parser.add_argument("--prozesse", type=int, default=None, help="Standard: alle Kerne")
+    parser.add_argument("--regularisierung", type=float, default=REGULARISIERUNG)
+    parser.add_argument("--schritte", type=int, default=SCHRITTE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--export", help="neuen Katalog (JSON) schreiben")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        if args.ereignisse:
+            codes, ereignisse = lade_archiv(args.quelle, args.ereignisse)
+        else:
+            codes, ereignisse = lade_csv(args.quelle, args.ereignis)
+    except ValueError as e:
+        parser.exit(1, f"Fehler: {e}\n")
+    muster, anzahl, lawinen = muster_zaehlen(codes, ereignisse, args.folds, args.seed)
+    print(f"{int(anzahl.sum())} gültige Bewertungen ({int(lawinen.sum())} mit Lawine) in {muster.shape[0]} Antwortmustern")
+    if not lawinen.sum() or lawinen.sum() == anzahl.sum():
+        parser.exit(1, "Fehler: es braucht Bewertungen mit und ohne Lawine\n")
+
+    if args.folds > 1:
+        folds = kreuzvalidierung(muster, anzahl, lawinen, args.punkte, args.regularisierung, args.schritte, args.prozesse)
+        print(f"\n{args.folds}-fache Kreuzvalidierung:")
+        print(f"{'Fold':>4} {'Log-Loss Katalog':>17} {'angepasst':>10} {'AUC Katalog':>12} {'angepasst':>10}")
+        for k, fold in enumerate(folds, start=1):
+            print(f"{k:4d} {fold.verlust_katalog:17.4f} {fold.verlust_angepasst:10.4f} {fold.auc_katalog:12.3f} {fold.auc_angepasst:10.3f}")
+        mittel = Fold(*np.mean(folds, axis=0))
+        print(f"{'Mittel':>4} {mittel.verlust_katalog:15.4f} {mittel.verlust_angepasst:10.4f} {mittel.auc_katalog:12.3f} {mittel.auc_angepasst:10.3f}")
+
+    anpassung = anpassen(muster, anzahl.sum(axis=0), lawinen.sum(axis=0), punkte=args.punkte,
+                         regularisierung=args.regularisierung, schritte=args.schritte)
+    print("\nGewichte (Katalog -> angepasst):")
+    for frage, alt, neu in zip(KATALOG.tool2, GEWICHTE, anpassung.gewichte):
+        print(f"  {alt:5.2f} -> {neu:5.2f}  {frage.frage}")
+    if args.punkte:
+        print("\nPunkte (Katalog -> angepasst):")
+        for frage, zeile in zip(KATALOG.tool2, anpassung.punkte_tabelle):
+            alt = " ".join(f"{o.punkte:g}" for o in frage.optionen)
+            neu = " ".join(f"{wert:.2f}" for wert in zeile[1:len(frage.optionen) + 1])
+            print(f"  {alt} -> {neu}  {frage.frage}")
+    print(f"\n50 % Lawinenwahrscheinlichkeit bei mw_gew = {anpassung.mitte:.2f}")
+    if args.export:
+        katalog = anpassen(muster, anzahl.sum(axis=0), lawinen.sum(axis=0), mit_gewichten=False, schritte=args.schritte)
+        try:
+            schwellen = schwellen_anpassen(katalog, anpassung)
+            version = exportieren(anpassung, args.export, katalog, punkte=args.punkte)
+        except ValueError as e:
+            parser.exit(1, f"Fehler: {e}\n")
+        print("Schwellen (Katalog -> angepasst): " + ", ".join(
+            f"{name} {KATALOG.schwellen_tool2[name]:.2f} -> {wert:.2f}" for name, wert in schwellen.items()))
+        print(f"Katalog Version {version} geschrieben: {args.export} (laden mit LAWINEN_KATALOG={args.export})")
+    print(f"Dauer {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
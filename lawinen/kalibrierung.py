@@ -0,0 +1,267 @@
+"""
+Kalibrierung der Schwellenwerte an beobachteten Lawinenereignissen.
+
+Eingabe sind die Bewertungswerte (Gefahrenindex von Tool 1 oder gewichteter Mittelwert
+von Tool 2) und pro Bewertung, ob am Hang eine Lawine beobachtet wurde. Die Werte werden
+einmal sortiert; mit der kumulierten Summe der Ereignisse ergeben sich die Konfusionsmatrizen
+aller Schwellen auf einmal (Suche im sortierten Array), ohne pro Schwelle neu zu bewerten.
+
+Eine Bewertung gilt bei Tool 1 als "über der Schwelle", wenn wert >= schwelle
+(wie kategorie_tool1), bei Tool 2, wenn wert > schwelle (wie kategorie_tool2): strikt=True.
+
+Aufruf:
+    python -m lawinen.kalibrierung bewertet.csv --ereignis lawine
+    python -m lawinen.kalibrierung bewertet.csv --ereignis lawine --tool 2 --kurven roc_tool2.csv
+    python -m lawinen.kalibrierung archiv/ --ereignisse lawinen.npy
+"""
+import argparse
+import csv
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from .tool1 import SCHWELLE_HOCH, SCHWELLE_MODERAT
+from .tool2 import FARB_SCHWELLENWERTE
+
+# Aktuelle Schwellen (untere, obere) und Vergleichsart pro Tool
+SCHWELLEN = {
+    1: (SCHWELLE_MODERAT, SCHWELLE_HOCH),
+    2: (FARB_SCHWELLENWERTE["gering"]["wert"], FARB_SCHWELLENWERTE["maessig"]["wert"]),
+}
+STRIKT = {1: False, 2: True}
+ZIEL_RECALL = 0.95
+
+
+class Konfusion(NamedTuple):
+    """Konfusionsmatrizen für eine Reihe von Schwellen (je ein Array-Eintrag pro Schwelle)."""
+    schwellen: np.ndarray
+    tp: np.ndarray   # über der Schwelle, Lawine beobachtet
+    fp: np.ndarray   # über der Schwelle, keine Lawine
+    fn: np.ndarray   # unter der Schwelle, Lawine beobachtet
+    tn: np.ndarray   # unter der Schwelle, keine Lawine
+
+    @property
+    def recall(self):
+        """Trefferquote (TPR): Anteil der Lawinen über der Schwelle."""
+        return _teilen(self.tp, self.tp + self.fn)
+
+    @property
+    def fpr(self):
+        """Fehlalarmrate: Anteil der lawinenfreien Bewertungen über der Schwelle."""
+        return _teilen(self.fp, self.fp + self.tn)
+
+    @property
+    def precision(self):
+        """Anteil der Bewertungen über der Schwelle, bei denen eine Lawine beobachtet wurde (1 ohne solche)."""
+        return _teilen(self.tp, self.tp + self.fp, leer=1.0)
+
+    @property
+    def f1(self):
+        return _teilen(2 * self.tp, 2 * self.tp + self.fp + self.fn)
+
+    @property
+    def youden(self):
+        return self.recall - self.fpr
+
+
+class Schwelle(NamedTuple):
+    wert: float
+    recall: float
+    fpr: float
+    precision: float
+    f1: float
+
+
+def _teilen(zaehler, nenner, leer=0.0):
+    zaehler = np.asarray(zaehler, dtype=np.float64)
+    return np.divide(zaehler, nenner, out=np.full(zaehler.shape, leer), where=np.asarray(nenner) > 0)
+
+
+def _vorbereiten(werte, ereignisse):
+    werte = np.asarray(werte, dtype=np.float64)
+    ereignisse = np.asarray(ereignisse).astype(bool)
+    if werte.shape != ereignisse.shape or werte.ndim != 1:
+        raise ValueError(f"werte und ereignisse brauchen dieselbe Länge, nicht {werte.shape} und {ereignisse.shape}")
+    gueltig = ~np.isnan(werte)
+    werte, ereignisse = werte[gueltig], ereignisse[gueltig]
+    reihenfolge = np.argsort(werte, kind="stable")
+    return werte[reihenfolge], np.cumsum(ereignisse[reihenfolge], dtype=np.int64)
+
+
+def konfusion(werte, ereignisse, schwellen, strikt=False):
+    """
+    Konfusionsmatrizen für beliebige Schwellen in O((n + m) log n).
+    NaN-Werte (ungültige Bewertungen) werden übergangen.
+    """
+    sortiert, kumuliert = _vorbereiten(werte, ereignisse)
+    schwellen = np.atleast_1d(np.asarray(schwellen, dtype=np.float64))
+    n = len(sortiert)
+    positiv = int(kumuliert[-1]) if n else 0
+
+    # Anzahl der Werte unter der Schwelle (bzw. höchstens gleich, wenn strikt) und die Lawinen darunter
+    unten = np.searchsorted(sortiert, schwellen, side="right" if strikt else "left")
+    fn = np.where(unten > 0, kumuliert[np.maximum(unten - 1, 0)] if n else 0, 0)
+    tp = positiv - fn
+    tn = unten - fn
+    fp = (n - unten) - tp
+    return Konfusion(schwellen, tp, fp, fn, tn)
+
+
+def kurven(werte, ereignisse, strikt=False):
+    """
+    ROC- und PR-Kurve über alle unterschiedlichen Werte als Schwellen (absteigend),
+    ergänzt um eine Schwelle über dem Maximum (nichts über der Schwelle).
+    """
+    sortiert, _ = _vorbereiten(werte, ereignisse)
+    kandidaten = np.unique(sortiert)[::-1]
+    if strikt:
+        # Bei "wert > schwelle" liegt der Wert selbst noch darunter: die Schwelle knapp darunter setzen
+        kandidaten = np.nextafter(kandidaten, -np.inf)
+    oben = np.nextafter(sortiert[-1], np.inf) if len(sortiert) else 0.0
+    return konfusion(werte, ereignisse, np.concatenate([[oben], kandidaten]), strikt)
+
+
+def roc_auc(k):
+    """Fläche unter der ROC-Kurve (Trapezregel)."""
+    fpr, recall = k.fpr, k.recall
+    return float(np.sum(np.diff(fpr) * (recall[1:] + recall[:-1]) / 2))
+
+
+def pr_auc(k):
+    """Average Precision: Summe der Precision über die Zuwächse der Trefferquote."""
+    return float(np.sum(np.diff(k.recall, prepend=0.0) * k.precision))
+
+
+def _schwelle(k, i):
+    return Schwelle(float(k.schwellen[i]), float(k.recall[i]), float(k.fpr[i]), float(k.precision[i]), float(k.f1[i]))
+
+
+def optimale_schwelle(k, kriterium="youden"):
+    """Schwelle mit dem größten Youden-Index (recall - fpr) oder F1-Wert."""
+    werte = {"youden": k.youden, "f1": k.f1}[kriterium]
+    return _schwelle(k, int(np.argmax(werte)))
+
+
+def schwelle_fuer_recall(k, ziel=ZIEL_RECALL):
+    """Höchste Schwelle, bei der mindestens ziel aller Lawinen über der Schwelle liegen."""
+    erreicht = np.flatnonzero(k.recall >= ziel)
+    if not erreicht.size:
+        return None
+    return _schwelle(k, int(erreicht[0]))  # Schwellen absteigend: der erste Treffer ist die höchste
+
+
+def kategorie_tabelle(werte, ereignisse, schwellen, strikt=False):
+    """
+    Bewertungen und Lawinen pro Kategorie für zwei Schwellen (untere, obere).
+    Gibt eine Matrix (gering, mittel, hoch) x (keine Lawine, Lawine) zurück.
+    """
+    k = konfusion(werte, ereignisse, sorted(schwellen), strikt)
+    ueber = np.stack([k.fp, k.tp], axis=1)  # über unterer / oberer Schwelle
+    gesamt = ueber[0] + np.array([k.tn[0], k.fn[0]])
+    return np.array([gesamt - ueber[0], ueber[0] - ueber[1], ueber[1]])
+
+
+def kalibrieren(werte, ereignisse, tool=1, ziel_recall=ZIEL_RECALL):
+    """
+    Vollständiger Bericht als dict: AUC, Tabelle bei den aktuellen Schwellen und Vorschläge
+    (obere Schwelle nach Youden und F1, untere Schwelle nach Trefferquote ziel_recall).
+    """
+    strikt = STRIKT[tool]
+    k = kurven(werte, ereignisse, strikt)
+    return {
+        "kurven": k,
+        "roc_auc": roc_auc(k),
+        "pr_auc": pr_auc(k),
+        "aktuell": SCHWELLEN[tool],
+        "tabelle_aktuell": kategorie_tabelle(werte, ereignisse, SCHWELLEN[tool], strikt),
+        "obere_youden": optimale_schwelle(k, "youden"),
+        "obere_f1": optimale_schwelle(k, "f1"),
+        "untere_recall": schwelle_fuer_recall(k, ziel_recall),
+    }
+
+
+def lade_csv(pfad, tool, ereignis):
+    """
+    Liest eine bewertete Exportdatei (lawinen.stapel) mit einer 0/1-Spalte für beobachtete Lawinen.
+    Ungültige Bewertungen (Tool 1 ohne Kategorie, Tool 2 mit Fehlercode) werden wie in lade_archiv zu NaN.
+    """
+    werte, ereignisse = [], []
+    with open(pfad, encoding="utf-8", newline="") as f:
+        for zeile in csv.DictReader(f):
+            if zeile.get(ereignis) in (None, ""):
+                continue  # nicht beobachtet
+            if tool == 1:
+                gueltig, wert = bool(zeile.get("kategorie_tool1")), zeile.get("gefahrenindex")
+            else:
+                gueltig, wert = zeile.get("fehler_tool2", "0") in ("", "0"), zeile.get("mw_gew")
+            werte.append(float(wert) if gueltig and wert else np.nan)
+            ereignisse.append(zeile[ereignis].strip().lower() in ("1", "true", "ja", "x"))
+    return np.array(werte), np.array(ereignisse)
+
+
+def lade_archiv(verzeichnis, ereignisse_pfad, tool):
+    """Werte aus einem Archiv (lawinen.archiv) und Ereignisse aus einer .npy-Datei in Zeilenreihenfolge."""
+    from .archiv import Archiv
+    from .tool1 import KAT_UNGUELTIG
+
+    archiv = Archiv(verzeichnis)
+    ereignisse = np.load(ereignisse_pfad, mmap_mode="r")[:len(archiv)]
+    if tool == 1:
+        werte = np.where(archiv.spalte("kategorie_tool1") != KAT_UNGUELTIG, archiv.spalte("gefahrenindex"), np.nan)
+    else:
+        werte = np.asarray(archiv.spalte("mw_gew"), dtype=np.float64)
+    return werte[:len(ereignisse)], ereignisse
+
+
+def _zeile(name, schwelle):
+    if schwelle is None:
+        return f"{name:34} -"
+    return (f"{name:34} {schwelle.wert:6.3f}  Trefferquote {schwelle.recall:6.1%}  Fehlalarme {schwelle.fpr:6.1%}"
+            f"  Precision {schwelle.precision:6.1%}  F1 {schwelle.f1:.3f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lawinen.kalibrierung", description="Schwellenwerte an Lawinenereignissen kalibrieren")
+    parser.add_argument("quelle", help="bewertete CSV-Datei (lawinen.stapel) oder Archivverzeichnis")
+    parser.add_argument("--tool", type=int, choices=[1, 2], default=1)
+    parser.add_argument("--ereignis", default="lawine", help="CSV-Spalte mit 1 = Lawine beobachtet, 0 = keine")
+    parser.add_argument("--ereignisse", help="bei einem Archiv: .npy-Datei mit einem 0/1-Wert pro Zeile")
+    parser.add_argument("--ziel-recall", type=float, default=ZIEL_RECALL)
+    parser.add_argument("--kurven", help="ROC/PR-Punkte als CSV schreiben")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.ereignisse:
+        werte, ereignisse = lade_archiv(args.quelle, args.ereignisse, args.tool)
+    else:
+        werte, ereignisse = lade_csv(args.quelle, args.tool, args.ereignis)
+    geladen = time.perf_counter()
+    bericht = kalibrieren(werte, ereignisse, args.tool, args.ziel_recall)
+    fertig = time.perf_counter()
+
+    gueltig = ~np.isnan(werte)
+    print(f"Tool {args.tool}: {gueltig.sum()} gültige Bewertungen, davon {int(np.asarray(ereignisse)[gueltig].sum())} mit Lawine")
+    print(f"ROC-AUC {bericht['roc_auc']:.3f}   PR-AUC {bericht['pr_auc']:.3f}")
+    print(f"\nAktuelle Schwellen {bericht['aktuell'][0]} / {bericht['aktuell'][1]}:")
+    print(f"{'':8} {'keine Lawine':>13} {'Lawine':>8} {'Lawinenrate':>12}")
+    for name, (keine, lawine) in zip(("gering", "mittel", "hoch"), bericht["tabelle_aktuell"]):
+        rate = lawine / (keine + lawine) if keine + lawine else 0
+        print(f"{name:8} {keine:13d} {lawine:8d} {rate:12.1%}")
+    print("\nVorschläge:")
+    print(_zeile("obere Schwelle (Youden)", bericht["obere_youden"]))
+    print(_zeile("obere Schwelle (F1)", bericht["obere_f1"]))
+    print(_zeile(f"untere Schwelle (Trefferquote {args.ziel_recall:.0%})", bericht["untere_recall"]))
+    print(f"\nGeladen in {geladen - start:.2f} s, kalibriert in {fertig - geladen:.3f} s")
+
+    if args.kurven:
+        k = bericht["kurven"]
+        with open(args.kurven, "w", encoding="utf-8", newline="") as f:
+            schreiber = csv.writer(f)
+            schreiber.writerow(["schwelle", "tp", "fp", "fn", "tn", "recall", "fpr", "precision"])
+            schreiber.writerows(zip(k.schwellen.tolist(), k.tp.tolist(), k.fp.tolist(), k.fn.tolist(), k.tn.tolist(),
+                                    k.recall.tolist(), k.fpr.tolist(), k.precision.tolist()))
+
+
+if __name__ == "__main__":
+    main()
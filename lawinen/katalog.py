@@ -0,0 +1,84 @@
+"""
+Fragenkatalog von Tool 1 und Tool 2 (lawinen/katalog.json).
+
+Der Katalog wird einmal pro Prozess geladen und in unveränderliche Strukturen übersetzt.
+Jede Frage bringt fertige Zuordnungen Option -> Punkte, Code und Gefahren-Typ mit, damit die
+Seiten pro Widget nur noch ein Dict-Nachschlagen brauchen.
+
+Über die Umgebungsvariable LAWINEN_KATALOG lässt sich ein anderer Katalog laden, z. B. ein
+mit lawinen.gewichte neu angepasster.
+"""
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+KATALOG_PFAD = Path(os.environ.get("LAWINEN_KATALOG") or Path(__file__).resolve().parent / "katalog.json")
+
+
+class Option(NamedTuple):
+    text: str
+    punkte: float
+    code: int          # Position 1..n; 0 steht für "nicht beantwortet"
+    typ: int           # Tool 1: Gefahren-Typ aus dem Präfix "1:", "2:" oder "3:"; Tool 2: 0
+
+
+class Frage(NamedTuple):
+    frage: str
+    gewicht: float
+    optionen: tuple            # Option, ...
+    texte: tuple               # "" und die Optionstexte, direkt für st.radio
+    punkte: Mapping            # Optionstext -> Punkte (ohne "")
+    codes: Mapping             # Optionstext -> Code ("" -> 0)
+    typen: Mapping             # Optionstext -> Gefahren-Typ (ohne "")
+
+
+# Grenzen von Tool 2 (mw_gew <= gering, <= maessig), falls ein älterer Katalog keine mitbringt
+SCHWELLEN_TOOL2 = {"gering": 3.26, "maessig": 4.21}
+
+
+class Katalog(NamedTuple):
+    version: int               # bei jeder Änderung an Texten, Punkten, Gewichten oder Schwellen erhöhen
+    tool1: tuple               # Frage, ...
+    tool2: tuple
+    schwellen_tool2: Mapping   # "gering"/"maessig" -> Obergrenze von mw_gew
+
+
+def _frage(eintrag, mit_typ):
+    optionen = []
+    for code, option in enumerate(eintrag["optionen"], start=1):
+        typ = 0
+        if mit_typ:
+            # Die Stapelbewertung setzt voraus, dass der Code dem Gefahren-Typ entspricht
+            typ = int(option["text"].split(":", 1)[0])
+            if typ != code:
+                raise ValueError(f"Option {option['text']!r} von {eintrag['frage']!r} steht nicht an Position {typ}")
+        optionen.append(Option(option["text"], float(option["punkte"]), code, typ))
+
+    return Frage(
+        frage=eintrag["frage"],
+        gewicht=float(eintrag.get("gewicht", 1)),
+        optionen=tuple(optionen),
+        texte=("",) + tuple(o.text for o in optionen),
+        punkte=MappingProxyType({o.text: o.punkte for o in optionen}),
+        codes=MappingProxyType({"": 0, **{o.text: o.code for o in optionen}}),
+        typen=MappingProxyType({o.text: o.typ for o in optionen}),
+    )
+
+
+@lru_cache(maxsize=None)
+def lade_katalog(pfad=KATALOG_PFAD):
+    """Liest und prüft den Katalog; pro Pfad nur einmal pro Prozess."""
+    with open(pfad, encoding="utf-8") as f:
+        daten = json.load(f)
+    return Katalog(
+        version=daten["version"],
+        tool1=tuple(_frage(eintrag, mit_typ=True) for eintrag in daten["tool1"]),
+        tool2=tuple(_frage(eintrag, mit_typ=False) for eintrag in daten["tool2"]),
+        schwellen_tool2=MappingProxyType({**SCHWELLEN_TOOL2, **daten.get("schwellen_tool2", {})}),
+    )
+
+
+KATALOG = lade_katalog()
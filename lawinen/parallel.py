@@ -0,0 +1,275 @@
+"""
+Parallele Neubewertung großer Bestände mit einem Prozess-Pool.
+
+Die Codematrizen werden nicht zeilenweise gepickelt: sie liegen entweder in
+multiprocessing.shared_memory oder (beim Archiv, siehe lawinen.archiv) als Dateien,
+die jeder Prozess selbst per np.memmap einblendet. Die Arbeiter bekommen nur
+Zeilenbereiche (start, ende) und schreiben ihre Ergebnisse an dieselbe Stelle in
+gemeinsame Ergebnis-Arrays; die Reihenfolge bleibt damit ohne Zusammenführen erhalten.
+
+Geänderte Punktetabellen (punkte_tabelle_tool1 / punkte_tabelle_tool2 aus lawinen.batch)
+und Gewichte werden einmal pro Prozess übergeben.
+
+Aufruf:
+    python -m lawinen.parallel archiv/ --prozesse 32
+    python -m lawinen.parallel --dateien export1.csv export2.csv --ziel bewertet/
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, util
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from .batch import (
+    SPALTEN_TOOL1,
+    bewerte_tool1_batch,
+    bewerte_tool2_batch,
+    gesamtrisiko_batch,
+    punkte_tabelle_tool1,
+    punkte_tabelle_tool2,
+)
+from .gesamt import GESAMT_STUFEN
+from .tool2 import FRAGEN, GEWICHTE
+
+BLOCK = 1 << 18
+
+
+class Neubewertung(NamedTuple):
+    """Ergebnis von bewerte_parallel, ein Array-Eintrag pro Zeile in der Reihenfolge der Eingabe."""
+    gefahrenindex: np.ndarray   # float64
+    kategorie_tool1: np.ndarray  # uint8, KAT_*
+    fehler_tool2: np.ndarray    # uint8, FEHLER_*
+    mw_ung: np.ndarray          # float64, NaN bei Fehler
+    mw_gew: np.ndarray          # float64, NaN bei Fehler
+    kategorie_tool2: np.ndarray  # uint8, Kategorie des gewichteten Mittelwerts
+    gesamtrisiko: np.ndarray    # uint8, Index in GESAMT_STUFEN
+
+
+# Ergebnisspalten: Name -> dtype
+_ERGEBNIS_TYPEN = {
+    "gefahrenindex": np.float64,
+    "kategorie_tool1": np.uint8,
+    "fehler_tool2": np.uint8,
+    "mw_ung": np.float64,
+    "mw_gew": np.float64,
+    "kategorie_tool2": np.uint8,
+    "gesamtrisiko": np.uint8,
+}
+
+# Zustand eines Arbeitsprozesses, gesetzt von _arbeiter_start
+_ARBEIT = {}
+
+
+class _Quelle(NamedTuple):
+    """Wo ein Arbeiter eine Matrix findet: Shared-Memory-Name oder Dateipfad, dazu Form und dtype."""
+    art: str          # "shm" oder "datei"
+    ort: str
+    form: tuple
+    dtype: str
+
+
+def _einblenden(quelle):
+    if quelle.art == "datei":
+        if not quelle.form[0]:
+            return None, np.empty(quelle.form, dtype=quelle.dtype)
+        return None, np.memmap(quelle.ort, dtype=quelle.dtype, mode="r", shape=quelle.form)
+    speicher = shared_memory.SharedMemory(name=quelle.ort)
+    return speicher, np.ndarray(quelle.form, dtype=quelle.dtype, buffer=speicher.buf)
+
+
+def _arbeiter_start(eingaben, ausgaben, tabelle1, tabelle2, gewichte):
+    _ARBEIT.clear()
+    _ARBEIT["speicher"] = []
+    for name, quelle in {**eingaben, **ausgaben}.items():
+        speicher, array = _einblenden(quelle)
+        if speicher is not None:
+            _ARBEIT["speicher"].append(speicher)  # Referenz halten, sonst wird der Puffer freigegeben
+        _ARBEIT[name] = array
+    _ARBEIT["tabellen"] = (tabelle1, tabelle2, gewichte)
+
+
+def _arbeiter_ende():
+    speicher = _ARBEIT.get("speicher", [])
+    _ARBEIT.clear()
+    for eintrag in speicher:
+        eintrag.close()
+
+
+def _pool_arbeiter_start(*initargs):
+    _arbeiter_start(*initargs)
+    # Pool-Prozesse enden mit os._exit, atexit greift dort nicht; Finalize mit exitpriority läuft
+    # beim Beenden des Arbeitsprozesses und schließt die Shared-Memory-Handles
+    util.Finalize(None, _arbeiter_ende, exitpriority=10)
+
+
+def _bewerte_bereich(bereich):
+    start, ende = bereich
+    tabelle1, tabelle2, gewichte = _ARBEIT["tabellen"]
+    ergebnis1 = bewerte_tool1_batch(_ARBEIT["tool1"][start:ende], tabelle1)
+    ergebnis2 = bewerte_tool2_batch(_ARBEIT["tool2"][start:ende], gewichte, tabelle2)
+    werte = {
+        "gefahrenindex": ergebnis1.gefahrenindex,
+        "kategorie_tool1": ergebnis1.kategorie,
+        "fehler_tool2": ergebnis2.fehler,
+        "mw_ung": ergebnis2.mw_ung,
+        "mw_gew": ergebnis2.mw_gew,
+        "kategorie_tool2": ergebnis2.kategorie_gew,
+        "gesamtrisiko": gesamtrisiko_batch(ergebnis1.kategorie, ergebnis2.kategorie_gew),
+    }
+    for name, spalte in werte.items():
+        _ARBEIT[name][start:ende] = spalte
+    return ende - start
+
+
+def bereiche(anzahl, block=BLOCK):
+    """Zeilenbereiche (start, ende) mit höchstens block Zeilen."""
+    return [(start, min(start + block, anzahl)) for start in range(0, anzahl, block)]
+
+
+def _in_shared_memory(array, verwaltung):
+    speicher = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    verwaltung.append(speicher)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=speicher.buf)[...] = array
+    return _Quelle("shm", speicher.name, array.shape, array.dtype.str)
+
+
+def _bewerte(eingaben, anzahl, prozesse, block, tabelle1, tabelle2, gewichte):
+    if tabelle1 is None:
+        tabelle1 = punkte_tabelle_tool1()
+    if tabelle2 is None:
+        tabelle2 = punkte_tabelle_tool2()
+    prozesse = prozesse or os.cpu_count()
+
+    verwaltung = []
+    try:
+        ausgaben = {}
+        for name, dtype in _ERGEBNIS_TYPEN.items():
+            speicher = shared_memory.SharedMemory(create=True, size=max(anzahl * np.dtype(dtype).itemsize, 1))
+            verwaltung.append(speicher)
+            ausgaben[name] = _Quelle("shm", speicher.name, (anzahl,), np.dtype(dtype).str)
+
+        initargs = (eingaben, ausgaben, tabelle1, tabelle2, np.asarray(gewichte, dtype=np.float64))
+        if prozesse == 1:
+            _arbeiter_start(*initargs)
+            try:
+                for bereich in bereiche(anzahl, block):
+                    _bewerte_bereich(bereich)
+            finally:
+                _arbeiter_ende()
+        else:
+            with ProcessPoolExecutor(prozesse, initializer=_pool_arbeiter_start, initargs=initargs) as pool:
+                # Kleinere Blöcke, wenn es sonst weniger Blöcke als Prozesse gäbe
+                block = max(1, min(block, -(-anzahl // (prozesse * 4))))
+                list(pool.map(_bewerte_bereich, bereiche(anzahl, block)))
+
+        return Neubewertung(*(
+            np.ndarray((anzahl,), dtype=dtype, buffer=speicher.buf).copy()
+            for (_, dtype), speicher in zip(_ERGEBNIS_TYPEN.items(), verwaltung)
+        ))
+    finally:
+        for speicher in verwaltung:
+            speicher.close()
+            speicher.unlink()
+
+
+def bewerte_parallel(tool1_codes, tool2_codes, prozesse=None, block=BLOCK,
+                     punkte_tabelle_tool1=None, punkte_tabelle_tool2=None, gewichte=GEWICHTE):
+    """
+    Bewertet Codematrizen von Tool 1 (n x 10) und Tool 2 (n x 7) mit prozesse Prozessen
+    (Standard: alle Kerne). Die Matrizen werden einmal in Shared Memory kopiert.
+    """
+    tool1_codes = np.ascontiguousarray(tool1_codes, dtype=np.uint8)
+    tool2_codes = np.ascontiguousarray(tool2_codes, dtype=np.uint8)
+    if tool1_codes.ndim != 2 or tool1_codes.shape[1] != len(SPALTEN_TOOL1):
+        raise ValueError(f"Codematrix Tool 1 muss die Form (n, {len(SPALTEN_TOOL1)}) haben, nicht {tool1_codes.shape}")
+    if tool2_codes.shape != (tool1_codes.shape[0], len(FRAGEN)):
+        raise ValueError(f"Codematrix Tool 2 muss die Form ({tool1_codes.shape[0]}, {len(FRAGEN)}) haben, nicht {tool2_codes.shape}")
+
+    verwaltung = []
+    try:
+        eingaben = {
+            "tool1": _in_shared_memory(tool1_codes, verwaltung),
+            "tool2": _in_shared_memory(tool2_codes, verwaltung),
+        }
+        return _bewerte(eingaben, tool1_codes.shape[0], prozesse, block, punkte_tabelle_tool1, punkte_tabelle_tool2, gewichte)
+    finally:
+        for speicher in verwaltung:
+            speicher.close()
+            speicher.unlink()
+
+
+def archiv_parallel(verzeichnis, prozesse=None, block=BLOCK,
+                    punkte_tabelle_tool1=None, punkte_tabelle_tool2=None, gewichte=GEWICHTE):
+    """
+    Bewertet alle Zeilen eines Archivs (lawinen.archiv) neu, z. B. mit geänderten Punkten oder Gewichten.
+    Die Arbeiter blenden die Antwortspalten selbst ein; kopiert wird nichts.
+    """
+    from .archiv import Archiv
+
+    archiv = Archiv(verzeichnis)
+    eingaben = {
+        name: _Quelle("datei", str(archiv.verzeichnis / f"{name}.bin"), archiv.spalte(name).shape, archiv.spalte(name).dtype.str)
+        for name in ("tool1", "tool2")
+    }
+    return _bewerte(eingaben, len(archiv), prozesse, block, punkte_tabelle_tool1, punkte_tabelle_tool2, gewichte)
+
+
+def _datei_bewerten(auftrag):
+    from .stapel import bewerte_datei
+
+    eingabe, ausgabe = auftrag
+    return bewerte_datei(eingabe, ausgabe)
+
+
+def dateien_parallel(dateien, ziel, prozesse=None):
+    """
+    Bewertet mehrere Exportdateien (lawinen.stapel) gleichzeitig, eine Datei pro Prozess.
+    Die Ausgaben heißen wie die Eingaben; gleichnamige Eingaben aus verschiedenen
+    Verzeichnissen werden abgelehnt, statt sich gegenseitig zu überschreiben.
+    """
+    herkunft = {}
+    for datei in dateien:
+        herkunft.setdefault(Path(datei).name, []).append(str(datei))
+    doppelt = [", ".join(pfade) for pfade in herkunft.values() if len(pfade) > 1]
+    if doppelt:
+        raise ValueError(f"Eingaben mit gleichem Dateinamen würden dieselbe Ausgabe schreiben: {'; '.join(doppelt)}")
+    Path(ziel).mkdir(parents=True, exist_ok=True)
+    auftraege = [(str(datei), str(Path(ziel) / Path(datei).name)) for datei in dateien]
+    with ProcessPoolExecutor(prozesse or os.cpu_count()) as pool:
+        return dict(zip((ausgabe for _, ausgabe in auftraege), pool.map(_datei_bewerten, auftraege)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lawinen.parallel", description="Parallele Neubewertung")
+    parser.add_argument("archiv", nargs="?", help="Archivverzeichnis (lawinen.archiv)")
+    parser.add_argument("--dateien", nargs="+", help="CSV/JSONL-Exporte statt eines Archivs")
+    parser.add_argument("--ziel", help="Zielverzeichnis für die bewerteten Exporte")
+    parser.add_argument("--prozesse", type=int, default=os.cpu_count())
+    parser.add_argument("--block", type=int, default=BLOCK)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.dateien:
+        if not args.ziel:
+            parser.error("--dateien braucht --ziel")
+        try:
+            anzahl = sum(dateien_parallel(args.dateien, args.ziel, args.prozesse).values())
+        except ValueError as e:
+            parser.exit(1, f"Fehler: {e}\n")
+    elif args.archiv:
+        ergebnis = archiv_parallel(args.archiv, args.prozesse, args.block)
+        anzahl = len(ergebnis.gesamtrisiko)
+        for stufe, haeufigkeit in zip(GESAMT_STUFEN, np.bincount(ergebnis.gesamtrisiko, minlength=len(GESAMT_STUFEN))):
+            print(f"{stufe:12} {haeufigkeit:12d}")
+    else:
+        parser.error("Archiv oder --dateien angeben")
+    dauer = time.perf_counter() - start
+    print(f"{anzahl} Bewertungen mit {args.prozesse} Prozessen in {dauer:.2f} s ({anzahl / dauer if dauer else 0:,.0f} Zeilen/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Gefahrenkarte für ein ganzes Gebiet: Tool 1, Tool 2 und Gesamtrisiko (wie in streamlit_kombi2.py) pro Rasterzelle.
+
+Die Antworten kommen aus zwei Quellen:
+- Wetter- und Schneedeckenantworten pro Region aus einer CSV (Spalte region, sonst wie bei
+  lawinen.stapel: tool1_k / tool2_k / Fragetext / setzung bzw. ns, temp, stunden),
+- Geländeantworten pro Zelle aus uint8-Code-Rastern (lawinen.gelaende, z. B. die Hang-Codes);
+  sie ersetzen die Antwort der Region in ihrer Spalte.
+Ein Regionen-Raster (ganzzahlige Region-IDs, 0 = außerhalb) ordnet die Zellen zu; ohne Raster
+gilt Region 1 überall. Zellen außerhalb, mit unbekannter Region oder mit Code 0 in einem
+Gelände-Raster erhalten Stufe 0 ("keine").
+
+Gerechnet wird kachelweise in einem Prozess-Pool. Jeder Arbeiter blendet die Raster selbst
+ein und schreibt seine Kachel direkt in das Ergebnis-Raster (Index in GESAMT_STUFEN). Pro
+Kachel werden nur die verschiedenen Antwort-Kombinationen bewertet (np.unique) und dann
+zurück auf die Zellen verteilt.
+
+Mit --cache wird jede Kachel unter einem SHA-256 über ihre Eingaben (Raster-Ausschnitte,
+Antworten der vorkommenden Regionen, Punkte, Gewichte, Schwellenwerte) abgelegt. Am nächsten
+Tag werden nur Kacheln neu bewertet, deren Regionen neue Antworten haben oder deren Raster
+sich geändert haben. Das Cache-Verzeichnis darf jederzeit gelöscht werden.
+
+Aufruf:
+    python -m lawinen.region wetter.csv gesamt.npy --regionen regionen.npy \\
+        --raster "Hangneigung / Exposition=tal_hang.npy" --cache cache/ --prozesse 8
+"""
+import argparse
+import csv
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from .batch import (
+    bewerte_tool1_batch,
+    bewerte_tool2_batch,
+    gesamtrisiko_batch,
+    gesamtrisiko_tabelle,
+    punkte_tabelle_tool1,
+    punkte_tabelle_tool2,
+)
+from .gelaende import KACHEL, _raster_anlegen, kacheln, oeffnen
+from .gesamt import GESAMT_STUFEN
+from .katalog import KATALOG
+from .stapel import SPALTEN_EINGABE_TOOL1, SPALTEN_EINGABE_TOOL2, kodiere_block
+from .tool1 import SCHWELLE_HOCH, SCHWELLE_MODERAT
+from .tool2 import FARB_SCHWELLENWERTE, GEWICHTE
+
+
+class Gebietsbewertung(NamedTuple):
+    """Ergebnis von bewerte_gebiet."""
+    anzahl: np.ndarray      # int64, Zellen je Stufe (Index in GESAMT_STUFEN)
+    kacheln: int
+    aus_cache: int          # davon unverändert aus dem Cache übernommen
+
+
+# Zustand eines Arbeitsprozesses, gesetzt von _arbeiter_start
+_ARBEIT = {}
+
+
+def raster_spalte(name):
+    """("tool1" | "tool2", Spalte der Codematrix) zu einem Spaltennamen wie in lawinen.stapel."""
+    for tool, kurz, fragen in (("tool1", SPALTEN_EINGABE_TOOL1, KATALOG.tool1), ("tool2", SPALTEN_EINGABE_TOOL2, KATALOG.tool2)):
+        for spalte, (kurzname, frage) in enumerate(zip(kurz, fragen)):
+            if name in (kurzname, frage.frage):
+                return tool, spalte
+    if name in ("setzung", "Setzung"):
+        return "tool1", len(KATALOG.tool1)
+    raise ValueError(f"Unbekannte Frage {name!r} für ein Gelände-Raster")
+
+
+def lese_regionen(pfad):
+    """
+    Antworten pro Region aus einer CSV. Gibt die Codes als Nachschlagetabellen zurück, Zeile = Region-ID:
+    (tool1 (m x 10), tool2 (m x 7), bekannt (m)); Region 0 bleibt unbekannt.
+    """
+    with open(pfad, encoding="utf-8-sig", newline="") as f:
+        zeilen = list(csv.DictReader(f))
+    if not zeilen:
+        raise ValueError(f"{pfad}: keine Regionen")
+    try:
+        ids = np.array([int(zeile["region"]) for zeile in zeilen])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"{pfad}: Spalte region mit ganzzahligen IDs erwartet") from None
+    if ids.min() < 1 or len(np.unique(ids)) != len(ids):
+        raise ValueError(f"{pfad}: Region-IDs müssen eindeutig und größer als 0 sein")
+    codes1, codes2 = kodiere_block(zeilen, erste_zeile=2)
+    tool1 = np.zeros((ids.max() + 1, codes1.shape[1]), dtype=np.uint8)
+    tool2 = np.zeros((ids.max() + 1, codes2.shape[1]), dtype=np.uint8)
+    bekannt = np.zeros(ids.max() + 1, dtype=bool)
+    tool1[ids], tool2[ids], bekannt[ids] = codes1, codes2, True
+    return tool1, tool2, bekannt
+
+
+def _fingerabdruck(tabelle1, tabelle2, gewichte):
+    """SHA-256 über alles, was außer den Antworten in die Bewertung eingeht."""
+    h = hashlib.sha256()
+    for teil in (tabelle1, tabelle2, gewichte, gesamtrisiko_tabelle()):
+        h.update(np.ascontiguousarray(teil, dtype=np.float64).tobytes())
+    h.update(np.array([
+        SCHWELLE_HOCH, SCHWELLE_MODERAT, FARB_SCHWELLENWERTE["gering"]["wert"], FARB_SCHWELLENWERTE["maessig"]["wert"],
+    ], dtype=np.float64).tobytes())
+    return h.digest()
+
+
+def codes_zusammensetzen(region, gelaende, tool1, tool2, bekannt):
+    """
+    Codematrizen von Tool 1 (n x 10) und Tool 2 (n x 7) für n Zellen oder Punkte.
+    region: Region-IDs (n); gelaende: [(tool, spalte, Codes (n)), ...]; tool1, tool2, bekannt aus lese_regionen.
+    Gibt zusätzlich die Maske der gültigen Einträge zurück (bekannte Region, kein Gelände-Code 0).
+    """
+    region = np.nan_to_num(np.asarray(region).ravel()).astype(np.int64)  # Regionen aus ASCII-Grids: float mit NaN
+    region[(region < 0) | (region >= len(bekannt))] = 0
+    gueltig = bekannt[region]
+    codes1 = tool1[region]
+    codes2 = tool2[region]
+    for tool, spalte, codes in gelaende:
+        codes = np.asarray(codes).ravel()
+        gueltig &= codes > 0
+        (codes1 if tool == "tool1" else codes2)[:, spalte] = codes
+    return codes1, codes2, gueltig
+
+
+def bewerte_kachel(region, gelaende, tool1, tool2, bekannt, tabelle1=None, tabelle2=None, gewichte=GEWICHTE):
+    """
+    Gesamtrisiko-Stufen für einen Block Zellen.
+    region: Region-IDs (beliebige Form); gelaende: [(tool, spalte, Code-Block), ...] gleicher Form.
+    tool1, tool2, bekannt: Nachschlagetabellen aus lese_regionen.
+    """
+    form = region.shape
+    region = np.nan_to_num(region.ravel()).astype(np.int64)
+    schluessel = region.copy()
+    for _, _, block in gelaende:
+        schluessel = schluessel * 5 + block.ravel()
+
+    # Nur die verschiedenen Kombinationen bewerten
+    _, erste, zurueck = np.unique(schluessel, return_index=True, return_inverse=True)
+    codes1, codes2, gueltig = codes_zusammensetzen(
+        region[erste], [(tool, spalte, block.ravel()[erste]) for tool, spalte, block in gelaende], tool1, tool2, bekannt,
+    )
+    ergebnis1 = bewerte_tool1_batch(codes1, tabelle1)
+    ergebnis2 = bewerte_tool2_batch(codes2, gewichte, tabelle2)
+    stufe = gesamtrisiko_batch(ergebnis1.kategorie, ergebnis2.kategorie_gew)
+    stufe[~gueltig] = 0
+    return stufe[zurueck.ravel()].reshape(form)
+
+
+def _arbeiter_start(ziel, regionen, gelaende, tabellen, cache):
+    _ARBEIT.clear()
+    _ARBEIT["ziel"] = np.load(ziel, mmap_mode="r+")
+    _ARBEIT["regionen"] = np.load(regionen, mmap_mode="r") if regionen else None
+    _ARBEIT["gelaende"] = [(tool, spalte, np.load(pfad, mmap_mode="r")) for tool, spalte, pfad in gelaende]
+    _ARBEIT["tabellen"] = tabellen
+    _ARBEIT["cache"] = Path(cache) if cache else None
+
+
+def _schluessel(region, gelaende, tool1, tool2, bekannt, fingerabdruck):
+    h = hashlib.sha256(fingerabdruck)
+    h.update(np.ascontiguousarray(region).tobytes())
+    ids = np.unique(region)
+    ids = ids[(ids >= 0) & (ids < len(bekannt))]
+    for teil in (ids, tool1[ids], tool2[ids], bekannt[ids]):
+        h.update(np.ascontiguousarray(teil).tobytes())
+    for tool, spalte, block in gelaende:
+        h.update(f"{tool}:{spalte}".encode())
+        h.update(np.ascontiguousarray(block).tobytes())
+    return h.hexdigest()
+
+
+def _kachel_rechnen(teil):
+    z0, z1, s0, s1 = teil
+    tool1, tool2, bekannt, tabelle1, tabelle2, gewichte, fingerabdruck = _ARBEIT["tabellen"]
+    regionen = _ARBEIT["regionen"]
+    region = np.ones((z1 - z0, s1 - s0), dtype=np.int64) if regionen is None else np.asarray(regionen[z0:z1, s0:s1])
+    region = np.nan_to_num(region).astype(np.int64)  # einmal normalisieren: Schlüssel und Bewertung sehen dieselben IDs
+    gelaende = [(tool, spalte, np.asarray(raster[z0:z1, s0:s1])) for tool, spalte, raster in _ARBEIT["gelaende"]]
+
+    cache, datei = _ARBEIT["cache"], None
+    if cache is not None:
+        datei = cache / f"{_schluessel(region, gelaende, tool1, tool2, bekannt, fingerabdruck)}.npy"
+        if datei.exists():
+            stufe = np.load(datei)
+            _ARBEIT["ziel"][z0:z1, s0:s1] = stufe
+            return np.bincount(stufe.ravel(), minlength=len(GESAMT_STUFEN)), True
+
+    stufe = bewerte_kachel(region, gelaende, tool1, tool2, bekannt, tabelle1, tabelle2, gewichte)
+    _ARBEIT["ziel"][z0:z1, s0:s1] = stufe
+    if datei is not None:
+        # Erst unter temporärem Namen schreiben; andere Prozesse sehen nur vollständige Dateien
+        temp = datei.with_name(f"{datei.stem}.{os.getpid()}.tmp")
+        with open(temp, "wb") as f:
+            np.save(f, stufe)
+        os.replace(temp, datei)
+    return np.bincount(stufe.ravel(), minlength=len(GESAMT_STUFEN)), False
+
+
+def bewerte_gebiet(wetter, ziel, gelaende, regionen=None, cache=None, prozesse=None, kachel=KACHEL,
+                   tabelle1=None, tabelle2=None, gewichte=GEWICHTE):
+    """
+    Schreibt das Raster der Gesamtrisiko-Stufen (uint8, Index in GESAMT_STUFEN) nach ziel.
+    wetter: CSV mit den Antworten pro Region (lese_regionen)
+    gelaende: {Spaltenname: Code-Raster}, z. B. {"Hangneigung / Exposition": "tal_hang.npy"}
+    regionen: Raster der Region-IDs; ohne gilt Region 1 für alle Zellen.
+    tabelle1, tabelle2, gewichte: geänderte Punktetabellen (lawinen.batch) und Gewichte.
+    """
+    tool1, tool2, bekannt = lese_regionen(wetter)
+    raster = [(*raster_spalte(name), str(pfad)) for name, pfad in gelaende.items()]
+    pfade = ([str(regionen)] if regionen else []) + [pfad for _, _, pfad in raster]
+    if not pfade:
+        raise ValueError("Mindestens ein Gelände-Raster oder ein Regionen-Raster angeben")
+    _, georeferenz = oeffnen(pfade[0])
+    for pfad in pfade[1:]:
+        _, andere = oeffnen(pfad)
+        if (andere.zeilen, andere.spalten) != (georeferenz.zeilen, georeferenz.spalten):
+            raise ValueError(f"{pfad}: {andere.zeilen} x {andere.spalten} Zellen statt {georeferenz.zeilen} x {georeferenz.spalten}")
+
+    if tabelle1 is None:
+        tabelle1 = punkte_tabelle_tool1()
+    if tabelle2 is None:
+        tabelle2 = punkte_tabelle_tool2()
+    gewichte = np.asarray(gewichte, dtype=np.float64)
+    tabellen = (tool1, tool2, bekannt, tabelle1, tabelle2, gewichte, _fingerabdruck(tabelle1, tabelle2, gewichte))
+    if cache:
+        Path(cache).mkdir(parents=True, exist_ok=True)
+    _raster_anlegen(ziel, georeferenz, np.uint8).flush()  # nur anlegen; die Arbeiter blenden es selbst ein
+
+    teile = list(kacheln(georeferenz.zeilen, georeferenz.spalten, kachel))
+    initargs = (str(ziel), str(regionen) if regionen else None, raster, tabellen, cache)
+    prozesse = prozesse or os.cpu_count()
+    if prozesse == 1:
+        _arbeiter_start(*initargs)
+        try:
+            ergebnisse = [_kachel_rechnen(teil) for teil in teile]
+        finally:
+            _ARBEIT.clear()
+    else:
+        with ProcessPoolExecutor(prozesse, initializer=_arbeiter_start, initargs=initargs) as pool:
+            ergebnisse = list(pool.map(_kachel_rechnen, teile))
+
+    anzahl = np.zeros(len(GESAMT_STUFEN), dtype=np.int64)
+    for haeufigkeit, _ in ergebnisse:
+        anzahl += haeufigkeit
+    return Gebietsbewertung(anzahl, len(teile), sum(aus_cache for _, aus_cache in ergebnisse))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lawinen.region", description="Gesamtrisiko pro Rasterzelle für ein Gebiet")
+    parser.add_argument("wetter", help="CSV mit Spalte region und den Antworten pro Region")
+    parser.add_argument("ziel", help="Ergebnis-Raster (.npy, Index in GESAMT_STUFEN)")
+    parser.add_argument("--regionen", help="Raster der Region-IDs (.npy, siehe lawinen.gelaende)")
+    parser.add_argument("--raster", action="append", default=[], metavar="FRAGE=PFAD",
+                        help="Code-Raster für eine Frage, z. B. \"Hangneigung / Exposition=tal_hang.npy\"; mehrfach möglich")
+    parser.add_argument("--cache", help="Verzeichnis für unveränderte Kacheln")
+    parser.add_argument("--prozesse", type=int, default=os.cpu_count())
+    parser.add_argument("--kachel", type=int, default=KACHEL)
+    args = parser.parse_args(argv)
+
+    gelaende = {}
+    for angabe in args.raster:
+        name, trenner, pfad = angabe.rpartition("=")
+        if not trenner or not name or not pfad:
+            parser.error(f"--raster erwartet FRAGE=PFAD, nicht {angabe!r}")
+        gelaende[name.strip()] = pfad.strip()
+
+    start = time.perf_counter()
+    try:
+        ergebnis = bewerte_gebiet(args.wetter, args.ziel, gelaende, args.regionen, args.cache, args.prozesse, args.kachel)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"Fehler: {e}\n")
+    dauer = time.perf_counter() - start
+    for stufe, haeufigkeit in zip(GESAMT_STUFEN, ergebnis.anzahl):
+        print(f"{stufe:12} {haeufigkeit:12d}")
+    print(f"{ergebnis.kacheln} Kacheln, davon {ergebnis.aus_cache} aus dem Cache, in {dauer:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Reichweite nach dem Pauschalgefälle (Alpha-Winkel) für Tool 2, Frage 5 und Frage 7.
+
+Von jedem Anrisspunkt aus wird die Falllinie im Höhenraster (lawinen.gelaende) verfolgt:
+jeweils zur Nachbarzelle mit dem stärksten Gefälle (D8), im flachen oder ansteigenden
+Gelände in der bisherigen Richtung weiter. Die Lawine endet dort, wo die Linie mit dem
+Pauschalgefälle ALPHA vom Anrisspunkt das Gelände schneidet, also wo
+Höhendifferenz / Horizontaldistanz auf tan(ALPHA) fällt. Alle Anrisspunkte laufen
+gleichzeitig (ein numpy-Schritt pro Zelle Weglänge für alle noch aktiven Bahnen).
+
+Vorschläge:
+- Frage 5 aus der Länge des Auslaufs (Weg ab der ersten Stelle mit weniger als BETA Grad
+  Gefälle bis zum Ende); mit einem Hindernis-Raster (z. B. Wald) "mit Hindernissen".
+- Frage 7 aus einem Infrastruktur-Raster (Straßen, Pisten, Gebäude != 0): auf der Bahn,
+  innerhalb PUFFER_M seitlich der Bahn, innerhalb SICHTWEITE_M um das Ende oder weit entfernt.
+
+Aufruf:
+    python -m lawinen.reichweite tal.npy anrisse.csv --infrastruktur pisten.npy --ausgabe reichweiten.csv
+"""
+import argparse
+import csv
+import math
+import sys
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from .gelaende import oeffnen
+from .katalog import KATALOG
+
+ALPHA = 26.5            # Grad, Pauschalgefälle 26–27°
+BETA = 10               # Grad; ab hier beginnt der Auslauf
+KURZ_M = 100            # kürzerer Auslauf: "Kurzer Auslauf, flach"
+SEHR_LANG_M = 500       # längerer Auslauf oder Ende am Rasterrand: "sehr große Reichweite"
+PUFFER_M = 50           # seitlicher Abstand zur Bahn für "kann erreichen"
+SICHTWEITE_M = 500      # Abstand zum Ende für "in Sichtweite"
+BLOCK = 512             # Spalten pro Block beim Aufbereiten der Masken
+FRAGE5 = 4              # Index in KATALOG.tool2
+FRAGE7 = 6
+
+# Nachbarn im Uhrzeigersinn ab Nord: Zeilen- und Spaltenversatz, Abstand in Zellen
+VERSATZ_ZEILE = np.array([-1, -1, 0, 1, 1, 1, 0, -1])
+VERSATZ_SPALTE = np.array([0, 1, 1, 1, 0, -1, -1, -1])
+ABSTAND = np.hypot(VERSATZ_ZEILE, VERSATZ_SPALTE)
+
+
+class Reichweiten(NamedTuple):
+    """Ergebnis von reichweite(), ein Array-Eintrag pro Anrisspunkt."""
+    gueltig: np.ndarray       # bool: Anrisspunkt im Raster mit Höhe
+    ende_x: np.ndarray        # float64, Koordinaten der Endzelle (Zellmitte)
+    ende_y: np.ndarray
+    laenge: np.ndarray        # float64, horizontale Weglänge bis zum Ende (m)
+    hoehe: np.ndarray         # float64, Höhendifferenz Anriss - Ende (m)
+    auslauf: np.ndarray       # float64, Weglänge ab Gefälle < BETA (m), 0 ohne Auslauf
+    am_rand: np.ndarray       # bool: Bahn endet am Rasterrand oder an fehlenden Höhen, bevor ALPHA erreicht ist
+    hindernis: np.ndarray     # bool: Hindernis im Auslauf
+    frage5: np.ndarray        # uint8, Vorschlag Code 1..4 (0 ungültig)
+    frage7: np.ndarray        # uint8, Vorschlag Code 1..4: weit, Sichtweite, Puffer, auf der Bahn (0 ohne Infrastruktur-Raster)
+
+
+def _maske(pfad):
+    """Masken-Raster (gesetzt: != 0 und nicht NaN) als memory-map oder None."""
+    if pfad is None:
+        return None
+    raster, _ = oeffnen(pfad)
+    return raster
+
+
+def _spaltenabstand(maske, grenze, block=BLOCK):
+    """
+    Abstand in Zellen (uint16, höchstens grenze) jeder Zelle zur nächsten gesetzten Zelle derselben Spalte.
+    Spaltenblöcke sind unabhängig; so bleiben die Zwischenarrays auch bei großen Rastern klein.
+    """
+    anzahl_z, anzahl_s = maske.shape
+    abstand = np.empty((anzahl_z, anzahl_s), dtype=np.uint16)
+    index = np.arange(anzahl_z)[:, None]
+    for s0 in range(0, anzahl_s, block):
+        gesetzt = np.nan_to_num(np.asarray(maske[:, s0:s0 + block], dtype=np.float64)) != 0
+        oben = np.where(gesetzt, index, -grenze - 1)
+        np.maximum.accumulate(oben, axis=0, out=oben)
+        unten = np.where(gesetzt, index, anzahl_z + grenze)
+        unten = np.minimum.accumulate(unten[::-1], axis=0)[::-1]
+        abstand[:, s0:s0 + block] = np.minimum(np.minimum(index - oben, unten - index), grenze)
+    return abstand
+
+
+def _puffer(abstand, radius):
+    """Maske aller Zellen, die höchstens radius Zellen (euklidisch) von einer gesetzten Zelle entfernt sind."""
+    anzahl_s = abstand.shape[1]
+    treffer = np.zeros(abstand.shape, dtype=bool)
+    for ds in range(-radius, radius + 1):
+        # Gesetzte Zelle in Spalte s + ds: höchstens isqrt(r² - ds²) Zeilen entfernt
+        erlaubt = math.isqrt(radius * radius - ds * ds)
+        ziel = slice(max(0, -ds), anzahl_s - max(0, ds))
+        quelle = slice(max(0, ds), anzahl_s + min(0, ds))
+        treffer[:, ziel] |= abstand[:, quelle] <= erlaubt
+    return treffer
+
+
+def _trifft(abstand, zeilen, spalten, radius):
+    """True, wo im Kreis mit radius Zellen um (zeile, spalte) eine gesetzte Zelle liegt (abstand: _spaltenabstand)."""
+    treffer = np.zeros(len(zeilen), dtype=bool)
+    for ds in range(-radius, radius + 1):
+        s = spalten + ds
+        innen = (s >= 0) & (s < abstand.shape[1])
+        treffer[innen] |= abstand[zeilen[innen], s[innen]] <= math.isqrt(radius * radius - ds * ds)
+    return treffer
+
+
+def reichweite(hoehen_pfad, x, y, alpha=ALPHA, infrastruktur=None, hindernisse=None, max_schritte=None):
+    """
+    Verfolgt die Falllinien aller Anrisspunkte (x, y: Koordinaten im System des Rasters).
+    infrastruktur, hindernisse: optionale Masken-Raster mit derselben Georeferenz.
+    """
+    hoehen, geo = oeffnen(hoehen_pfad)
+    infrastruktur = _maske(infrastruktur)
+    hindernisse = _maske(hindernisse)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    tan_alpha = math.tan(math.radians(alpha))
+    tan_beta = math.tan(math.radians(BETA))
+    max_schritte = max_schritte or 4 * (geo.zeilen + geo.spalten)
+
+    spalte = np.floor((x - geo.x) / geo.zellgroesse).astype(np.int64)
+    zeile = geo.zeilen - 1 - np.floor((y - geo.y) / geo.zellgroesse).astype(np.int64)
+    gueltig = (zeile >= 0) & (zeile < geo.zeilen) & (spalte >= 0) & (spalte < geo.spalten)
+    z0 = np.full(n, np.nan)
+    z0[gueltig] = hoehen[zeile[gueltig], spalte[gueltig]]
+    gueltig &= ~np.isnan(z0)
+    zeile, spalte = np.where(gueltig, zeile, 0), np.where(gueltig, spalte, 0)
+
+    z = z0.copy()
+    weg = np.zeros(n)
+    laenge = np.zeros(n)
+    beta_weg = np.full(n, np.nan)
+    richtung = np.full(n, -1)
+    am_rand = np.zeros(n, dtype=bool)
+    hindernis = np.zeros(n, dtype=bool)
+    auf_bahn = np.zeros(n, dtype=bool)
+    im_puffer = np.zeros(n, dtype=bool)
+    puffer = max(1, round(PUFFER_M / geo.zellgroesse))
+    sichtweite = max(1, round(SICHTWEITE_M / geo.zellgroesse))
+    if infrastruktur is not None:
+        # Einmal pro Aufruf aufbereiten: danach kostet die Puffer-Abfrage einen Zugriff pro Schritt
+        abstand = _spaltenabstand(infrastruktur, max(puffer, sichtweite) + 1)
+        im_pufferbereich = _puffer(abstand, puffer)
+    aktiv = gueltig.copy()
+
+    for _ in range(max_schritte):
+        i = np.flatnonzero(aktiv)
+        if not i.size:
+            break
+        # Höhen der acht Nachbarn aller aktiven Bahnen
+        nz = zeile[i, None] + VERSATZ_ZEILE
+        ns = spalte[i, None] + VERSATZ_SPALTE
+        innen = (nz >= 0) & (nz < geo.zeilen) & (ns >= 0) & (ns < geo.spalten)
+        nachbar = np.full(nz.shape, np.nan)
+        nachbar[innen] = hoehen[nz[innen], ns[innen]]
+        gefaelle = (z[i, None] - nachbar) / ABSTAND
+        steilste = np.argmax(np.nan_to_num(gefaelle, nan=-np.inf), axis=1)
+        abwaerts = gefaelle[np.arange(i.size), steilste] > 0
+
+        # Im flachen oder ansteigenden Gelände geradeaus weiter; ohne bisherige Richtung (Mulde am Anriss) Ende
+        wahl = np.where(abwaerts, steilste, richtung[i])
+        weiter = wahl >= 0
+        wahl = np.maximum(wahl, 0)
+        neu_z = nachbar[np.arange(i.size), wahl]
+        rand = weiter & (~innen[np.arange(i.size), wahl] | np.isnan(neu_z))
+        am_rand[i[rand]] = True
+        weiter &= ~rand
+        aktiv[i[~weiter]] = False
+        laenge[i[~weiter]] = weg[i[~weiter]]
+
+        i, wahl, neu_z = i[weiter], wahl[weiter], neu_z[weiter]
+        schritt = ABSTAND[wahl] * geo.zellgroesse
+        neu_weg = weg[i] + schritt
+
+        # Auslauf beginnt beim ersten Schritt mit weniger als BETA Gefälle
+        flach = np.isnan(beta_weg[i]) & ((z[i] - neu_z) < schritt * tan_beta)
+        beta_weg[i[flach]] = weg[i[flach]]
+
+        # Schnitt mit der Alpha-Linie: Überschuss Höhe über der Linie wird <= 0
+        vorher = z0[i] - z[i] - weg[i] * tan_alpha
+        nachher = z0[i] - neu_z - neu_weg * tan_alpha
+        stop = (nachher <= 0) & (weg[i] > 0)
+        anteil = np.where(stop, vorher / np.maximum(vorher - nachher, 1e-12), 1)
+        laenge[i] = weg[i] + anteil * schritt
+        aktiv[i[stop]] = False
+        # Endzelle: die nähere der beiden Zellen um den Schnittpunkt
+        vor = stop & (anteil < 0.5)
+        geht = ~vor
+        i, wahl, neu_z, neu_weg = i[geht], wahl[geht], neu_z[geht], neu_weg[geht]
+        zeile[i] += VERSATZ_ZEILE[wahl]
+        spalte[i] += VERSATZ_SPALTE[wahl]
+        z[i], weg[i], richtung[i] = neu_z, neu_weg, wahl
+
+        if hindernisse is not None:
+            im_auslauf = ~np.isnan(beta_weg[i])
+            hindernis[i[im_auslauf]] |= np.nan_to_num(hindernisse[zeile[i[im_auslauf]], spalte[i[im_auslauf]]]) != 0
+        if infrastruktur is not None:
+            auf_bahn[i] |= np.nan_to_num(infrastruktur[zeile[i], spalte[i]]) != 0
+            im_puffer[i] |= im_pufferbereich[zeile[i], spalte[i]]
+    laenge[aktiv] = weg[aktiv]  # max_schritte erreicht
+    am_rand |= aktiv
+
+    ende_x = np.where(gueltig, geo.x + (spalte + 0.5) * geo.zellgroesse, np.nan)
+    ende_y = np.where(gueltig, geo.y + (geo.zeilen - zeile - 0.5) * geo.zellgroesse, np.nan)
+    auslauf = np.where(np.isnan(beta_weg), 0, laenge - np.nan_to_num(beta_weg))
+
+    frage5 = np.select(
+        [~gueltig, auslauf < KURZ_M, hindernis, (auslauf < SEHR_LANG_M) & ~am_rand],
+        [0, 1, 2, 3], 4,
+    ).astype(np.uint8)
+
+    stufe = np.zeros(n, dtype=np.uint8)
+    if infrastruktur is not None:
+        sicht = _trifft(abstand, zeile, spalte, sichtweite)
+        stufe = np.select([auf_bahn, im_puffer, sicht], [4, 3, 2], 1).astype(np.uint8)
+        stufe[~gueltig] = 0
+    return Reichweiten(
+        gueltig, ende_x, ende_y, np.where(gueltig, laenge, np.nan), np.where(gueltig, z0 - z, np.nan),
+        auslauf, am_rand & gueltig, hindernis, frage5, stufe,
+    )
+
+
+def antworten(reichweiten, i):
+    """Vorgeschlagene Optionstexte für Frage 5 und Frage 7 des i-ten Anrisspunkts (dict Frage -> Text)."""
+    ergebnis = {}
+    for index, codes in ((FRAGE5, reichweiten.frage5), (FRAGE7, reichweiten.frage7)):
+        if codes[i]:
+            frage = KATALOG.tool2[index]
+            ergebnis[frage.frage] = frage.texte[int(codes[i])]
+    return ergebnis
+
+
+def lese_anrisse(pfad):
+    """Anrisspunkte aus einer CSV mit Spalten x, y und optional name."""
+    namen, x, y = [], [], []
+    with open(pfad, encoding="utf-8-sig", newline="") as f:
+        for nummer, zeile in enumerate(csv.DictReader(f), start=2):
+            try:
+                x.append(float(zeile["x"]))
+                y.append(float(zeile["y"]))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Zeile {nummer}: Koordinaten x und y erwartet") from None
+            namen.append(zeile.get("name") or str(nummer - 1))
+    return namen, np.array(x), np.array(y)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lawinen.reichweite", description="Reichweite nach dem Pauschalgefälle")
+    parser.add_argument("hoehen", help="Höhenraster (.npy, siehe lawinen.gelaende)")
+    parser.add_argument("anrisse", help="CSV mit x, y (und name) der Anrisspunkte")
+    parser.add_argument("--alpha", type=float, default=ALPHA)
+    parser.add_argument("--infrastruktur", help="Masken-Raster Straßen/Pisten/Gebäude (!= 0)")
+    parser.add_argument("--hindernisse", help="Masken-Raster Wald/Hindernisse (!= 0)")
+    parser.add_argument("--ausgabe", default="-", help="CSV-Datei, Standard: stdout")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        namen, x, y = lese_anrisse(args.anrisse)
+        ergebnis = reichweite(args.hoehen, x, y, args.alpha, args.infrastruktur, args.hindernisse)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"Fehler: {e}\n")
+    dauer = time.perf_counter() - start
+
+    frage5, frage7 = KATALOG.tool2[FRAGE5], KATALOG.tool2[FRAGE7]
+    aus = sys.stdout if args.ausgabe == "-" else open(args.ausgabe, "w", encoding="utf-8", newline="")
+    try:
+        schreiber = csv.writer(aus)
+        schreiber.writerow(["name", "x", "y", "ende_x", "ende_y", "laenge_m", "hoehe_m", "auslauf_m", "am_rand", "frage5", "frage7"])
+        for k, name in enumerate(namen):
+            if not ergebnis.gueltig[k]:
+                schreiber.writerow([name, x[k], y[k]] + [""] * 8)
+                continue
+            schreiber.writerow([
+                name, x[k], y[k], round(ergebnis.ende_x[k], 1), round(ergebnis.ende_y[k], 1),
+                round(ergebnis.laenge[k], 1), round(ergebnis.hoehe[k], 1), round(ergebnis.auslauf[k], 1),
+                int(ergebnis.am_rand[k]), frage5.texte[ergebnis.frage5[k]], frage7.texte[ergebnis.frage7[k]],
+            ])
+    finally:
+        if aus is not sys.stdout:
+            aus.close()
+    print(f"{len(namen)} Anrisspunkte in {dauer:.2f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
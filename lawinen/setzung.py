@@ -0,0 +1,252 @@
+"""
+Setzung des Neuschnees (Excel-Formel aus Tool 1).
+
+Neben der Formel mit einer Temperatur gibt es ein Gradstunden-Modell für stündliche
+Temperaturreihen (Setzungsverlauf, setzungsgrad_verlauf). numpy wird erst für die
+Nachschlagetabelle und die Reihen geladen, damit die Seiten ohne sie starten.
+"""
+import csv
+import io
+import math
+from functools import lru_cache
+
+# Mögliche Ergebnisse der Setzung mit Punktwert ("" = keine Angabe)
+SETZUNG_OPTIONEN = {"": 0, "1: (fast) keine Setzung": 3.5, "2: mäßige Setzung": 2, "3: starke Setzung": 3.5}
+SETZUNG_ERGEBNISSE = list(SETZUNG_OPTIONEN.items())
+
+# Wertebereich der Eingabefelder (number_input/slider), den die Nachschlagetabelle abdeckt
+NS_BEREICH = (0, 200)
+TEMP_BEREICH = (-30, 15)
+STUNDEN_BEREICH = (0, 100)
+
+MAX_STUNDEN = 72            # länger vergangene Stunden zählen in der Formel nicht mehr
+GRAD_PRO_GRADSTUNDE = 5.0   # 0.4 / 8 * 100 aus der Excel-Formel
+TEMP_NULLPUNKT = -5         # bei dieser Temperatur setzt sich der Schnee laut Formel nicht
+# Mögliche Spaltennamen der Temperatur in Stationsdateien
+TEMP_SPALTEN = ("temp", "temperatur", "lufttemperatur", "ta")
+
+
+def setzungsgrad(temp_val, stunden_val):
+    """Setzungsgrad in Prozent (0-100) nach der Excel-Formel."""
+    ln_teil = math.log(min(stunden_val, MAX_STUNDEN) + 1)
+    return min(100, ((0.4 * (temp_val + 5) * ln_teil) / 8) * 100)
+
+
+def berechne_setzung_excel(ns_val, temp_val, stunden_val):
+    """
+    Schätzt die Setzung aus Neuschneemenge (cm), Temperatur (°C) und vergangenen Stunden.
+    Gibt die Beschreibung (mit Typ-Präfix "1:", "2:" oder "3:") und den Punktwert zurück.
+    """
+    if stunden_val <= 0:
+        return "", 0
+    grad = setzungsgrad(temp_val, stunden_val)
+
+    if grad < 20:
+        return ("1: (fast) keine Setzung", 3.5) if ns_val > 30 else ("2: mäßige Setzung", 2)
+    elif grad < 40:
+        return ("1: (fast) keine Setzung", 3.5) if ns_val > 50 else ("2: mäßige Setzung", 2)
+    else:
+        return ("2: mäßige Setzung", 2) if ns_val > 80 else ("3: starke Setzung", 3.5)
+
+
+def setzung_code(ns_val, temp_val, stunden_val):
+    """Wie berechne_setzung_excel, aber als Code 0..3 (Position in SETZUNG_OPTIONEN)."""
+    beschreibung, _ = berechne_setzung_excel(ns_val, temp_val, stunden_val)
+    return list(SETZUNG_OPTIONEN).index(beschreibung)
+
+
+@lru_cache(maxsize=None)
+def setzung_tabelle():
+    """
+    Nachschlagetabelle (ns, temp, stunden) -> Setzungscode als uint8 über den ganzen
+    ganzzahligen Eingabebereich (201 x 46 x 101 Byte). Wird einmal pro Prozess aufgebaut.
+
+    Der Setzungsgrad hängt nur von Temperatur und Stunden ab; er wird mit derselben
+    Formel wie in berechne_setzung_excel bestimmt, die Neuschnee-Grenzen danach vektorisiert.
+    """
+    import numpy as np
+
+    temps = range(TEMP_BEREICH[0], TEMP_BEREICH[1] + 1)
+    stunden = range(STUNDEN_BEREICH[0], STUNDEN_BEREICH[1] + 1)
+
+    grad = np.array([[setzungsgrad(temp_val, stunden_val) for stunden_val in stunden] for temp_val in temps])
+    ns = np.arange(NS_BEREICH[0], NS_BEREICH[1] + 1).reshape(-1, 1, 1)
+    tabelle = setzung_codes_aus_grad(ns, grad, np.array(stunden))
+    tabelle.setflags(write=False)
+    return tabelle
+
+
+def setzung_codes_aus_grad(ns, grad, stunden):
+    """Setzungscodes 0..3 aus Neuschnee, Setzungsgrad und Stunden (broadcastbar), wie berechne_setzung_excel."""
+    import numpy as np
+
+    # Stufe 0: keine Stunden, 1: < 20 %, 2: < 40 %, 3: >= 40 %
+    stufe = np.where(np.asarray(stunden) > 0, 1 + (grad >= 20) + (grad >= 40), 0)
+    ns_grenze = np.array([0, 30, 50, 80])[stufe]
+    code_viel_ns = np.array([0, 1, 1, 2], dtype=np.uint8)[stufe]
+    code_wenig_ns = np.array([0, 2, 2, 3], dtype=np.uint8)[stufe]
+    return np.where(np.asarray(ns) > ns_grenze, code_viel_ns, code_wenig_ns)
+
+
+def setzung_codes(ns, temp, stunden):
+    """
+    Vektorisierte Setzung: Codes 0..3 für beliebig geformte (broadcastbare) Eingaben.
+    Ganzzahlige Werte im Tabellenbereich werden nachgeschlagen, alle anderen mit der Formel berechnet.
+    """
+    import numpy as np
+
+    ns, temp, stunden = np.broadcast_arrays(np.asarray(ns), np.asarray(temp), np.asarray(stunden))
+    codes = np.empty(ns.shape, dtype=np.uint8)
+
+    in_tabelle = np.ones(ns.shape, dtype=bool)
+    for werte, (von, bis) in ((ns, NS_BEREICH), (temp, TEMP_BEREICH), (stunden, STUNDEN_BEREICH)):
+        in_tabelle &= (werte >= von) & (werte <= bis) & (werte == np.floor(werte))
+
+    tabelle = setzung_tabelle()
+    codes[in_tabelle] = tabelle[
+        ns[in_tabelle].astype(np.intp) - NS_BEREICH[0],
+        temp[in_tabelle].astype(np.intp) - TEMP_BEREICH[0],
+        stunden[in_tabelle].astype(np.intp) - STUNDEN_BEREICH[0],
+    ]
+
+    rest = ~in_tabelle
+    if rest.any():
+        codes[rest] = [setzung_code(n, t, s) for n, t, s in zip(ns[rest].tolist(), temp[rest].tolist(), stunden[rest].tolist())]
+    return codes
+
+
+def setzung_nachschlagen(ns_val, temp_val, stunden_val):
+    """Wie berechne_setzung_excel (Beschreibung, Punktwert), aber über die Nachschlagetabelle."""
+    if stunden_val <= 0:
+        return "", 0  # Standardwert der Regler: Tabelle (und numpy) nicht nötig
+    if (
+        all(isinstance(wert, int) for wert in (ns_val, temp_val, stunden_val))
+        and NS_BEREICH[0] <= ns_val <= NS_BEREICH[1]
+        and TEMP_BEREICH[0] <= temp_val <= TEMP_BEREICH[1]
+        and STUNDEN_BEREICH[0] <= stunden_val <= STUNDEN_BEREICH[1]
+    ):
+        code = setzung_tabelle()[ns_val - NS_BEREICH[0], temp_val - TEMP_BEREICH[0], stunden_val - STUNDEN_BEREICH[0]]
+        return SETZUNG_ERGEBNISSE[code]
+    return berechne_setzung_excel(ns_val, temp_val, stunden_val)
+
+
+def setzung_punkte(codes):
+    """Punktwerte zu Setzungscodes."""
+    import numpy as np
+
+    return np.array(list(SETZUNG_OPTIONEN.values()), dtype=np.float64)[codes]
+
+
+# --- Gradstunden-Modell für stündliche Temperaturreihen ---
+
+def _ln_zuwachs(stunde):
+    """Zuwachs von ln(min(h, 72) + 1) in der Stunde h (numpy-Array), 0 ab Stunde 73."""
+    import numpy as np
+
+    stunde = np.asarray(stunde, dtype=np.float64)
+    return np.log(np.minimum(stunde, MAX_STUNDEN) + 1) - np.log(np.minimum(stunde - 1, MAX_STUNDEN) + 1)
+
+
+def setzungsgrad_verlauf(temperaturen):
+    """
+    Setzungsgrad nach jeder Stunde für Temperaturreihen (Stationen x Stunden, °C, Spalte j = Stunde j + 1).
+
+    Die Excel-Formel 0.4 * (T + 5) * ln(h + 1) / 8 wird über die Reihe integriert: jede Stunde
+    trägt (T + 5) * Zuwachs von ln(h + 1) bei. Bei gleichbleibender Temperatur ergibt das genau
+    setzungsgrad(T, h). Fehlende Werte (NaN) übernehmen die letzte gültige Temperatur, am Anfang 0 °C.
+    """
+    import numpy as np
+
+    temperaturen = np.atleast_2d(np.asarray(temperaturen, dtype=np.float64))
+    if np.isnan(temperaturen).any():
+        temperaturen = temperaturen.copy()
+        temperaturen[np.isnan(temperaturen[:, 0]), 0] = 0
+        # Index der letzten gültigen Messung bis zu jeder Stunde
+        index = np.where(np.isnan(temperaturen), 0, np.arange(temperaturen.shape[1]))
+        np.maximum.accumulate(index, axis=1, out=index)
+        temperaturen = np.take_along_axis(temperaturen, index, axis=1)
+    zuwachs = _ln_zuwachs(np.arange(1, temperaturen.shape[1] + 1))
+    summe = np.cumsum(GRAD_PRO_GRADSTUNDE * (temperaturen - TEMP_NULLPUNKT) * zuwachs, axis=1)
+    return np.minimum(summe, 100)
+
+
+class Setzungsverlauf:
+    """
+    Gradstunden-Setzung vieler Stationen, stündlich fortgeschrieben (O(1) pro Station und Messung).
+
+    verlauf = Setzungsverlauf(ns=[45, 20, 90])
+    verlauf.stunde([-2.0, 1.5, -8.0])   # eine Messung pro Station
+    verlauf.codes()                      # Setzungscodes 0..3 wie setzung_codes
+    """
+
+    def __init__(self, ns):
+        import numpy as np
+
+        self.ns = np.atleast_1d(np.asarray(ns, dtype=np.float64))
+        self.stunden = np.zeros(self.ns.shape, dtype=np.int64)
+        self.summe = np.zeros(self.ns.shape)
+        self.letzte_temperatur = np.zeros(self.ns.shape)  # für fehlende Messungen
+
+    def __len__(self):
+        return len(self.ns)
+
+    def stunde(self, temperaturen):
+        """Schreibt eine Stunde fort; temperaturen: eine Messung pro Station (°C), NaN = Messung fehlt."""
+        import numpy as np
+
+        temperaturen = np.broadcast_to(np.asarray(temperaturen, dtype=np.float64), self.ns.shape)
+        temperaturen = np.where(np.isnan(temperaturen), self.letzte_temperatur, temperaturen)
+        self.stunden += 1
+        self.summe += GRAD_PRO_GRADSTUNDE * (temperaturen - TEMP_NULLPUNKT) * _ln_zuwachs(self.stunden)
+        self.letzte_temperatur = temperaturen
+
+    def reihe(self, temperaturen):
+        """Schreibt mehrere Stunden fort (Stationen x Stunden)."""
+        import numpy as np
+
+        for spalte in np.asarray(temperaturen, dtype=np.float64).reshape(len(self), -1).T:
+            self.stunde(spalte)
+
+    @property
+    def grad(self):
+        """Setzungsgrad in Prozent pro Station (höchstens 100)."""
+        import numpy as np
+
+        return np.minimum(self.summe, 100)
+
+    def codes(self):
+        """Setzungscodes 0..3 pro Station (Position in SETZUNG_OPTIONEN)."""
+        return setzung_codes_aus_grad(self.ns, self.grad, self.stunden)
+
+    def ergebnisse(self):
+        """(Beschreibung, Punktwert) pro Station wie bei berechne_setzung_excel."""
+        return [SETZUNG_ERGEBNISSE[code] for code in self.codes().tolist()]
+
+
+def lese_temperaturen(text):
+    """
+    Liest stündliche Temperaturen aus einer Stations-CSV (Komma, Semikolon oder Tab getrennt,
+    Dezimalkomma erlaubt). Erwartet eine Temperaturspalte (TEMP_SPALTEN) und optional eine
+    Spalte "station"; die Zeilen sind Stunden ab Ende des Schneefalls. Leere Werte gelten als
+    fehlende Messung (NaN). Gibt dict Station -> Liste der Temperaturen zurück.
+    """
+    try:
+        dialekt = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialekt = csv.excel
+    leser = csv.DictReader(io.StringIO(text), dialect=dialekt)
+    spalten = {name.strip().lower(): name for name in leser.fieldnames or ()}
+    temp_spalte = next((spalten[name] for name in TEMP_SPALTEN if name in spalten), None)
+    if temp_spalte is None:
+        raise ValueError(f"Keine Temperaturspalte gefunden (erwartet eine von {', '.join(TEMP_SPALTEN)})")
+    station_spalte = spalten.get("station")
+
+    reihen = {}
+    for nummer, zeile in enumerate(leser, start=2):
+        station = (zeile.get(station_spalte) or "").strip() if station_spalte else ""
+        wert = (zeile.get(temp_spalte) or "").strip().replace(",", ".")
+        try:
+            reihen.setdefault(station, []).append(float(wert) if wert else math.nan)
+        except ValueError:
+            raise ValueError(f"Zeile {nummer}: ungültige Temperatur {zeile[temp_spalte]!r}") from None
+    return reihen
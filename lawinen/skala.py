@@ -0,0 +1,127 @@
+"""
+Darstellung des Gefahrenindex auf der Ampel-Skala (Tool 1).
+
+Der statische Hintergrund (Farbverlauf, gestrichelte Linie) wird einmal pro Prozess mit
+matplotlib gerendert und als RGBA-Array zwischengespeichert; pro Bewertung wird nur noch
+der Marker eingezeichnet. skala_svg() erzeugt dieselbe Skala ganz ohne matplotlib.
+numpy und matplotlib werden erst beim ersten Zeichnen geladen.
+"""
+from functools import lru_cache
+
+from .tool1 import SCHWELLE_HOCH, SCHWELLE_MODERAT
+
+FARBEN = ["#4CAF50", "#ffa500", "#ff4b4b"]  # grün, gelb, rot
+GRENZEN = [1.95, SCHWELLE_MODERAT, SCHWELLE_HOCH, 3.65]  # Bereiche der Ampelfarben auf der Skala
+SKALA_MIN = 1.0
+SKALA_MAX = 4.0
+
+# Entspricht st.pyplot(fig) mit figsize=(6, 1.5): dpi 200, bbox_inches="tight", pad_inches=0.1
+DPI = 200
+RAND_PX = 20
+MARKER_RADIUS_PX = 10 / 2 * DPI / 72   # markersize=10 (Punkte, Durchmesser)
+MARKER_RAND_PX = 1 * DPI / 72          # markeredgewidth=1
+HISTOGRAMM_HOEHE = 0.9                 # höchster Balken der Verteilung, Anteil der Skalenhöhe
+HISTOGRAMM_DECKUNG = 0.6
+HISTOGRAMM_BALKEN_PX = 8               # Breite eines Histogramm-Balkens
+
+
+@lru_cache(maxsize=1)
+def skala_hintergrund():
+    """Rendert die leere Skala einmal mit matplotlib. Gibt das RGBA-Bild (nur lesbar) zurück."""
+    import numpy as np
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.colors import BoundaryNorm, ListedColormap
+    from matplotlib.figure import Figure
+
+    # Figure statt pyplot: die Figur wird nicht im globalen pyplot-Register gehalten
+    fig = Figure(figsize=(6, 1.5), dpi=DPI)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    cmap = ListedColormap(FARBEN)
+    norm = BoundaryNorm(GRENZEN, cmap.N)
+
+    gradient = np.linspace(SKALA_MIN, SKALA_MAX, 400).reshape(1, -1)
+    ax.imshow(gradient, extent=[SKALA_MIN, SKALA_MAX, 0, 1], aspect='auto', cmap=cmap, norm=norm)
+    ax.set_xlim(SKALA_MAX, SKALA_MIN)  # Skala von rechts (gering) nach links (hoch)
+    ax.axhline(0.5, color='white', linestyle='--')
+    ax.axis('off')
+    canvas.draw()
+
+    # Nur den Achsenbereich ausschneiden und wie bbox_inches="tight" weiß umranden
+    x0, y0, x1, y1 = np.round(ax.get_window_extent().extents).astype(int)
+    pixel = np.asarray(canvas.buffer_rgba())
+    hoehe = pixel.shape[0]
+    achse = pixel[hoehe - y1:hoehe - y0, x0:x1]
+    bild = np.full((achse.shape[0] + 2 * RAND_PX, achse.shape[1] + 2 * RAND_PX, 4), 255, dtype=np.uint8)
+    bild[RAND_PX:-RAND_PX, RAND_PX:-RAND_PX] = achse
+    fig.clear()
+    bild.setflags(write=False)
+    return bild
+
+
+def skala_bild(gefahrenindex, verteilung=None):
+    """
+    Kopie des zwischengespeicherten Hintergrunds mit Marker beim Gefahrenindex (RGBA-Array für st.image).
+    verteilung: optional gezogene Gefahrenindizes (lawinen.unsicherheit); ihr Histogramm wird
+    halbtransparent von unten in die Skala gezeichnet, NaN-Werte werden übergangen.
+    """
+    import numpy as np
+
+    hintergrund = skala_hintergrund()
+    bild = hintergrund.copy()
+    breite = hintergrund.shape[1] - 2 * RAND_PX
+    hoehe = hintergrund.shape[0] - 2 * RAND_PX
+
+    if verteilung is not None:
+        werte = np.asarray(verteilung, dtype=np.float64)
+        werte = np.clip(werte[~np.isnan(werte)], SKALA_MIN, SKALA_MAX)
+        if werte.size:
+            # Balkenhöhe pro Pixelspalte; links ist hoch, daher die Reihenfolge umkehren
+            anzahl_balken = breite // HISTOGRAMM_BALKEN_PX
+            haeufigkeit, _ = np.histogram(werte, bins=anzahl_balken, range=(SKALA_MIN, SKALA_MAX))
+            balken = np.round(haeufigkeit[::-1] / haeufigkeit.max() * hoehe * HISTOGRAMM_HOEHE).astype(int)
+            balken = balken[np.arange(breite) * anzahl_balken // breite]
+            zeilen = np.arange(hoehe)[:, None]
+            maske = zeilen >= hoehe - balken[None, :]
+            flaeche = bild[RAND_PX:RAND_PX + hoehe, RAND_PX:RAND_PX + breite, :3]
+            flaeche[maske] = np.round(flaeche[maske] * (1 - HISTOGRAMM_DECKUNG) + 255 * HISTOGRAMM_DECKUNG).astype(np.uint8)
+
+    wert = min(max(gefahrenindex, SKALA_MIN), SKALA_MAX)
+    mx = RAND_PX + (SKALA_MAX - wert) / (SKALA_MAX - SKALA_MIN) * breite
+    my = RAND_PX + hoehe / 2
+
+    # Kreis mit schwarzem Rand, kantengeglättet über den Abstand zum Mittelpunkt
+    r = MARKER_RADIUS_PX
+    y_von, y_bis = int(my - r - 2), int(my + r + 3)
+    x_von, x_bis = int(mx - r - 2), int(mx + r + 3)
+    yy, xx = np.mgrid[y_von:y_bis, x_von:x_bis]
+    abstand = np.hypot(xx + 0.5 - mx, yy + 0.5 - my)
+    deckung_rand = np.clip(r + 0.5 - abstand, 0, 1)[..., None]
+    deckung_innen = np.clip(r - MARKER_RAND_PX + 0.5 - abstand, 0, 1)[..., None]
+
+    ausschnitt = bild[y_von:y_bis, x_von:x_bis, :3].astype(np.float32)
+    ausschnitt = ausschnitt * (1 - deckung_rand)              # schwarzer Rand
+    ausschnitt = ausschnitt * (1 - deckung_innen) + 255 * deckung_innen  # weiße Füllung
+    bild[y_von:y_bis, x_von:x_bis, :3] = np.round(ausschnitt).astype(np.uint8)
+    return bild
+
+
+def skala_svg(gefahrenindex, breite=600, hoehe=150):
+    """Leichtgewichtige SVG-Variante der Skala ohne matplotlib (z. B. für st.markdown oder mobile Clients)."""
+    def x_von(wert):
+        return (SKALA_MAX - wert) / (SKALA_MAX - SKALA_MIN) * breite
+
+    # Von links (hoch) nach rechts (gering)
+    bereiche = [
+        (SKALA_MAX, SCHWELLE_HOCH, FARBEN[2]),
+        (SCHWELLE_HOCH, SCHWELLE_MODERAT, FARBEN[1]),
+        (SCHWELLE_MODERAT, SKALA_MIN, FARBEN[0]),
+    ]
+    teile = [f"<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 {breite} {hoehe}' width='100%'>"]
+    for von, bis, farbe in bereiche:
+        teile.append(f"<rect x='{x_von(von):.1f}' y='0' width='{x_von(bis) - x_von(von):.1f}' height='{hoehe}' fill='{farbe}'/>")
+    teile.append(f"<line x1='0' y1='{hoehe / 2}' x2='{breite}' y2='{hoehe / 2}' stroke='white' stroke-width='2' stroke-dasharray='8 4'/>")
+    wert = min(max(gefahrenindex, SKALA_MIN), SKALA_MAX)
+    teile.append(f"<circle cx='{x_von(wert):.1f}' cy='{hoehe / 2}' r='{hoehe / 12:.1f}' fill='white' stroke='black' stroke-width='1.5'/>")
+    teile.append("</svg>")
+    return "".join(teile)
@@ -0,0 +1,240 @@
+"""
+Sonneneinstrahlung für Tool 1, Frage "Exposition/Sonneneinstrahlung".
+
+Für einen Tag und ein Zeitfenster (Ortszeit) wird der Sonnenstand in Schritten von SCHRITT
+Minuten berechnet (NOAA-Näherung: Deklination und Zeitgleichung). Die Tabelle wird pro Datum,
+Ort und Fenster einmal aufgebaut und wiederverwendet. Daraus folgt pro Hang (Neigung,
+Exposition) die Einstrahlung bei klarem Himmel in kWh/m² über das Fenster: direkte Strahlung
+auf die geneigte Fläche (Meinel: 1367 W/m² * 0.7 ** (Luftmasse ** 0.678)) plus ein diffuser
+Anteil DIFFUS. Im Höhenraster (lawinen.gelaende) beschattet das Gelände: pro Richtung wird der
+Horizontwinkel bis HORIZONT_M Entfernung bestimmt; die Sonne zählt nur über dem Horizont.
+
+Code wie in der Frage: 1 "starke" ab STARK kWh/m², 2 "mäßige" ab MAESSIG, sonst 3 "kaum".
+Das Code-Raster kann lawinen.region als Gelände-Raster für "Exposition/Sonneneinstrahlung" dienen.
+
+Aufruf:
+    python -m lawinen.sonne hang 35 180 --datum 2025-02-15 --von 9 --bis 16
+    python -m lawinen.sonne codes tal.npy tal_sonne.npy --datum 2025-02-15 --breite 46.8 --laenge 9.8
+    python -m lawinen.sonne abfrage tal_sonne.npy 2634500 1164200
+"""
+import argparse
+import datetime
+import math
+import time
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from .gelaende import KACHEL, _raster_anlegen, fenster, kacheln, neigung_exposition, oeffnen
+from .katalog import KATALOG
+
+FRAGE = "Exposition/Sonneneinstrahlung"
+BREITE = 47.0           # Grad Nord; Alpenmitte als Vorgabe
+LAENGE = 11.0           # Grad Ost
+ZEITZONE = 1            # Stunden gegenüber UTC (MEZ)
+VON, BIS = 9, 16        # Zeitfenster in Stunden Ortszeit
+SCHRITT = 15            # Minuten
+SOLARKONSTANTE = 1367   # W/m²
+TRANSMISSION = 0.7
+DIFFUS = 0.1            # diffuser Anteil der direkten Strahlung auf die Horizontale
+STARK = 3.0             # kWh/m² im Zeitfenster, ab hier "starke Sonneneinstrahlung"
+MAESSIG = 1.0           # ab hier "mäßige"
+HORIZONT_M = 3000       # Suchweite für die Geländeabschattung
+HORIZONT_SEKTOR = 15    # Grad zwischen den berechneten Horizontrichtungen
+HORIZONT_PROBEN = 40    # Stützstellen pro Richtung, nach außen immer weiter auseinander
+
+
+class Sonnenstand(NamedTuple):
+    """Sonnenstand zur Mitte jedes Zeitschritts; Arrays nur lesbar."""
+    minuten: np.ndarray     # Minuten nach Mitternacht (Ortszeit)
+    azimut: np.ndarray      # Grad im Uhrzeigersinn ab Nord
+    hoehe: np.ndarray       # Grad über dem mathematischen Horizont
+    schritt: int            # Minuten pro Schritt
+
+
+@lru_cache(maxsize=64)
+def sonnenstand(datum, breite=BREITE, laenge=LAENGE, von=VON, bis=BIS, schritt=SCHRITT, zeitzone=ZEITZONE):
+    """Sonnenstandstabelle für einen Tag (datetime.date); wird pro Argumentsatz einmal berechnet."""
+    minuten = np.arange(von * 60 + schritt / 2, bis * 60, schritt, dtype=np.float64)
+    tag = datum.timetuple().tm_yday
+    tage = 366 if datum.year % 4 == 0 and (datum.year % 100 or datum.year % 400 == 0) else 365
+    gamma = 2 * np.pi / tage * (tag - 1 + (minuten / 60 - zeitzone - 12) / 24)
+    zeitgleichung = 229.18 * (
+        0.000075 + 0.001868 * np.cos(gamma) - 0.032077 * np.sin(gamma)
+        - 0.014615 * np.cos(2 * gamma) - 0.040849 * np.sin(2 * gamma)
+    )
+    deklination = (
+        0.006918 - 0.399912 * np.cos(gamma) + 0.070257 * np.sin(gamma) - 0.006758 * np.cos(2 * gamma)
+        + 0.000907 * np.sin(2 * gamma) - 0.002697 * np.cos(3 * gamma) + 0.00148 * np.sin(3 * gamma)
+    )
+    wahre_ortszeit = minuten + zeitgleichung + 4 * laenge - 60 * zeitzone
+    stundenwinkel = np.radians(wahre_ortszeit / 4 - 180)
+    phi = math.radians(breite)
+
+    sin_hoehe = math.sin(phi) * np.sin(deklination) + math.cos(phi) * np.cos(deklination) * np.cos(stundenwinkel)
+    hoehe = np.degrees(np.arcsin(np.clip(sin_hoehe, -1, 1)))
+    azimut = (np.degrees(np.arctan2(
+        np.sin(stundenwinkel), np.cos(stundenwinkel) * math.sin(phi) - np.tan(deklination) * math.cos(phi),
+    )) + 180) % 360
+    for array in (minuten, azimut, hoehe):
+        array.setflags(write=False)
+    return Sonnenstand(minuten, azimut, hoehe, schritt)
+
+
+def strahlung(hoehe):
+    """Direkte Normalstrahlung bei klarem Himmel (W/m²) für Sonnenhöhen in Grad; 0 unter dem Horizont."""
+    hoehe = np.asarray(hoehe, dtype=np.float64)
+    sin_hoehe = np.sin(np.radians(np.maximum(hoehe, 0.1)))
+    return np.where(hoehe > 0, SOLARKONSTANTE * TRANSMISSION ** ((1 / sin_hoehe) ** 0.678), 0.0)
+
+
+def einstrahlung(neigung, exposition, stand, horizont=0.0):
+    """
+    Einstrahlung (kWh/m²) im Zeitfenster von stand für Hänge mit neigung und exposition (Grad,
+    beliebige gleiche Form). horizont: Horizontwinkel in Grad, eine Zahl für alle Schritte oder
+    pro Zeitschritt ein Wert/Array in der Form der Hänge (z. B. aus horizonte()).
+    Vektorisiert über die Hänge; die Zeitschritte werden aufsummiert, damit der Speicher nur
+    von der Zahl der Hänge abhängt.
+    """
+    neigung = np.radians(np.asarray(neigung, dtype=np.float64))
+    exposition = np.radians(np.asarray(exposition, dtype=np.float64))
+    cos_neigung, sin_neigung = np.cos(neigung), np.sin(neigung)
+    normal = strahlung(stand.hoehe)
+    summe = np.zeros(np.broadcast(neigung, exposition).shape)
+    for t in np.flatnonzero(normal > 0):
+        hoehe, azimut = math.radians(stand.hoehe[t]), math.radians(stand.azimut[t])
+        einfall = cos_neigung * math.sin(hoehe) + sin_neigung * math.cos(hoehe) * np.cos(azimut - exposition)
+        sichtbar = stand.hoehe[t] > (horizont if np.isscalar(horizont) else horizont[t])
+        summe += normal[t] * (np.maximum(einfall, 0) * sichtbar + DIFFUS * math.sin(hoehe) * (1 + cos_neigung) / 2)
+    return summe * stand.schritt / 60 / 1000
+
+
+def sonnen_codes(energie):
+    """Code der Frage pro Wert: 1 ab STARK, 2 ab MAESSIG, sonst 3; 0 für NaN."""
+    energie = np.asarray(energie)
+    codes = np.full(energie.shape, 3, dtype=np.uint8)
+    codes[energie >= MAESSIG] = 2
+    codes[energie >= STARK] = 1
+    codes[np.isnan(energie)] = 0
+    return codes
+
+
+def antwort(code):
+    """Optionstext der Frage "Exposition/Sonneneinstrahlung" zu einem Code ("" für 0)."""
+    frage = next(frage for frage in KATALOG.tool1 if frage.frage == FRAGE)
+    return frage.texte[code]
+
+
+def horizont(hoehen, zellgroesse, azimut, rand):
+    """
+    Horizontwinkel (Grad, mindestens 0) in Richtung azimut für die inneren Zellen eines
+    Höhenausschnitts mit rand Zellen ringsum. Stützstellen bis rand Zellen Entfernung,
+    nahe dichter als fern; fehlende Höhen werden übersprungen.
+    """
+    zeilen, spalten = hoehen.shape[0] - 2 * rand, hoehen.shape[1] - 2 * rand
+    mitte = hoehen[rand:rand + zeilen, rand:rand + spalten]
+    winkel = np.zeros((zeilen, spalten))
+    richtung_z, richtung_s = -math.cos(math.radians(azimut)), math.sin(math.radians(azimut))
+    versaetze = {
+        (round(k * richtung_z), round(k * richtung_s))
+        for k in np.geomspace(1, rand, HORIZONT_PROBEN)
+    } - {(0, 0)}
+    for dz, ds in versaetze:
+        entfernt = hoehen[rand + dz:rand + dz + zeilen, rand + ds:rand + ds + spalten]
+        steigung = (entfernt - mitte) / (math.hypot(dz, ds) * zellgroesse)
+        np.fmax(winkel, steigung, out=winkel)
+    return np.degrees(np.arctan(winkel))
+
+
+def horizonte(hoehen, zellgroesse, stand, rand):
+    """Horizontwinkel pro Zeitschritt von stand (Liste von Arrays), je Sektor HORIZONT_SEKTOR nur einmal berechnet."""
+    sektoren = np.round(np.asarray(stand.azimut) / HORIZONT_SEKTOR).astype(int) * HORIZONT_SEKTOR % 360
+    berechnet = {}
+    for t, sektor in enumerate(sektoren):
+        if stand.hoehe[t] > 0 and sektor not in berechnet:
+            berechnet[sektor] = horizont(hoehen, zellgroesse, sektor, rand)
+    return [berechnet.get(sektor, 90.0) for sektor in sektoren]
+
+
+def codes_berechnen(quelle, ziel, stand, energie_ziel=None, schatten=True, kachel=KACHEL):
+    """
+    Schreibt das uint8-Raster der Sonnen-Codes (gleiche Georeferenz) und auf Wunsch die
+    Einstrahlung in kWh/m² als float32-Raster. Gibt die Anzahl der Zellen je Code 0..3 zurück.
+    """
+    hoehen, georeferenz = oeffnen(quelle)
+    rand = max(1, round(HORIZONT_M / georeferenz.zellgroesse)) if schatten else 1
+    codes = _raster_anlegen(ziel, georeferenz, np.uint8)
+    energie_raster = _raster_anlegen(energie_ziel, georeferenz, np.float32) if energie_ziel else None
+    anzahl = np.zeros(4, dtype=np.int64)
+    for teil in kacheln(*hoehen.shape, kachel):
+        z0, z1, s0, s1 = teil
+        ausschnitt = fenster(hoehen, teil, rand)
+        with np.errstate(invalid="ignore"):
+            neigung, exposition = neigung_exposition(
+                ausschnitt[rand - 1:ausschnitt.shape[0] - rand + 1, rand - 1:ausschnitt.shape[1] - rand + 1],
+                georeferenz.zellgroesse,
+            )
+            schatten_winkel = horizonte(ausschnitt, georeferenz.zellgroesse, stand, rand) if schatten else 0.0
+            energie = einstrahlung(neigung, exposition, stand, schatten_winkel)
+            block = sonnen_codes(energie)
+        codes[z0:z1, s0:s1] = block
+        if energie_raster is not None:
+            energie_raster[z0:z1, s0:s1] = energie
+        anzahl += np.bincount(block.ravel(), minlength=4)
+    codes.flush()
+    if energie_raster is not None:
+        energie_raster.flush()
+    return anzahl
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lawinen.sonne", description="Sonneneinstrahlung pro Hang oder Rasterzelle")
+    zeitraum = argparse.ArgumentParser(add_help=False)
+    zeitraum.add_argument("--datum", type=datetime.date.fromisoformat, default=datetime.date.today(), help="JJJJ-MM-TT, Standard: heute")
+    zeitraum.add_argument("--von", type=int, default=VON, help="Stunde Ortszeit")
+    zeitraum.add_argument("--bis", type=int, default=BIS)
+    zeitraum.add_argument("--breite", type=float, default=BREITE)
+    zeitraum.add_argument("--laenge", type=float, default=LAENGE)
+    zeitraum.add_argument("--zeitzone", type=int, default=ZEITZONE, help="Stunden gegenüber UTC (Sommerzeit: 2)")
+    unter = parser.add_subparsers(dest="befehl", required=True)
+    hang = unter.add_parser("hang", parents=[zeitraum], help="Einstrahlung für einen Hang")
+    hang.add_argument("neigung", type=float, help="Grad")
+    hang.add_argument("exposition", type=float, help="Grad im Uhrzeigersinn ab Nord")
+    hang.add_argument("--horizont", type=float, default=0.0, help="Horizontwinkel ringsum in Grad")
+    codes = unter.add_parser("codes", parents=[zeitraum], help="Sonnen-Codes für jedes Feld berechnen")
+    codes.add_argument("hoehen")
+    codes.add_argument("ziel")
+    codes.add_argument("--energie", help="zusätzlich Einstrahlung in kWh/m² als Raster")
+    codes.add_argument("--ohne-schatten", action="store_true", help="Geländeabschattung nicht berechnen")
+    codes.add_argument("--kachel", type=int, default=KACHEL)
+    abfrage = unter.add_parser("abfrage", help="Antwort an einem Punkt ausgeben")
+    abfrage.add_argument("codes")
+    abfrage.add_argument("x", type=float)
+    abfrage.add_argument("y", type=float)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        if args.befehl == "abfrage":
+            raster, georeferenz = oeffnen(args.codes)
+            zeile, spalte = georeferenz.zelle(args.x, args.y)
+            print(f"{FRAGE}: {antwort(int(raster[zeile, spalte])) or 'nicht bestimmbar'}")
+            return
+        if args.von >= args.bis:
+            raise ValueError("--von muss vor --bis liegen")
+        stand = sonnenstand(args.datum, args.breite, args.laenge, args.von, args.bis, SCHRITT, args.zeitzone)
+        if args.befehl == "hang":
+            energie = float(einstrahlung(args.neigung, args.exposition, stand, args.horizont))
+            print(f"{energie:.2f} kWh/m² von {args.von} bis {args.bis} Uhr: {antwort(int(sonnen_codes(energie)))}")
+            return
+        anzahl = codes_berechnen(args.hoehen, args.ziel, stand, args.energie, not args.ohne_schatten, args.kachel)
+        for code, n in enumerate(anzahl):
+            print(f"{n:12d}  {antwort(code) or 'nicht bestimmbar'}")
+    except (OSError, ValueError, KeyError) as e:
+        parser.exit(1, f"Fehler: {e}\n")
+    print(f"Dauer {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
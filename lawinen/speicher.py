@@ -0,0 +1,240 @@
+"""
+Dauerhafte Ablage der Bewertungen in SQLite (WAL-Modus).
+
+speichern() legt eine Bewertung nur in eine Warteschlange; ein Hintergrund-Thread schreibt
+alles Angefallene gesammelt mit executemany. Ein Rerun wartet damit nie auf die Platte.
+Eine Bewertung mit derselben id ersetzt die vorherige Fassung (z. B. wenn nach dem Absenden
+noch die finale Verhaltensempfehlung oder das Ergebnis von Tool 2 hinzukommt). Jedes Schreiben
+vergibt eine neue, fortlaufende Änderungsnummer (Spalte aenderung), damit Exporte wie
+lawinen.archiv auch nachträglich ergänzte Bewertungen finden.
+"""
+import atexit
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import uuid
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+SPEICHER_PFAD = Path(__file__).resolve().parent.parent / "bewertungen.sqlite3"
+MAX_STAPEL = 500
+
+logger = logging.getLogger(__name__)
+
+
+class Bewertung(NamedTuple):
+    """Eine gespeicherte Bewertung. Felder von Tool 2 bleiben None, solange es nicht ausgefüllt ist."""
+    id: str
+    zeitpunkt: str                     # ISO 8601 in UTC
+    seite: str                         # z. B. "selbst14" oder "kombi2"
+    hang: str
+    katalog_version: int
+    antworten_tool1: dict              # Frage -> gewählte Option ("" = nicht beantwortet)
+    ns: int                            # Setzungseingaben (Neuschnee cm, Temperatur °C, Stunden)
+    temp: int
+    stunden: int
+    setzung: str                       # Beschreibung der berechneten Setzung
+    eigene_einschaetzung: float
+    gefahrenindex: float               # None, wenn die Bewertung nicht gültig ist
+    kategorie_tool1: str
+    antworten_tool2: list = None       # Optionstexte der Fragen 1-7
+    mw_ung: float = None
+    mw_gew: float = None
+    empfehlung: str = None             # finale Verhaltensempfehlung
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bewertungen (
+    id TEXT PRIMARY KEY,
+    zeitpunkt TEXT NOT NULL,
+    seite TEXT,
+    hang TEXT,
+    katalog_version INTEGER,
+    antworten_tool1 TEXT,
+    ns INTEGER,
+    temp INTEGER,
+    stunden INTEGER,
+    setzung TEXT,
+    eigene_einschaetzung REAL,
+    gefahrenindex REAL,
+    kategorie_tool1 TEXT,
+    antworten_tool2 TEXT,
+    mw_ung REAL,
+    mw_gew REAL,
+    empfehlung TEXT,
+    aenderung INTEGER
+);
+CREATE INDEX IF NOT EXISTS bewertungen_zeitpunkt ON bewertungen (zeitpunkt);
+CREATE INDEX IF NOT EXISTS bewertungen_hang ON bewertungen (hang, zeitpunkt);
+"""
+# Ablagen aus der Zeit vor der Änderungsnummer
+_NACHRUESTEN = "ALTER TABLE bewertungen ADD COLUMN aenderung INTEGER"
+_INDEX_AENDERUNG = "CREATE INDEX IF NOT EXISTS bewertungen_aenderung ON bewertungen (aenderung)"
+
+_SPALTEN = ", ".join(Bewertung._fields)
+# Die Änderungsnummer vergibt SQLite; Schreiber sind serialisiert, auch über Prozesse hinweg
+_EINFUEGEN = (
+    f"INSERT OR REPLACE INTO bewertungen ({_SPALTEN}, aenderung) VALUES ({', '.join('?' * len(Bewertung._fields))}, "
+    "(SELECT COALESCE(MAX(aenderung), 0) + 1 FROM bewertungen))"
+)
+_JSON_FELDER = ("antworten_tool1", "antworten_tool2")
+_ENDE = object()
+
+
+def neue_bewertung(**felder):
+    """Bewertung mit neuer id und aktuellem Zeitpunkt."""
+    return Bewertung(id=uuid.uuid4().hex, zeitpunkt=datetime.now(timezone.utc).isoformat(timespec="seconds"), **felder)
+
+
+def _zeile(bewertung):
+    return tuple(
+        json.dumps(wert, ensure_ascii=False) if feld in _JSON_FELDER and wert is not None else wert
+        for feld, wert in zip(Bewertung._fields, bewertung)
+    )
+
+
+def _bewertung(zeile):
+    return Bewertung(*(
+        json.loads(wert) if feld in _JSON_FELDER and wert is not None else wert
+        for feld, wert in zip(Bewertung._fields, zeile)
+    ))
+
+
+class Bewertungsspeicher:
+    """Bewertungsablage mit eigenem Schreib-Thread; eine Instanz pro Prozess und Datei."""
+
+    def __init__(self, pfad=SPEICHER_PFAD, max_stapel=MAX_STAPEL):
+        self.pfad = str(pfad)
+        self.max_stapel = max_stapel
+        with closing(self._verbinden()) as db:
+            db.executescript(SCHEMA)
+            if "aenderung" not in {spalte[1] for spalte in db.execute("PRAGMA table_info(bewertungen)")}:
+                db.execute(_NACHRUESTEN)
+            db.execute(_INDEX_AENDERUNG)
+        self._warteschlange = queue.Queue()
+        self._thread = threading.Thread(target=self._schreiben, name="bewertungsspeicher", daemon=True)
+        self._thread.start()
+        atexit.register(self.schliessen)
+
+    def _verbinden(self):
+        db = sqlite3.connect(self.pfad, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def speichern(self, bewertung):
+        """Reiht die Bewertung zum Schreiben ein und kehrt sofort zurück."""
+        self._warteschlange.put(bewertung)
+
+    def _schreiben(self):
+        db = None
+        ende = False
+        while not ende:
+            # Blockierend auf den ersten Eintrag warten, dann alles Angefallene mitnehmen
+            stapel = [self._warteschlange.get()]
+            while len(stapel) < self.max_stapel:
+                try:
+                    stapel.append(self._warteschlange.get_nowait())
+                except queue.Empty:
+                    break
+            ende = any(eintrag is _ENDE for eintrag in stapel)
+            # Der Thread darf an keinem Fehler sterben, sonst hängen warten() und schliessen() für immer
+            try:
+                if db is None:
+                    db = self._verbinden()
+                self._stapel_schreiben(db, [eintrag for eintrag in stapel if eintrag is not _ENDE])
+            except Exception:
+                logger.exception("%d Bewertungen konnten nicht nach %s geschrieben werden", len(stapel), self.pfad)
+            finally:
+                for _ in stapel:
+                    self._warteschlange.task_done()
+        if db is not None:
+            db.close()
+
+    def _stapel_schreiben(self, db, eintraege):
+        zeilen = []
+        for eintrag in eintraege:
+            try:
+                zeilen.append(_zeile(eintrag))
+            except Exception:
+                logger.exception("Bewertung %s nicht speicherbar, verworfen", getattr(eintrag, "id", "?"))
+        try:
+            with db:
+                db.executemany(_EINFUEGEN, zeilen)
+            return
+        except sqlite3.Error:
+            if len(zeilen) <= 1:
+                raise
+        # Einzeln wiederholen, damit eine fehlerhafte Zeile nicht den ganzen Stapel verwirft
+        fehler = 0
+        for zeile in zeilen:
+            try:
+                with db:
+                    db.execute(_EINFUEGEN, zeile)
+            except sqlite3.Error:
+                fehler += 1
+        if fehler:
+            logger.error("%d von %d Bewertungen konnten nicht nach %s geschrieben werden", fehler, len(zeilen), self.pfad)
+
+    def warten(self):
+        """Blockiert, bis alle eingereihten Bewertungen geschrieben sind."""
+        self._warteschlange.join()
+
+    def schliessen(self):
+        """Schreibt den Rest und beendet den Schreib-Thread."""
+        if self._thread.is_alive():
+            self._warteschlange.put(_ENDE)
+            self._thread.join()
+
+    def abfragen(self, von=None, bis=None, hang=None, limit=None):
+        """
+        Gespeicherte Bewertungen, neueste zuerst.
+
+        von, bis: ISO-Zeitpunkte oder Daten ("2025-01-31"), bis ist exklusiv
+        hang: genauer Name des Hangs
+        """
+        bedingungen, parameter = [], []
+        if hang is not None:
+            bedingungen.append("hang = ?")
+            parameter.append(hang)
+        if von is not None:
+            bedingungen.append("zeitpunkt >= ?")
+            parameter.append(von)
+        if bis is not None:
+            bedingungen.append("zeitpunkt < ?")
+            parameter.append(bis)
+        sql = f"SELECT {_SPALTEN} FROM bewertungen"
+        if bedingungen:
+            sql += " WHERE " + " AND ".join(bedingungen)
+        sql += " ORDER BY zeitpunkt DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameter.append(limit)
+        with closing(self._verbinden()) as db:
+            return [_bewertung(zeile) for zeile in db.execute(sql, parameter)]
+
+    def aenderungen(self, seit=None, von=None, bis=None):
+        """
+        Nach der Änderungsnummer seit geschriebene Bewertungen (None: alle) als (aenderung, Bewertung),
+        älteste Änderung zuerst; ältere Zeilen ohne Nummer zählen als 0. von, bis wie bei abfragen.
+        """
+        bedingungen, parameter = [], []
+        if seit is not None:
+            bedingungen.append("COALESCE(aenderung, 0) > ?")
+            parameter.append(seit)
+        if von is not None:
+            bedingungen.append("zeitpunkt >= ?")
+            parameter.append(von)
+        if bis is not None:
+            bedingungen.append("zeitpunkt < ?")
+            parameter.append(bis)
+        sql = f"SELECT COALESCE(aenderung, 0), {_SPALTEN} FROM bewertungen"
+        if bedingungen:
+            sql += " WHERE " + " AND ".join(bedingungen)
+        sql += " ORDER BY COALESCE(aenderung, 0), zeitpunkt"
+        with closing(self._verbinden()) as db:
+            return [(zeile[0], _bewertung(zeile[1:])) for zeile in db.execute(sql, parameter)]
@@ -0,0 +1,265 @@
+"""
+Stapelbewertung von Exportdateien (CSV oder JSONL, eine Bewertung pro Zeile).
+
+Die Datei wird in Blöcken von --block Zeilen gelesen, jeder Block mit der
+NumPy-Stapelbewertung (Tool 1, Tool 2, Gesamtrisiko wie in streamlit_kombi2.py)
+bewertet und sofort an die Ausgabe angehängt. Der Speicherbedarf hängt damit nur
+von der Blockgröße ab, nicht von der Dateigröße.
+
+Eingabespalten (fehlende Spalten gelten als nicht beantwortet):
+    tool1_1 .. tool1_9    Antworten der Tool-1-Fragen
+    setzung               Setzungsergebnis, oder stattdessen ns, temp, stunden
+    tool2_1 .. tool2_7    Antworten der Tool-2-Fragen
+Statt tool1_k / tool2_k darf auch der Fragetext als Spaltenname stehen. Eine Antwort ist
+leer, ein Code (0 = nicht beantwortet, 1..n = Position der Option) oder der Optionstext.
+Alle anderen Spalten (z. B. id, datum, hang) werden unverändert durchgereicht; vorhandene
+Ergebnisspalten werden überschrieben. Bei JSONL-Eingabe und CSV-Ausgabe bestimmt der erste
+Block die Spalten, Felder, die erst später auftauchen, fehlen in der CSV.
+
+Aufruf:
+    python -m lawinen.stapel export.csv bewertet.csv
+    python -m lawinen.stapel export.jsonl - --block 50000 > bewertet.jsonl
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+import numpy as np
+
+from .batch import SPALTEN_TOOL1, bewerte_tool1_batch, bewerte_tool2_batch, gesamtrisiko_batch
+from .gesamt import GESAMT_STUFEN
+from .katalog import KATALOG
+from .setzung import SETZUNG_OPTIONEN, setzung_codes
+from .tool1 import KATEGORIEN
+from .tool2 import FEHLER_KEINER, KATEGORIEN_TOOL2
+
+BLOCK = 10_000
+
+SPALTEN_EINGABE_TOOL1 = [f"tool1_{i}" for i in range(1, len(KATALOG.tool1) + 1)]
+SPALTEN_EINGABE_TOOL2 = [f"tool2_{i}" for i in range(1, len(KATALOG.tool2) + 1)]
+SPALTEN_ERGEBNIS = [
+    "setzung_code",
+    "gefahrenindex",
+    "kategorie_tool1",
+    "fehler_tool2",
+    "mw_ung",
+    "mw_gew",
+    "kategorie_tool2",
+    "gesamtrisiko",
+]
+
+
+def _nachschlagen(texte_zu_codes):
+    """Zuordnung Eingabewert -> Code einer Spalte: Optionstexte, Codes als Text und als Zahl."""
+    zuordnung = dict(texte_zu_codes)
+    for code in set(zuordnung.values()):
+        zuordnung[str(code)] = code
+        zuordnung[code] = code
+    zuordnung[None] = 0
+    return zuordnung
+
+
+# Pro Spalte der Codematrix: mögliche Spaltennamen in der Eingabe und die Zuordnung Wert -> Code
+_TOOL1 = [
+    ((kurz, frage.frage), _nachschlagen(frage.codes))
+    for kurz, frage in zip(SPALTEN_EINGABE_TOOL1, KATALOG.tool1)
+] + [(("setzung", "Setzung"), _nachschlagen({text: code for code, text in enumerate(SETZUNG_OPTIONEN)}))]
+_TOOL2 = [
+    ((kurz, frage.frage), _nachschlagen(frage.codes))
+    for kurz, frage in zip(SPALTEN_EINGABE_TOOL2, KATALOG.tool2)
+]
+
+
+def _zahl(wert, zeile, name):
+    if wert is None or wert == "":
+        return 0.0
+    try:
+        return float(wert)
+    except (TypeError, ValueError, OverflowError):  # Text, Liste oder zu große Zahl
+        raise ValueError(f"Zeile {zeile}: keine Zahl {wert!r} in Spalte {name!r}") from None
+
+
+def _spalte_kodieren(zeilen, namen, vorhanden, zuordnung, erste_zeile):
+    """Codes einer Spalte für alle Zeilen des Blocks; der Spaltenname wird einmal pro Block bestimmt."""
+    name = next((name for name in namen if name in vorhanden), None)
+    if name is None:
+        return 0
+    codes = []
+    for i, zeile in enumerate(zeilen):
+        wert = zeile.get(name)
+        try:
+            code = zuordnung.get(wert)
+        except TypeError:  # z. B. Liste in JSONL
+            code = None
+        if code is None:
+            code = zuordnung.get(wert.strip()) if isinstance(wert, str) else None
+            if code is None:
+                raise ValueError(f"Zeile {erste_zeile + i}: unbekannte Antwort {wert!r} in Spalte {name!r}")
+        codes.append(code)
+    return codes
+
+
+def kodiere_block(zeilen, erste_zeile=1):
+    """
+    Wandelt einen Block Eingabezeilen (dicts) in die Codematrizen von Tool 1 (n x 10) und Tool 2 (n x 7).
+    Unbekannte Antworten und ungültige Zahlen lösen einen ValueError mit Zeilennummer und Spalte aus.
+    """
+    vorhanden = set().union(*zeilen)
+    tool1 = np.zeros((len(zeilen), len(SPALTEN_TOOL1)), dtype=np.uint8)
+    tool2 = np.zeros((len(zeilen), len(_TOOL2)), dtype=np.uint8)
+    for matrix, spalten in ((tool1, _TOOL1), (tool2, _TOOL2)):
+        for spalte, (namen, zuordnung) in enumerate(spalten):
+            matrix[:, spalte] = _spalte_kodieren(zeilen, namen, vorhanden, zuordnung, erste_zeile)
+
+    # Setzung aus Neuschnee, Temperatur und Stunden, wo kein Ergebnis angegeben ist
+    if "stunden" in vorhanden:
+        ns, temp, stunden = (
+            np.array([_zahl(zeile.get(name), erste_zeile + i, name) for i, zeile in enumerate(zeilen)])
+            for name in ("ns", "temp", "stunden")
+        )
+        ohne_setzung = tool1[:, -1] == 0
+        tool1[ohne_setzung, -1] = setzung_codes(ns[ohne_setzung], temp[ohne_setzung], stunden[ohne_setzung])
+    return tool1, tool2
+
+
+def bewerte_block(zeilen, erste_zeile=1):
+    """Bewertet einen Block Eingabezeilen; gibt die Ergebnisspalten als dict von Arrays zurück."""
+    tool1, tool2 = kodiere_block(zeilen, erste_zeile)
+    ergebnis1 = bewerte_tool1_batch(tool1)
+    ergebnis2 = bewerte_tool2_batch(tool2)
+    return {
+        "setzung_code": tool1[:, -1],
+        "gefahrenindex": ergebnis1.gefahrenindex,
+        "kategorie_tool1": ergebnis1.kategorie,
+        "fehler_tool2": ergebnis2.fehler,
+        "mw_ung": ergebnis2.mw_ung,
+        "mw_gew": ergebnis2.mw_gew,
+        "kategorie_tool2": ergebnis2.kategorie_gew,
+        "gesamtrisiko": gesamtrisiko_batch(ergebnis1.kategorie, ergebnis2.kategorie_gew),
+    }
+
+
+def ergebnis_werte(ergebnis):
+    """Ergebnisspalten eines Blocks als Listen lesbarer Werte (None bei ungültigen Werten)."""
+    fehler = ergebnis["fehler_tool2"] != FEHLER_KEINER
+    return {
+        "setzung_code": ergebnis["setzung_code"].tolist(),
+        "gefahrenindex": np.round(ergebnis["gefahrenindex"], 4).tolist(),
+        "kategorie_tool1": [KATEGORIEN[k] for k in ergebnis["kategorie_tool1"].tolist()],
+        "fehler_tool2": ergebnis["fehler_tool2"].tolist(),
+        "mw_ung": [None if f else w for f, w in zip(fehler.tolist(), np.round(ergebnis["mw_ung"], 4).tolist())],
+        "mw_gew": [None if f else w for f, w in zip(fehler.tolist(), np.round(ergebnis["mw_gew"], 4).tolist())],
+        "kategorie_tool2": [KATEGORIEN_TOOL2[k] for k in ergebnis["kategorie_tool2"].tolist()],
+        "gesamtrisiko": [GESAMT_STUFEN[k] for k in ergebnis["gesamtrisiko"].tolist()],
+    }
+
+
+def bloecke(zeilen, groesse=BLOCK):
+    """Teilt einen Iterator in Listen von höchstens groesse Einträgen."""
+    zeilen = iter(zeilen)
+    while block := list(islice(zeilen, groesse)):
+        yield block
+
+
+def _lese_jsonl(datei):
+    for nummer, text in enumerate(datei, start=1):
+        if text.strip():
+            try:
+                zeile = json.loads(text)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Zeile {nummer}: kein gültiges JSON ({e.msg})") from None
+            if not isinstance(zeile, dict):
+                raise ValueError(f"Zeile {nummer}: JSON-Objekt erwartet")
+            yield zeile
+
+
+class _CsvAusgabe:
+    def __init__(self, datei, eingabe_spalten):
+        # Bereits bewertete Dateien: alte Ergebnisspalten werden ersetzt, nicht verdoppelt
+        self._spalten = [name for name in eingabe_spalten if name not in SPALTEN_ERGEBNIS] + SPALTEN_ERGEBNIS
+        self._schreiber = csv.writer(datei)
+        self._schreiber.writerow(self._spalten)
+
+    def schreiben(self, zeile):
+        self._schreiber.writerow([zeile.get(name) for name in self._spalten])
+
+
+class _JsonlAusgabe:
+    def __init__(self, datei, eingabe_spalten):
+        self._datei = datei
+
+    def schreiben(self, zeile):
+        self._datei.write(json.dumps(zeile, ensure_ascii=False) + "\n")
+
+
+def _format(pfad, angabe):
+    if angabe:
+        return angabe
+    return "jsonl" if str(pfad).endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def _oeffnen(pfad, modus):
+    if pfad == "-":
+        return sys.stdin if modus == "r" else sys.stdout
+    return open(pfad, modus, encoding="utf-8", newline="")
+
+
+def bewerte_datei(eingabe, ausgabe, block=BLOCK, eingabe_format=None, ausgabe_format=None):
+    """
+    Bewertet eine Exportdatei blockweise und schreibt jede Zeile mit angehängten Ergebnisspalten.
+    Gibt die Anzahl der bewerteten Zeilen zurück.
+    """
+    eingabe_format = _format(eingabe, eingabe_format)
+    ausgabe_format = _format(ausgabe, ausgabe_format or (eingabe_format if ausgabe == "-" else None))
+    anzahl = 0
+    ein = _oeffnen(eingabe, "r")
+    aus = _oeffnen(ausgabe, "w")
+    try:
+        if eingabe_format == "csv":
+            leser = csv.DictReader(ein)
+            zeilen, spalten = leser, leser.fieldnames or []
+        else:
+            zeilen, spalten = _lese_jsonl(ein), []
+        schreiber = None
+        for zeilen_block in bloecke(zeilen, block):
+            werte = ergebnis_werte(bewerte_block(zeilen_block, erste_zeile=anzahl + 1))
+            if schreiber is None:
+                # JSONL hat keinen Kopf: die Spalten der CSV-Ausgabe kommen aus allen Zeilen des ersten Blocks
+                spalten = spalten or list(dict.fromkeys(name for zeile in zeilen_block for name in zeile))
+                schreiber = (_CsvAusgabe if ausgabe_format == "csv" else _JsonlAusgabe)(aus, spalten)
+            for i, zeile in enumerate(zeilen_block):
+                zeile.update((name, spalte[i]) for name, spalte in werte.items())
+                schreiber.schreiben(zeile)
+            aus.flush()
+            anzahl += len(zeilen_block)
+    finally:
+        if ein is not sys.stdin:
+            ein.close()
+        if aus is not sys.stdout:
+            aus.close()
+    return anzahl
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lawinen.stapel", description="Exportdateien blockweise bewerten")
+    parser.add_argument("eingabe", help="CSV- oder JSONL-Datei, - für stdin")
+    parser.add_argument("ausgabe", help="Zieldatei, - für stdout")
+    parser.add_argument("--block", type=int, default=BLOCK, help=f"Zeilen pro Block (Standard: {BLOCK})")
+    parser.add_argument("--eingabe-format", choices=["csv", "jsonl"], help="Standard: nach Dateiendung")
+    parser.add_argument("--ausgabe-format", choices=["csv", "jsonl"], help="Standard: nach Dateiendung")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        anzahl = bewerte_datei(args.eingabe, args.ausgabe, args.block, args.eingabe_format, args.ausgabe_format)
+    except ValueError as e:
+        parser.exit(1, f"Fehler: {e}\n")
+    dauer = time.perf_counter() - start
+    print(f"{anzahl} Bewertungen in {dauer:.2f} s ({anzahl / dauer if dauer else 0:,.0f} Zeilen/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
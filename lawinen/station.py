@@ -0,0 +1,331 @@
+"""
+Automatische Wetterstationen: Tool-1-Antworten aus Messreihen vorbelegen.
+
+Neuschneemenge (24h), Regenmenge, Erwärmung und Wind/Verfrachtung lassen sich aus
+Stationsdaten ableiten. Gelesen werden SMET-Dateien (SMET 1.1 ASCII, Einheiten SI: K, m, m/s)
+und CSV-Dateien (°C, cm, km/h, mm). Die Dateien werden blockweise verarbeitet; für die
+gleitenden Fenster wird nur das Ende des vorherigen Blocks mitgeführt.
+
+Gleitende Werte pro Messzeitpunkt (vektorisiert über numpy-Fenster):
+- Neuschnee: Zuwachs der Schneehöhe gegenüber dem Minimum der letzten 24 h (cm)
+- Regen: Niederschlagssumme der letzten 24 h in Stunden mit Lufttemperatur >= REGEN_AB_TEMP (mm)
+- Erwärmung: Mittel der Lufttemperatur der letzten 24 h minus Mittel der 24 h davor (°C)
+- Wind: höchstes Stundenmittel der Windgeschwindigkeit der letzten 24 h (km/h)
+
+Aufruf:
+    python -m lawinen.station station.smet
+    python -m lawinen.station station.csv --zeitpunkt 2025-01-14T08:00
+"""
+import argparse
+import csv
+import math
+import sys
+from itertools import chain, islice
+from typing import NamedTuple
+
+import numpy as np
+
+from .katalog import KATALOG
+
+BLOCK = 10_000
+FENSTER_STUNDEN = 24
+MIN_ABDECKUNG = 0.8    # Anteil gültiger Messungen, den ein Fenster mindestens braucht
+REGEN_AB_TEMP = 1.0    # °C; darüber zählt Niederschlag als Regen
+NODATA = -999
+
+# Grenzen der Optionen (Code 1, 2, 3 in der Reihenfolge des Katalogs)
+NEUSCHNEE_GRENZEN = (40, 20)    # cm: > 40, 20-40, < 20
+REGEN_GRENZEN = (5, 0)          # mm: > 5, > 0, kein Regen
+ERWAERMUNG_GRENZEN = (4, 0)     # °C: > 4, > 0 (bis 4), keine
+WIND_GRENZEN = (40, 15)         # km/h: > 40, > 15 (mäßig), kein/wenig
+
+# Fragen, die aus Stationsdaten vorbelegt werden: Messgröße -> Frage im Katalog
+FRAGEN = {
+    "neuschnee": "Neuschneemenge (24h)",
+    "regen": "Regenmenge",
+    "erwaermung": "Erwärmung",
+    "wind": "Wind/Verfrachtung",
+}
+
+# Spaltennamen in CSV-Dateien (klein geschrieben) und SMET-Feldern -> Messgröße
+SPALTEN = {
+    "zeit": ("timestamp", "zeit", "datum", "time"),
+    "ta": ("ta", "temp", "temperatur", "lufttemperatur"),
+    "hs": ("hs", "schneehoehe", "schneehöhe"),
+    "psum": ("psum", "niederschlag", "precip"),
+    "vw": ("vw", "wind", "windgeschwindigkeit"),
+}
+# Umrechnung der SMET-Einheiten (SI) in die Einheiten der Optionen
+SMET_UMRECHNUNG = {"ta": (1, -273.15), "hs": (100, 0), "psum": (1, 0), "vw": (3.6, 0)}
+
+
+class Messblock(NamedTuple):
+    """Ein Block Messungen einer Station; fehlende Größen sind ganz NaN."""
+    zeit: np.ndarray    # datetime64[m]
+    ta: np.ndarray      # °C
+    hs: np.ndarray      # cm
+    psum: np.ndarray    # mm pro Messintervall
+    vw: np.ndarray      # km/h
+
+
+class Stationswerte(NamedTuple):
+    """Gleitende Werte und Antwortcodes (0 = nicht bestimmbar) pro Messzeitpunkt."""
+    zeit: np.ndarray
+    neuschnee: np.ndarray
+    regen: np.ndarray
+    erwaermung: np.ndarray
+    wind: np.ndarray
+    codes: np.ndarray   # uint8 (n x 4) in der Reihenfolge von FRAGEN
+
+
+def _zahlen(werte, nodata=NODATA):
+    """Texte -> float64; leere Werte, nodata und Unlesbares werden NaN."""
+    zahlen = np.full(len(werte), np.nan)
+    for i, wert in enumerate(werte):
+        try:
+            zahl = float(wert.replace(",", "."))
+        except (AttributeError, ValueError):
+            continue
+        if zahl != nodata:
+            zahlen[i] = zahl
+    return zahlen
+
+
+def _block(zeilen, spalten, umrechnung=None, nodata=NODATA):
+    """Baut einen Messblock aus Zeilen (Listen von Texten); spalten: Messgröße -> Spaltenindex."""
+    umrechnung = umrechnung or {}
+    if "zeit" not in spalten:
+        raise ValueError("Keine Zeitspalte gefunden")
+    zeit = np.array([zeile[spalten["zeit"]].strip().replace(" ", "T") for zeile in zeilen], dtype="datetime64[m]")
+    werte = {}
+    for name in ("ta", "hs", "psum", "vw"):
+        if name in spalten:
+            faktor, versatz = umrechnung.get(name, (1, 0))
+            werte[name] = _zahlen([zeile[spalten[name]] if spalten[name] < len(zeile) else "" for zeile in zeilen], nodata) * faktor + versatz
+        else:
+            werte[name] = np.full(len(zeilen), np.nan)
+    return Messblock(zeit, **werte)
+
+
+def _spalten_finden(namen):
+    kleine = [name.strip().lower() for name in namen]
+    return {
+        groesse: kleine.index(name)
+        for groesse, moegliche in SPALTEN.items()
+        for name in moegliche if name in kleine
+    }
+
+
+def lese_smet(zeilen, block=BLOCK):
+    """Liest eine SMET-Datei (Iterator über Textzeilen) blockweise; Iterator über Messblöcke."""
+    zeilen = iter(zeilen)
+    if not next(zeilen, "").startswith("SMET"):
+        raise ValueError("Keine SMET-Datei (erste Zeile muss mit SMET beginnen)")
+    kopf = {}
+    for zeile in zeilen:
+        zeile = zeile.strip()
+        if zeile.upper() == "[DATA]":
+            break
+        if "=" in zeile:
+            name, _, wert = zeile.partition("=")
+            kopf[name.strip().lower()] = wert.split()
+    felder = [name.lower() for name in kopf.get("fields", [])]
+    nodata = float(kopf.get("nodata", [NODATA])[0])
+    spalten = {groesse: felder.index(groesse) for groesse in ("ta", "hs", "psum", "vw") if groesse in felder}
+    if "timestamp" in felder:
+        spalten["zeit"] = felder.index("timestamp")
+
+    # Eigene Multiplikatoren/Versätze der Datei zuerst anwenden (SMET: Wert * mult + offset = SI)
+    mult = [float(x) for x in kopf.get("units_multiplier", [])]
+    offset = [float(x) for x in kopf.get("units_offset", [])]
+    umrechnung = {}
+    for groesse, (faktor, versatz) in SMET_UMRECHNUNG.items():
+        index = spalten.get(groesse)
+        m = mult[index] if index is not None and index < len(mult) else 1
+        o = offset[index] if index is not None and index < len(offset) else 0
+        umrechnung[groesse] = (m * faktor, o * faktor + versatz)
+
+    daten = (text.split() for text in zeilen if text.strip())
+    while teil := list(islice(daten, block)):
+        yield _block(teil, spalten, umrechnung, nodata)
+
+
+def lese_csv(zeilen, block=BLOCK):
+    """Liest eine Stations-CSV (Iterator über Textzeilen) blockweise; Komma, Semikolon oder Tab, Dezimalkomma erlaubt."""
+    zeilen = iter(zeilen)
+    kopf = next(zeilen, "")
+    try:
+        dialekt = csv.Sniffer().sniff(kopf, delimiters=",;\t")
+    except csv.Error:
+        dialekt = csv.excel
+    leser = csv.reader(chain([kopf], zeilen), dialect=dialekt)
+    spalten = _spalten_finden(next(leser, []))
+    daten = (zeile for zeile in leser if zeile)
+    while teil := list(islice(daten, block)):
+        yield _block(teil, spalten)
+
+
+def lese_datei(zeilen, block=BLOCK):
+    """Messblöcke aus einer SMET- oder CSV-Datei (Erkennung an der ersten Zeile)."""
+    zeilen = iter(zeilen)
+    erste = next(zeilen, "")
+    zeilen = chain([erste], zeilen)
+    return lese_smet(zeilen, block) if erste.startswith("SMET") else lese_csv(zeilen, block)
+
+
+# --- Gleitende Fenster ---
+
+def _summe(werte, fenster, mindestens):
+    """Gleitende Summe über die letzten fenster Werte (NaN zählt 0); NaN bei zu wenig gültigen Werten."""
+    gueltig = ~np.isnan(werte)
+    kumuliert = np.concatenate([[0], np.cumsum(np.where(gueltig, werte, 0))])
+    anzahl = np.concatenate([[0], np.cumsum(gueltig)])
+    ende = np.arange(1, len(werte) + 1)
+    anfang = np.maximum(ende - fenster, 0)
+    summe = kumuliert[ende] - kumuliert[anfang]
+    return np.where(anzahl[ende] - anzahl[anfang] >= mindestens, summe, np.nan), anzahl[ende] - anzahl[anfang]
+
+
+def _extrem(werte, fenster, mindestens, funktion):
+    """Gleitendes Minimum/Maximum (np.fmin / np.fmax) über die letzten fenster Werte."""
+    if not len(werte):
+        return werte.copy()
+    vorne = np.concatenate([np.full(fenster - 1, np.nan), werte])
+    ansicht = np.lib.stride_tricks.sliding_window_view(vorne, fenster)
+    with np.errstate(invalid="ignore"):
+        extrem = funktion.reduce(ansicht, axis=1)
+    anzahl = (~np.isnan(ansicht)).sum(axis=1)
+    return np.where(anzahl >= mindestens, extrem, np.nan)
+
+
+def _schritt_stunden(zeit):
+    """Messintervall in Stunden (Median der Abstände)."""
+    if len(zeit) < 2:
+        return 1.0
+    return float(np.median(np.diff(zeit).astype("timedelta64[m]").astype(np.float64))) / 60
+
+
+def _codes(werte, grenzen, untere_einschliesslich=False):
+    """Code 1 über der oberen Grenze, 2 über der unteren (bzw. ab ihr), sonst 3; NaN -> 0."""
+    obere, untere = grenzen
+    ueber_untere = werte >= untere if untere_einschliesslich else werte > untere
+    codes = np.where(werte > obere, 1, np.where(ueber_untere, 2, 3)).astype(np.uint8)
+    codes[np.isnan(werte)] = 0
+    return codes
+
+
+def gleitende_werte(block, schritt=None):
+    """
+    Gleitende Werte und Antwortcodes für einen Messblock. Die ersten Zeitpunkte haben zu kurze
+    Fenster und bleiben NaN (Code 0), siehe auswerten() für blockübergreifende Fenster.
+    schritt: Messintervall in Stunden (Standard: aus den Zeitstempeln).
+    """
+    schritt = schritt or _schritt_stunden(block.zeit)
+    fenster = max(1, round(FENSTER_STUNDEN / schritt))
+    mindestens = math.ceil(fenster * MIN_ABDECKUNG)
+
+    neuschnee = block.hs - _extrem(block.hs, fenster, mindestens, np.fmin)
+
+    regen_anteil = np.where(block.ta >= REGEN_AB_TEMP, block.psum, np.where(np.isnan(block.ta), np.nan, 0.0))
+    regen, _ = _summe(regen_anteil, fenster, mindestens)
+
+    temp_summe, temp_anzahl = _summe(block.ta, fenster, mindestens)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        temp_mittel = temp_summe / temp_anzahl
+    vorher = np.full(len(temp_mittel), np.nan)
+    vorher[fenster:] = temp_mittel[:-fenster]
+    erwaermung = temp_mittel - vorher
+
+    # Stundenmittel bei kürzeren Messintervallen, dann Maximum über 24 h
+    pro_stunde = max(1, round(1 / schritt))
+    wind_summe, wind_anzahl = _summe(block.vw, pro_stunde, math.ceil(pro_stunde * MIN_ABDECKUNG))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        wind_stunde = wind_summe / wind_anzahl
+    wind = _extrem(wind_stunde, fenster, mindestens, np.fmax)
+
+    codes = np.column_stack([
+        _codes(neuschnee, NEUSCHNEE_GRENZEN, untere_einschliesslich=True),
+        _codes(regen, REGEN_GRENZEN),
+        _codes(erwaermung, ERWAERMUNG_GRENZEN),
+        _codes(wind, WIND_GRENZEN),
+    ])
+    return Stationswerte(block.zeit, neuschnee, regen, erwaermung, wind, codes)
+
+
+def auswerten(bloecke, schritt=None):
+    """
+    Wertet Messblöcke nacheinander aus (Iterator über Stationswerte je Block). Die letzten
+    zwei Fenster jedes Blocks werden dem nächsten vorangestellt, damit die Werte über
+    Blockgrenzen hinweg dieselben sind wie bei einer Auswertung am Stück.
+    """
+    rest = None
+    for block in bloecke:
+        if not len(block.zeit):
+            continue
+        if schritt is None:
+            schritt = _schritt_stunden(block.zeit if rest is None else np.concatenate([rest.zeit, block.zeit]))
+        if rest is not None:
+            block = Messblock(*(np.concatenate([alt, neu]) for alt, neu in zip(rest, block)))
+        werte = gleitende_werte(block, schritt)
+        vorne = 0 if rest is None else len(rest.zeit)
+        yield Stationswerte(*(spalte[vorne:] for spalte in werte))
+        behalten = 2 * max(1, round(FENSTER_STUNDEN / schritt))
+        rest = Messblock(*(spalte[-behalten:] for spalte in block))
+
+
+def letzte_werte(bloecke, zeitpunkt=None):
+    """
+    Werte zum letzten Messzeitpunkt (oder zum letzten Zeitpunkt <= zeitpunkt) als Stationswerte
+    mit je einem Eintrag; None ohne passende Messung.
+    """
+    gefunden = None
+    grenze = None if zeitpunkt is None else np.datetime64(zeitpunkt, "m")
+    for werte in auswerten(bloecke):
+        auswahl = np.arange(len(werte.zeit)) if grenze is None else np.flatnonzero(werte.zeit <= grenze)
+        if auswahl.size:
+            i = auswahl[-1]
+            gefunden = Stationswerte(*(spalte[i:i + 1] for spalte in werte))
+        if grenze is not None and len(werte.zeit) and werte.zeit[-1] > grenze:
+            break
+    return gefunden
+
+
+def antworten(werte, i=-1):
+    """Optionstexte der vorbelegbaren Fragen zum Zeitpunkt i: dict Frage -> Text (nur bestimmbare Fragen)."""
+    fragen = {frage.frage: frage for frage in KATALOG.tool1}
+    ergebnis = {}
+    for spalte, frage in enumerate(FRAGEN.values()):
+        code = int(werte.codes[i, spalte])
+        if code:
+            ergebnis[frage] = fragen[frage].texte[code]
+    return ergebnis
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lawinen.station", description="Tool-1-Antworten aus Stationsdaten ableiten")
+    parser.add_argument("datei", help="SMET- oder CSV-Datei, - für stdin")
+    parser.add_argument("--zeitpunkt", help="ISO-Zeitpunkt, Standard: letzte Messung")
+    args = parser.parse_args(argv)
+
+    datei = sys.stdin if args.datei == "-" else open(args.datei, encoding="utf-8-sig")
+    try:
+        werte = letzte_werte(lese_datei(datei), args.zeitpunkt)
+    except ValueError as e:
+        parser.exit(1, f"Fehler: {e}\n")
+    finally:
+        if datei is not sys.stdin:
+            datei.close()
+    if werte is None:
+        parser.exit(1, "Keine Messung zum gewählten Zeitpunkt\n")
+
+    print(f"Zeitpunkt {werte.zeit[0]}")
+    einheiten = {"neuschnee": "cm", "regen": "mm", "erwaermung": "°C", "wind": "km/h"}
+    gewaehlt = antworten(werte, 0)
+    for name, frage in FRAGEN.items():
+        wert = getattr(werte, name)[0]
+        text = f"{wert:6.1f} {einheiten[name]:4}" if not np.isnan(wert) else "     - " + " " * 4
+        print(f"{frage:22} {text} {gewaehlt.get(frage, '(nicht bestimmbar)')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Tool 1: Selbstauslösung von Neuschnee-Lawinen (Bewertung nach Ampelsystem)."""
+from typing import NamedTuple
+
+from .katalog import KATALOG
+
+# --- Schwellenwerte des Gefahrenindex ---
+SCHWELLE_HOCH = 3.3
+SCHWELLE_MODERAT = 2.2
+
+# --- Kategorie-Codes für die Stapelverarbeitung (rot, gelb, grün) ---
+KAT_UNGUELTIG = 0
+KAT_HOCH = 1
+KAT_MODERAT = 2
+KAT_GERING = 3
+KATEGORIEN = (None, "hoch", "moderat", "gering")
+
+# --- Fragen & Punktwerte für die Bewertung (aus lawinen/katalog.json) ---
+FRAGEN_TOOL1 = {frage.frage: frage for frage in KATALOG.tool1}
+FRAGEN_DEFINITIONS = {frage.frage: {"": 0, **frage.punkte} for frage in KATALOG.tool1}
+
+
+class Tool1Ergebnis(NamedTuple):
+    """Ergebnis einer Tool-1-Bewertung."""
+    gefahrenindex: float
+    typ1: int
+    typ2: int
+    typ3: int
+    anzahl: int        # Anzahl der beantworteten Fragen (inkl. Setzung)
+    gueltig: bool      # mindestens 3 Antworten mit dem gleichen Gefahren-Typ
+    kategorie: str     # "hoch", "moderat", "gering" oder None, wenn ungültig
+
+
+def kategorie_tool1(gefahrenindex):
+    """Ordnet den Gefahrenindex der Ampel-Kategorie zu."""
+    if gefahrenindex >= SCHWELLE_HOCH:
+        return "hoch"
+    elif gefahrenindex >= SCHWELLE_MODERAT:
+        return "moderat"
+    return "gering"
+
+
+def bewerte_tool1(auswahlen, setzung=("", 0)):
+    """
+    Berechnet den Gefahrenindex aus den gewählten Antworten.
+
+    auswahlen: dict Frage -> gewählte Option ("" = nicht beantwortet)
+    setzung: Ergebnis von berechne_setzung_excel (Beschreibung, Punktwert)
+    """
+    punkte = []
+    auswahl_typen = []
+
+    for frage, auswahl in auswahlen.items():
+        if auswahl:
+            definition = FRAGEN_TOOL1[frage]
+            punkte.append(definition.punkte[auswahl])
+            auswahl_typen.append(definition.typen[auswahl])
+
+    beschreibung, punktwert_setzung = setzung
+    if punktwert_setzung:
+        punkte.append(punktwert_setzung)
+        # Der Typ (1, 2 oder 3) steht am Anfang der Setzungsbeschreibung
+        auswahl_typen.append(int(beschreibung[0]) if beschreibung[:1] in ("1", "2", "3") else 0)
+
+    typ1 = auswahl_typen.count(1)
+    typ2 = auswahl_typen.count(2)
+    typ3 = auswahl_typen.count(3)
+
+    gueltig = len(punkte) > 0 and (typ1 >= 3 or typ2 >= 3 or typ3 >= 3)
+    gefahrenindex = sum(punkte) / len(punkte) if punkte else 0
+    kategorie = kategorie_tool1(gefahrenindex) if gueltig else None
+
+    return Tool1Ergebnis(gefahrenindex, typ1, typ2, typ3, len(punkte), gueltig, kategorie)
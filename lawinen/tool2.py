@@ -0,0 +1,82 @@
+"""Tool 2: Lawinengröße & Reichweite (Massen- und Reichweitenanalyse)."""
+from typing import NamedTuple
+
+from .katalog import KATALOG
+
+# --- Konstanten für Farb-Schwellenwerte der Bewertung (Werte aus lawinen/katalog.json) ---
+FARB_SCHWELLENWERTE = {
+    "gering": {"wert": KATALOG.schwellen_tool2["gering"], "text": "🟢 Geringe Gefahr", "farbe": "#90EE90"},
+    "maessig": {"wert": KATALOG.schwellen_tool2["maessig"], "text": "🟡 Mäßige Gefahr", "farbe": "#FFF176"},
+    "hoch": {"text": "🔴 Hohe Gefahr", "farbe": "#FF7F7F"}
+}
+
+# --- Definition der Fragen, Optionen und Gewichte (aus lawinen/katalog.json) ---
+FRAGEN = [(frage.frage, [(o.text, o.punkte) for o in frage.optionen], frage.gewicht) for frage in KATALOG.tool2]
+
+GEWICHTE = [frage.gewicht for frage in KATALOG.tool2]
+
+# Kategorien in der Reihenfolge der Kategorie-Codes (siehe tool1.KAT_*)
+KATEGORIEN_TOOL2 = (None, "hoch", "maessig", "gering")
+
+# --- Fehlercodes der Validierung ---
+FEHLER_KEINER = 0
+FEHLER_PFLICHTFRAGEN = 1    # Fragen 1-5 nicht alle beantwortet
+FEHLER_FRAGE6_UND_7 = 2     # Frage 6 und Frage 7 beantwortet
+FEHLER_FRAGE6_ODER_7 = 3    # weder Frage 6 noch Frage 7 beantwortet
+
+
+class Tool2Ergebnis(NamedTuple):
+    """Ergebnis einer Tool-2-Bewertung. Bei einem Fehler sind die Mittelwerte None."""
+    fehler: int
+    mw_ung: float
+    mw_gew: float
+
+
+def kategorie_tool2(wert):
+    """Ordnet einen Mittelwert der Kategorie "gering", "maessig" oder "hoch" zu."""
+    if wert <= FARB_SCHWELLENWERTE["gering"]["wert"]:
+        return "gering"
+    elif wert <= FARB_SCHWELLENWERTE["maessig"]["wert"]:
+        return "maessig"
+    return "hoch"
+
+
+def get_bewertung_farbe(wert):
+    """
+    Ermittelt den Gefahrentext und die entsprechende Farbe basierend auf dem berechneten Wert.
+    """
+    stufe = FARB_SCHWELLENWERTE[kategorie_tool2(wert)]
+    return stufe["text"], stufe["farbe"]
+
+
+def pruefe_antworten(antworten):
+    """Prüft die Pflichtfragen 1-5 und die Exklusivität von Frage 6/7. Gibt einen Fehlercode zurück."""
+    if any(wert is None for wert in antworten[:5]):
+        return FEHLER_PFLICHTFRAGEN
+    frage6_beantwortet = antworten[5] is not None
+    frage7_beantwortet = antworten[6] is not None
+    if frage6_beantwortet and frage7_beantwortet:
+        return FEHLER_FRAGE6_UND_7
+    if not frage6_beantwortet and not frage7_beantwortet:
+        return FEHLER_FRAGE6_ODER_7
+    return FEHLER_KEINER
+
+
+def bewerte_tool2(antworten, gewichte=GEWICHTE):
+    """
+    Berechnet den ungewichteten und gewichteten Mittelwert.
+
+    antworten: Punktwerte der Fragen 1-7 in Reihenfolge (None = nicht beantwortet)
+    """
+    fehler = pruefe_antworten(antworten)
+    if fehler:
+        return Tool2Ergebnis(fehler, None, None)
+
+    # Fragen 1-5 und entweder Frage 6 oder Frage 7
+    auswahl = [0, 1, 2, 3, 4, 5 if antworten[5] is not None else 6]
+    werte = [antworten[idx] for idx in auswahl]
+    gew = [gewichte[idx] for idx in auswahl]
+
+    mw_ung = sum(werte) / len(werte)
+    mw_gew = sum(v * g for v, g in zip(werte, gew)) / sum(gew)
+    return Tool2Ergebnis(FEHLER_KEINER, mw_ung, mw_gew)
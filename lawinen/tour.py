@@ -0,0 +1,324 @@
+"""
+Tourenmodus: Tool 1, Tool 2 und Gesamtrisiko entlang einer geplanten Route (GPX).
+
+Die GPX-Datei wird als Strom gelesen (Track- und Routenpunkte, WGS84) und in die Projektion
+der Gelände-Raster umgerechnet: "lv95" (Schweiz, Näherungsformeln von swisstopo, ~1 m) oder
+"utm32", "utm33", ... (Nordhalbkugel). Entlang der Route wird alle ABTASTUNG Meter ein Punkt
+gesetzt; an jedem Punkt kommen die Geländeantworten aus den Code-Rastern (lawinen.gelaende,
+lawinen.sonne), die übrigen Antworten wie bei lawinen.region aus den Regionen. Alle Punkte
+werden in einem Stapel bewertet. Jeder Abschnitt von SEGMENT Metern übernimmt das Ergebnis
+seines ungünstigsten Punkts; zusammenhängende Abschnitte ab Stufe KRITISCH bilden die
+kritischen Passagen.
+
+Aufruf:
+    python -m lawinen.tour tour.gpx wetter.csv --raster "Hangneigung / Exposition=tal_hang.npy" \\
+        --projektion lv95 --segment 50 --ausgabe profil.csv
+"""
+import argparse
+import csv
+import math
+import sys
+import time
+import xml.etree.ElementTree as ET
+from typing import NamedTuple
+
+import numpy as np
+
+from .batch import bewerte_tool1_batch, bewerte_tool2_batch, gesamtrisiko_batch, kodiere_tool1
+from .gelaende import oeffnen
+from .gesamt import GESAMT_STUFEN, GESAMTRISIKO, KEINE_GESAMTBEWERTUNG
+from .katalog import KATALOG
+from .region import codes_zusammensetzen, lese_regionen, raster_spalte
+from .tool1 import KATEGORIEN
+from .tool2 import GEWICHTE, KATEGORIEN_TOOL2
+
+SEGMENT = 50            # Meter pro Abschnitt
+ABTASTUNG = 10          # Meter zwischen den bewerteten Punkten
+KRITISCH = GESAMT_STUFEN.index("hoch")
+PROJEKTIONEN = ("lv95", "utm32", "utm33")
+
+# Farbe pro Stufe (Index in GESAMT_STUFEN) für das Profil
+_FARBE_JE_STUFE = {risiko.stufe: risiko.farbe for risiko in GESAMTRISIKO.values()}
+FARBEN = [_FARBE_JE_STUFE.get(stufe, KEINE_GESAMTBEWERTUNG.farbe) for stufe in GESAMT_STUFEN]
+
+
+class Route(NamedTuple):
+    """Punkte der GPX-Datei in der Projektion der Raster."""
+    x: np.ndarray           # float64
+    y: np.ndarray
+    hoehe: np.ndarray       # float64, NaN ohne <ele>
+    distanz: np.ndarray     # float64, horizontale Distanz ab Start (m)
+
+
+class Profil(NamedTuple):
+    """Ergebnis von tourprofil, ein Array-Eintrag pro Abschnitt."""
+    von: np.ndarray             # float64, Meter ab Start
+    bis: np.ndarray
+    hoehe: np.ndarray           # float64, mittlere Höhe laut GPX (NaN ohne Höhen)
+    gefahrenindex: np.ndarray   # float64, am ungünstigsten Punkt
+    kategorie_tool1: np.ndarray  # uint8, KAT_*
+    mw_gew: np.ndarray          # float64
+    kategorie_tool2: np.ndarray  # uint8
+    gesamtrisiko: np.ndarray    # uint8, Index in GESAMT_STUFEN
+
+
+class Passage(NamedTuple):
+    von: float
+    bis: float
+    stufe: int              # höchste Stufe in der Passage
+
+
+# --- GPX und Projektion ---
+
+def lese_gpx(datei):
+    """Breite, Länge und Höhe aller Track- bzw. Routenpunkte (Dateipfad oder Dateiobjekt), als Strom gelesen."""
+    breite, laenge, hoehe = [], [], []
+    for _, element in ET.iterparse(datei, events=("end",)):
+        name = element.tag.rpartition("}")[2]
+        if name in ("trkpt", "rtept"):
+            try:
+                breite.append(float(element.attrib["lat"]))
+                laenge.append(float(element.attrib["lon"]))
+            except (KeyError, ValueError):
+                raise ValueError(f"GPX-Punkt {len(breite) + 1} ohne gültige lat/lon") from None
+            ele = next((kind.text for kind in element if kind.tag.rpartition("}")[2] == "ele"), None)
+            try:
+                hoehe.append(float(ele) if ele else math.nan)
+            except ValueError:
+                hoehe.append(math.nan)
+            element.clear()
+        elif name in ("trk", "rte"):
+            element.clear()
+    if len(breite) < 2:
+        raise ValueError("Die GPX-Datei enthält weniger als zwei Punkte")
+    return np.array(breite), np.array(laenge), np.array(hoehe)
+
+
+def projizieren(breite, laenge, projektion):
+    """WGS84 (Grad) nach "lv95" oder "utmNN" (Nordhalbkugel); gibt (x, y) in Metern zurück."""
+    breite = np.asarray(breite, dtype=np.float64)
+    laenge = np.asarray(laenge, dtype=np.float64)
+    if projektion == "lv95":
+        phi = (breite * 3600 - 169028.66) / 10000
+        lam = (laenge * 3600 - 26782.5) / 10000
+        x = 2600072.37 + 211455.93 * lam - 10938.51 * lam * phi - 0.36 * lam * phi ** 2 - 44.54 * lam ** 3
+        y = (1200147.07 + 308807.95 * phi + 3745.25 * lam ** 2 + 76.63 * phi ** 2
+             - 194.56 * lam ** 2 * phi + 119.79 * phi ** 3)
+        return x, y
+    if projektion.startswith("utm") and projektion[3:].isdigit():
+        a, f, k0 = 6378137.0, 1 / 298.257223563, 0.9996
+        e2 = f * (2 - f)
+        ep2 = e2 / (1 - e2)
+        phi = np.radians(breite)
+        lam0 = math.radians(int(projektion[3:]) * 6 - 183)
+        n = a / np.sqrt(1 - e2 * np.sin(phi) ** 2)
+        t = np.tan(phi) ** 2
+        c = ep2 * np.cos(phi) ** 2
+        aa = (np.radians(laenge) - lam0) * np.cos(phi)
+        m = a * (
+            (1 - e2 / 4 - 3 * e2 ** 2 / 64 - 5 * e2 ** 3 / 256) * phi
+            - (3 * e2 / 8 + 3 * e2 ** 2 / 32 + 45 * e2 ** 3 / 1024) * np.sin(2 * phi)
+            + (15 * e2 ** 2 / 256 + 45 * e2 ** 3 / 1024) * np.sin(4 * phi)
+            - 35 * e2 ** 3 / 3072 * np.sin(6 * phi)
+        )
+        x = 500000 + k0 * n * (aa + (1 - t + c) * aa ** 3 / 6 + (5 - 18 * t + t ** 2 + 72 * c - 58 * ep2) * aa ** 5 / 120)
+        y = k0 * (m + n * np.tan(phi) * (
+            aa ** 2 / 2 + (5 - t + 9 * c + 4 * c ** 2) * aa ** 4 / 24
+            + (61 - 58 * t + t ** 2 + 600 * c - 330 * ep2) * aa ** 6 / 720
+        ))
+        return x, y
+    raise ValueError(f"Unbekannte Projektion {projektion!r} (lv95 oder utmNN)")
+
+
+def lade_route(datei, projektion):
+    """GPX-Datei als Route in der Projektion der Raster."""
+    breite, laenge, hoehe = lese_gpx(datei)
+    x, y = projizieren(breite, laenge, projektion)
+    distanz = np.concatenate([[0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))])
+    return Route(x, y, hoehe, distanz)
+
+
+def abtasten(route, abstand=ABTASTUNG):
+    """Punkte alle abstand Meter entlang der Route (x, y, Distanz); die Endpunkte sind enthalten."""
+    distanz = np.append(np.arange(0, route.distanz[-1], abstand), route.distanz[-1])
+    return np.interp(distanz, route.distanz, route.x), np.interp(distanz, route.distanz, route.y), distanz
+
+
+# --- Bewertung ---
+
+def einzelregion(auswahlen_tool1, setzung, auswahlen_tool2):
+    """Nachschlagetabellen wie lese_regionen für eine einzige Region 1 aus Antworttexten (dict Frage -> Option)."""
+    tool1 = np.zeros((2, len(KATALOG.tool1) + 1), dtype=np.uint8)
+    tool2 = np.zeros((2, len(KATALOG.tool2)), dtype=np.uint8)
+    tool1[1] = kodiere_tool1(auswahlen_tool1, setzung)
+    tool2[1] = [frage.codes[auswahlen_tool2.get(frage.frage, "")] for frage in KATALOG.tool2]
+    return tool1, tool2, np.array([False, True])
+
+
+def _nachschlagen(pfad, x, y):
+    """Rasterwerte an den Punkten (x, y); außerhalb des Rasters 0."""
+    raster, geo = oeffnen(pfad)
+    spalte = np.floor((x - geo.x) / geo.zellgroesse).astype(np.int64)
+    zeile = geo.zeilen - 1 - np.floor((y - geo.y) / geo.zellgroesse).astype(np.int64)
+    innen = (zeile >= 0) & (zeile < geo.zeilen) & (spalte >= 0) & (spalte < geo.spalten)
+    werte = np.zeros(len(x), dtype=raster.dtype)
+    # Sortiert lesen: benachbarte Punkte liegen im memory-map nahe beieinander
+    reihenfolge = np.flatnonzero(innen)[np.argsort(zeile[innen] * geo.spalten + spalte[innen], kind="stable")]
+    werte[reihenfolge] = raster[zeile[reihenfolge], spalte[reihenfolge]]
+    return werte
+
+
+def tourprofil(route, gelaende, tool1, tool2, bekannt, regionen=None, segment=SEGMENT, abstand=ABTASTUNG,
+               tabelle1=None, tabelle2=None, gewichte=GEWICHTE):
+    """
+    Bewertet die Route abschnittsweise.
+    gelaende: {Spaltenname: Code-Raster} wie bei lawinen.region; regionen: Raster der Region-IDs (ohne: Region 1).
+    tool1, tool2, bekannt: Antworten pro Region (lese_regionen oder einzelregion).
+    """
+    x, y, distanz = abtasten(route, min(abstand, segment))
+    region = _nachschlagen(regionen, x, y) if regionen else np.ones(len(x), dtype=np.int64)
+    codes = [(*raster_spalte(name), _nachschlagen(pfad, x, y)) for name, pfad in gelaende.items()]
+    codes1, codes2, gueltig = codes_zusammensetzen(region, codes, tool1, tool2, bekannt)
+    ergebnis1 = bewerte_tool1_batch(codes1, tabelle1)
+    ergebnis2 = bewerte_tool2_batch(codes2, gewichte, tabelle2)
+    stufe = gesamtrisiko_batch(ergebnis1.kategorie, ergebnis2.kategorie_gew)
+    stufe[~gueltig] = 0
+
+    # Abschnitte: ungünstigster Punkt nach Stufe, dann Gefahrenindex, dann Mittelwert Tool 2
+    abschnitt = np.minimum((distanz // segment).astype(np.int64), max(int(math.ceil(route.distanz[-1] / segment)) - 1, 0))
+    reihenfolge = np.lexsort((np.nan_to_num(ergebnis2.mw_gew), np.nan_to_num(ergebnis1.gefahrenindex), stufe, abschnitt))
+    letzte = np.flatnonzero(np.diff(abschnitt[reihenfolge], append=-1) != 0)
+    unguenstig = reihenfolge[letzte]
+    nummern = abschnitt[unguenstig]
+
+    von = nummern * float(segment)
+    bis = np.minimum(von + segment, route.distanz[-1])
+    mit_hoehe = ~np.isnan(route.hoehe)
+    if mit_hoehe.any():
+        hoehe_punkte = np.interp(distanz, route.distanz[mit_hoehe], route.hoehe[mit_hoehe])
+        hoehe = np.bincount(abschnitt, hoehe_punkte)[nummern] / np.bincount(abschnitt)[nummern]
+    else:
+        hoehe = np.full(len(nummern), np.nan)
+    return Profil(
+        von, bis, hoehe, ergebnis1.gefahrenindex[unguenstig], ergebnis1.kategorie[unguenstig],
+        ergebnis2.mw_gew[unguenstig], ergebnis2.kategorie_gew[unguenstig], stufe[unguenstig],
+    )
+
+
+def passagen(profil, ab=KRITISCH):
+    """Zusammenhängende Abschnitte mit Gesamtrisiko-Stufe ab ab."""
+    kritisch = profil.gesamtrisiko >= ab
+    # Anfang und Ende jeder Folge kritischer Abschnitte
+    rand = np.diff(np.concatenate([[0], kritisch.astype(np.int8), [0]]))
+    anfaenge, enden = np.flatnonzero(rand == 1), np.flatnonzero(rand == -1)
+    return [
+        Passage(float(profil.von[a]), float(profil.bis[e - 1]), int(profil.gesamtrisiko[a:e].max()))
+        for a, e in zip(anfaenge, enden)
+    ]
+
+
+# --- Darstellung ---
+
+def profil_svg(profil, breite=800, hoehe=240, band=24):
+    """
+    Höhenprofil als SVG (für st.markdown) mit einem Farbband der Gesamtrisiko-Stufe darunter;
+    kritische Passagen sind über die ganze Höhe hinterlegt. Gleiche benachbarte Abschnitte
+    werden zu einem Rechteck zusammengefasst, die Höhenlinie hat höchstens breite Punkte.
+    """
+    laenge = float(profil.bis[-1]) or 1.0
+    oben = hoehe - band - 4
+
+    def x_von(meter):
+        return meter / laenge * breite
+
+    teile = [f"<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 {breite} {hoehe}' width='100%'>"]
+    for passage in passagen(profil):
+        teile.append(
+            f"<rect x='{x_von(passage.von):.1f}' y='0' width='{max(x_von(passage.bis - passage.von), 1):.1f}' "
+            f"height='{oben}' fill='{FARBEN[passage.stufe]}' fill-opacity='0.2'/>"
+        )
+    wechsel = np.flatnonzero(np.diff(profil.gesamtrisiko, prepend=-1) != 0)
+    for a, e in zip(wechsel, np.append(wechsel[1:], len(profil.von))):
+        teile.append(
+            f"<rect x='{x_von(profil.von[a]):.1f}' y='{hoehe - band}' width='{max(x_von(profil.bis[e - 1] - profil.von[a]), 1):.1f}' "
+            f"height='{band}' fill='{FARBEN[profil.gesamtrisiko[a]]}'/>"
+        )
+
+    mit_hoehe = ~np.isnan(profil.hoehe)
+    if mit_hoehe.sum() >= 2:
+        mitte = ((profil.von + profil.bis) / 2)[mit_hoehe]
+        werte = profil.hoehe[mit_hoehe]
+        if len(mitte) > breite:
+            auswahl = np.linspace(0, len(mitte) - 1, breite).round().astype(int)
+            mitte, werte = mitte[auswahl], werte[auswahl]
+        tief, hoch = werte.min(), werte.max()
+        spanne = (hoch - tief) or 1.0
+        punkte = " ".join(f"{x_von(m):.1f},{oben - 8 - (w - tief) / spanne * (oben - 24):.1f}" for m, w in zip(mitte, werte))
+        teile.append(f"<polyline points='{punkte}' fill='none' stroke='#333' stroke-width='2'/>")
+        teile.append(f"<text x='4' y='14' font-size='12' fill='#333'>{hoch:.0f} m</text>")
+        teile.append(f"<text x='4' y='{oben - 4}' font-size='12' fill='#333'>{tief:.0f} m</text>")
+    teile.append(f"<text x='{breite - 4}' y='14' font-size='12' fill='#333' text-anchor='end'>{laenge / 1000:.1f} km</text>")
+    teile.append("</svg>")
+    return "".join(teile)
+
+
+def profil_zeilen(profil):
+    """Abschnitte als dicts lesbarer Werte (z. B. für CSV oder st.dataframe)."""
+    return [
+        {
+            "von_km": round(von / 1000, 3),
+            "bis_km": round(bis / 1000, 3),
+            "hoehe_m": None if math.isnan(h) else round(h),
+            "gefahrenindex": None if math.isnan(gi) else round(gi, 2),
+            "kategorie_tool1": KATEGORIEN[k1],
+            "mw_gew": None if math.isnan(mw) else round(mw, 2),
+            "kategorie_tool2": KATEGORIEN_TOOL2[k2],
+            "gesamtrisiko": GESAMT_STUFEN[g],
+        }
+        for von, bis, h, gi, k1, mw, k2, g in zip(*(spalte.tolist() for spalte in profil))
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lawinen.tour", description="Gefahrenprofil entlang einer GPX-Route")
+    parser.add_argument("gpx", help="GPX-Datei mit Track oder Route")
+    parser.add_argument("wetter", help="CSV mit Spalte region und den Antworten pro Region (lawinen.region)")
+    parser.add_argument("--raster", action="append", default=[], metavar="FRAGE=PFAD",
+                        help="Code-Raster für eine Frage, z. B. \"Hangneigung / Exposition=tal_hang.npy\"; mehrfach möglich")
+    parser.add_argument("--regionen", help="Raster der Region-IDs")
+    parser.add_argument("--projektion", default="lv95", help="Projektion der Raster: lv95 oder utmNN (Standard: lv95)")
+    parser.add_argument("--segment", type=float, default=SEGMENT, help=f"Meter pro Abschnitt (Standard: {SEGMENT})")
+    parser.add_argument("--ausgabe", default="-", help="CSV-Datei für das Profil, Standard: stdout")
+    args = parser.parse_args(argv)
+
+    gelaende = {}
+    for angabe in args.raster:
+        name, trenner, pfad = angabe.rpartition("=")
+        if not trenner or not name or not pfad:
+            parser.error(f"--raster erwartet FRAGE=PFAD, nicht {angabe!r}")
+        gelaende[name.strip()] = pfad.strip()
+
+    start = time.perf_counter()
+    try:
+        route = lade_route(args.gpx, args.projektion)
+        profil = tourprofil(route, gelaende, *lese_regionen(args.wetter), args.regionen, args.segment)
+    except (OSError, ValueError, ET.ParseError) as e:
+        parser.exit(1, f"Fehler: {e}\n")
+    dauer = time.perf_counter() - start
+
+    zeilen = profil_zeilen(profil)
+    aus = sys.stdout if args.ausgabe == "-" else open(args.ausgabe, "w", encoding="utf-8", newline="")
+    try:
+        schreiber = csv.DictWriter(aus, list(zeilen[0]))
+        schreiber.writeheader()
+        schreiber.writerows(zeilen)
+    finally:
+        if aus is not sys.stdout:
+            aus.close()
+    for passage in passagen(profil):
+        print(f"Kritisch: km {passage.von / 1000:.2f}–{passage.bis / 1000:.2f} ({GESAMT_STUFEN[passage.stufe]})", file=sys.stderr)
+    print(f"{len(route.x)} Punkte, {len(zeilen)} Abschnitte, {route.distanz[-1] / 1000:.1f} km in {dauer:.2f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Monte-Carlo-Fortpflanzung unsicherer Antworten.
+
+Statt einer Option pro Frage wird eine Wahrscheinlichkeitsverteilung über die Optionen
+angegeben (z. B. 70 % "20-40 cm", 30 % "> 40 cm"). Daraus werden Antwortcodes gezogen und
+mit der Stapelbewertung (lawinen.batch) bewertet; 100.000 Ziehungen brauchen wenige
+Hundertstelsekunden. numpy wird erst beim Simulieren geladen.
+"""
+from typing import NamedTuple
+
+from .setzung import SETZUNG_OPTIONEN
+
+ANZAHL = 100_000
+
+
+class Unsicherheit(NamedTuple):
+    """Ergebnis einer Simulation, ein Eintrag pro Ziehung."""
+    werte: object        # np.ndarray float64: Gefahrenindex bzw. mw_gew, NaN wenn ungültig
+    kategorien: object   # np.ndarray uint8: Kategorie-Code (KAT_*) pro Ziehung
+    anteile: tuple       # Anteil je Kategorie-Code (ungültig, hoch, moderat/mäßig, gering)
+
+
+def verteilung(frage, gewichte):
+    """
+    Wahrscheinlichkeiten über die Codes einer Frage (Index = Code, 0 = nicht beantwortet).
+    gewichte: dict Optionstext -> Gewicht; wird auf Summe 1 normiert.
+    """
+    summe = sum(gewichte.values())
+    if summe <= 0:
+        raise ValueError(f"Gewichte für {frage.frage!r} müssen eine positive Summe haben")
+    p = [0.0] * len(frage.texte)
+    for text, gewicht in gewichte.items():
+        if gewicht < 0:
+            raise ValueError(f"Negatives Gewicht für {text!r}")
+        p[frage.codes[text]] += gewicht / summe
+    return p
+
+
+def verteilungen(fragen, auswahlen, unsicher=None):
+    """
+    Verteilungen für alle Fragen: aus unsicher (dict Frage -> {Optionstext: Gewicht}),
+    sonst sicher die gewählte Option aus auswahlen (dict Frage -> Optionstext).
+    """
+    unsicher = unsicher or {}
+    return [
+        verteilung(frage, unsicher.get(frage.frage) or {auswahlen.get(frage.frage, ""): 1})
+        for frage in fragen
+    ]
+
+
+def ziehe_codes(verteilungen_, anzahl=ANZAHL, rng=None):
+    """Zieht anzahl Codezeilen; Spalte j folgt verteilungen_[j]. Gibt eine uint8-Matrix (anzahl x Fragen) zurück."""
+    import numpy as np
+
+    rng = rng if rng is not None else np.random.default_rng()
+    breite = max(len(p) for p in verteilungen_)
+    tabelle = np.zeros((len(verteilungen_), breite))
+    for zeile, p in enumerate(verteilungen_):
+        tabelle[zeile, :len(p)] = p
+    kumuliert = np.cumsum(tabelle, axis=1)
+    kumuliert /= kumuliert[:, -1:]  # letzte Grenze exakt 1, damit nie hinter die letzte Option gezogen wird
+    zufall = rng.random((anzahl, len(verteilungen_)))
+    return (zufall[:, :, None] >= kumuliert[None, :, :]).sum(axis=2, dtype=np.uint8)
+
+
+def _anteile(kategorien):
+    import numpy as np
+
+    return tuple((np.bincount(kategorien, minlength=4) / max(len(kategorien), 1)).tolist())
+
+
+def simuliere_tool1(verteilungen_tool1, setzung=("", 0), anzahl=ANZAHL, seed=None):
+    """
+    Verteilung des Gefahrenindex von Tool 1.
+    verteilungen_tool1: eine Verteilung pro Frage (siehe verteilungen), setzung wie bei bewerte_tool1.
+    """
+    import numpy as np
+
+    from .batch import bewerte_tool1_batch
+
+    beschreibung, punktwert_setzung = setzung
+    setzung_code = list(SETZUNG_OPTIONEN).index(beschreibung) if punktwert_setzung else 0
+    codes = np.empty((anzahl, len(verteilungen_tool1) + 1), dtype=np.uint8)
+    codes[:, :-1] = ziehe_codes(verteilungen_tool1, anzahl, np.random.default_rng(seed))
+    codes[:, -1] = setzung_code
+
+    ergebnis = bewerte_tool1_batch(codes)
+    werte = np.where(ergebnis.gueltig, ergebnis.gefahrenindex, np.nan)
+    return Unsicherheit(werte, ergebnis.kategorie, _anteile(ergebnis.kategorie))
+
+
+def simuliere_tool2(verteilungen_tool2, anzahl=ANZAHL, seed=None):
+    """Verteilung des gewichteten Mittelwerts von Tool 2; Ziehungen mit Fehlercode sind ungültig (NaN)."""
+    import numpy as np
+
+    from .batch import bewerte_tool2_batch
+
+    codes = ziehe_codes(verteilungen_tool2, anzahl, np.random.default_rng(seed))
+    ergebnis = bewerte_tool2_batch(codes)
+    return Unsicherheit(ergebnis.mw_gew, ergebnis.kategorie_gew, _anteile(ergebnis.kategorie_gew))
+
+
+def gesamt_anteile(tool1, tool2):
+    """Anteil je Stufe von GESAMT_STUFEN, wenn die Ziehungen beider Tools unabhängig gepaart werden."""
+    import numpy as np
+
+    from .batch import gesamtrisiko_batch
+    from .gesamt import GESAMT_STUFEN
+
+    stufen = gesamtrisiko_batch(tool1.kategorien, tool2.kategorien)
+    return tuple((np.bincount(stufen, minlength=len(GESAMT_STUFEN)) / len(stufen)).tolist())
+
+
+def quantile(unsicherheit, anteile=(0.05, 0.5, 0.95)):
+    """Quantile der gültigen Werte; None, wenn keine Ziehung gültig war."""
+    import numpy as np
+
+    gueltig = unsicherheit.werte[~np.isnan(unsicherheit.werte)]
+    if not gueltig.size:
+        return None
+    return tuple(np.quantile(gueltig, anteile).tolist())
@@ -0,0 +1,135 @@
+"""
+Vorberechneter Ergebniswürfel für Tool 1.
+
+Neun Fragen mit je vier Codes (0 = nicht beantwortet, 1..3) und das Setzungsergebnis
+(0..3) ergeben 4**10 = 1.048.576 Kombinationen. Für jede wird ein Byte gespeichert:
+
+    Bit 0-1: Kategorie des Gefahrenindex (KAT_HOCH, KAT_MODERAT, KAT_GERING; 0 ohne Antworten)
+    Bit 2:   gültig (mindestens 3 Antworten mit dem gleichen Typ)
+
+Der Schlüssel ist der gepackte Antwort-Tupel: Summe code_j * 4**j über die Spalten j
+der Codematrix (SPALTEN_TOOL1), also 2 Bit pro Spalte.
+
+Dateiformat: 40 Byte Kopf (b"LAWW", Version, 3 Byte reserviert, SHA-256 der
+Punktetabelle und Schwellenwerte), danach die 4**10 Bytes.
+
+Aufruf:
+    python -m lawinen.wuerfel erzeugen tool1_wuerfel.bin
+    python -m lawinen.wuerfel bericht tool1_wuerfel.bin
+"""
+import argparse
+import hashlib
+from collections import Counter
+
+import numpy as np
+
+from .batch import SPALTEN_TOOL1, bewerte_tool1_batch, punkte_tabelle_tool1
+from .tool1 import KAT_GERING, KAT_HOCH, KAT_MODERAT, KAT_UNGUELTIG, KATEGORIEN, SCHWELLE_HOCH, SCHWELLE_MODERAT
+
+MAGIC = b"LAWW"
+VERSION = 1
+KOPF_LAENGE = 40
+ANZAHL_KOMBINATIONEN = 4 ** len(SPALTEN_TOOL1)
+
+BIT_GUELTIG = 0b100
+MASKE_KATEGORIE = 0b011
+
+_STELLEN = 4 ** np.arange(len(SPALTEN_TOOL1), dtype=np.uint32)
+
+
+def fingerabdruck(punkte_tabelle=None):
+    """SHA-256 über Punktetabelle und Schwellenwerte; ändert sich mit jeder Anpassung der Fragen."""
+    if punkte_tabelle is None:
+        punkte_tabelle = punkte_tabelle_tool1()
+    h = hashlib.sha256(np.ascontiguousarray(punkte_tabelle, dtype=np.float64).tobytes())
+    h.update(np.array([SCHWELLE_HOCH, SCHWELLE_MODERAT], dtype=np.float64).tobytes())
+    return h.digest()
+
+
+def packe_schluessel(codes):
+    """Packt Codezeilen (... x 10, Werte 0..3) in den Würfelschlüssel."""
+    return (np.asarray(codes, dtype=np.uint32) * _STELLEN).sum(axis=-1, dtype=np.uint32)
+
+
+def entpacke_schluessel(schluessel):
+    """Umkehrung von packe_schluessel: Schlüssel -> Codezeilen (uint8)."""
+    schluessel = np.asarray(schluessel, dtype=np.uint32)
+    return ((schluessel[..., None] // _STELLEN) % 4).astype(np.uint8)
+
+
+def erzeuge_wuerfel(punkte_tabelle=None):
+    """Bewertet alle Kombinationen mit bewerte_tool1_batch und packt das Ergebnis in je ein Byte."""
+    codes = entpacke_schluessel(np.arange(ANZAHL_KOMBINATIONEN, dtype=np.uint32))
+    ergebnis = bewerte_tool1_batch(codes, punkte_tabelle)
+
+    kategorie = np.full(ANZAHL_KOMBINATIONEN, KAT_GERING, dtype=np.uint8)
+    kategorie[ergebnis.gefahrenindex >= SCHWELLE_MODERAT] = KAT_MODERAT
+    kategorie[ergebnis.gefahrenindex >= SCHWELLE_HOCH] = KAT_HOCH
+    kategorie[ergebnis.anzahl == 0] = KAT_UNGUELTIG
+
+    return kategorie | np.where(ergebnis.gueltig, BIT_GUELTIG, 0).astype(np.uint8)
+
+
+def speichere_wuerfel(pfad, punkte_tabelle=None):
+    """Erzeugt den Würfel und schreibt ihn mit Kopf nach pfad."""
+    daten = erzeuge_wuerfel(punkte_tabelle)
+    kopf = MAGIC + bytes([VERSION, 0, 0, 0]) + fingerabdruck(punkte_tabelle)
+    with open(pfad, "wb") as f:
+        f.write(kopf)
+        f.write(daten.tobytes())
+
+
+class Tool1Wuerfel:
+    """Lesezugriff auf einen gespeicherten Würfel (memory-mapped, O(1) pro Nachschlagen)."""
+
+    def __init__(self, pfad, punkte_tabelle=None):
+        with open(pfad, "rb") as f:
+            kopf = f.read(KOPF_LAENGE)
+        if kopf[:4] != MAGIC or kopf[4] != VERSION:
+            raise ValueError(f"{pfad} ist keine Würfeldatei der Version {VERSION}")
+        if kopf[8:] != fingerabdruck(punkte_tabelle):
+            raise ValueError(f"{pfad} passt nicht zur aktuellen Punktetabelle – bitte neu erzeugen")
+        self.daten = np.memmap(pfad, dtype=np.uint8, mode="r", offset=KOPF_LAENGE, shape=(ANZAHL_KOMBINATIONEN,))
+
+    def nachschlagen(self, codes):
+        """Roh-Bytes zu Codezeilen (10 Codes oder Matrix n x 10)."""
+        return self.daten[packe_schluessel(codes)]
+
+    def kategorie(self, codes):
+        """Kategorie-Code wie bewerte_tool1_batch: KAT_UNGUELTIG, wenn die Bewertung nicht gültig ist."""
+        byte = self.nachschlagen(codes)
+        return np.where(byte & BIT_GUELTIG, byte & MASKE_KATEGORIE, KAT_UNGUELTIG).astype(np.uint8)
+
+    def gueltig(self, codes):
+        return (self.nachschlagen(codes) & BIT_GUELTIG) != 0
+
+    def bericht(self):
+        """Anzahl der Kombinationen je (Kategorie, gültig)."""
+        zaehler = np.bincount(self.daten, minlength=8)
+        return {
+            (KATEGORIEN[byte & MASKE_KATEGORIE], bool(byte & BIT_GUELTIG)): int(anzahl)
+            for byte, anzahl in enumerate(zaehler) if anzahl
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m lawinen.wuerfel", description="Ergebniswürfel für Tool 1")
+    parser.add_argument("befehl", choices=["erzeugen", "bericht"])
+    parser.add_argument("pfad")
+    args = parser.parse_args(argv)
+
+    if args.befehl == "erzeugen":
+        speichere_wuerfel(args.pfad)
+        print(f"{ANZAHL_KOMBINATIONEN} Kombinationen nach {args.pfad} geschrieben")
+
+    bericht = Tool1Wuerfel(args.pfad).bericht()
+    gesamt = Counter()
+    for (kategorie, gueltig), anzahl in sorted(bericht.items(), key=lambda e: (str(e[0][0]), e[0][1])):
+        print(f"{str(kategorie):8} gültig={gueltig!s:5} {anzahl:8d}")
+        if gueltig:
+            gesamt[kategorie] += anzahl
+    print("Gültige Kombinationen:", dict(gesamt))
+
+
+if __name__ == "__main__":
+    main()
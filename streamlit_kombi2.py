@@ -1,9 +1,29 @@
 import streamlit as st
-import math
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-from PIL import Image
+
+from lawinen import (
+    FEHLER_FRAGE6_ODER_7,
+    FEHLER_FRAGE6_UND_7,
+    FEHLER_PFLICHTFRAGEN,
+    GESAMT_STUFEN,
+    KATALOG,
+    bewerte_tool1,
+    bewerte_tool2,
+    gesamtrisiko,
+    get_bewertung_farbe,
+)
+from lawinen.ansicht import (
+    bewertungsspeicher,
+    setzung_eingeben,
+    sonne_vorbelegen,
+    station_vorbelegen,
+    unsicherheit_eingeben,
+    zeige_anteile,
+    zeige_logo,
+    zeige_unsicherheit,
+)
+from lawinen.skala import skala_bild
+from lawinen.speicher import neue_bewertung
+from lawinen.unsicherheit import gesamt_anteile, simuliere_tool1, simuliere_tool2, verteilungen
 
 # Konfiguriere die Seite
 st.set_page_config(page_title="Lawinenbewertung", layout="centered")
@@ -46,81 +66,14 @@ verhaltensempfehlungen = {
 """
 }
 
-# --- Fragen & Punktwerte für die Bewertung (aus Tool 1) ---
-fragen_definitions_tool1 = {
-    "Neuschneemenge (24h)": {"": 0, "1: > 40 cm / Tag": 4, "2: 20–40 cm / Tag": 2.5, "3: < 20 cm / Tag": 2},
-    "Regenmenge": {"": 0, "1: starker Regen (> 5 mm)": 4, "2: leichter Regen (< 5 mm)": 2.5, "3: kein Regen": 3},
-    "Erwärmung": {"": 0, "1: > 4 °C Erwärmung": 3.5, "2: bis 4 °C Erwärmung": 2, "3: kalt oder keine Erwärmung": 3},
-    "Schneedecken-Stabilität": {"": 0, "1: Altschnee mitgerissen": 4, "2: nicht tragfähiger Harschdeckel": 2.5, "3: tragfähiger Harschdeckel oder keine Schwachschicht": 1},
-    "Verbindung zur Altschneedecke": {"": 0, "1: schlecht (kaltes Einschneien)": 3, "2: Beginn bei 0–2 °C": 2, "3: gut (Regen, dann Temperaturabfall)": 1},
-    "Wind/Verfrachtung": {"": 0, "1: starker Wind (> 40 km/h)": 3, "2: mäßiger Wind (< 40 km/h)": 2, "3: kein/wenig Wind": 1},
-    "Exposition/Sonneneinstrahlung": {"": 0, "1: starke Sonneneinstrahlung": 3.5, "2: mäßige Sonneneinstrahlung": 2.5, "3: kaum oder keine Sonneneinstrahlung": 2},
-    "SSD (vSSD)": {
-        "": 0,
-        "1: 🔴 Stabilität Sehr schlecht / schlecht": 4,
-        "2: 🟡 Stabilität mittel": 2.5,
-        "3: 🟢 Stabilität gut": 2
-    },
-    "Hangneigung / Exposition": {"": 0, "1: > 35° und ungünstige Exposition": 4, "2: 30–35° oder teils ungünstig": 2, "3: < 30° oder günstige Exposition": 1}
-}
-
-# --- Konstanten für Farb-Schwellenwerte der Bewertung (aus Tool 2) ---
-FARB_SCHWELLENWERTE_TOOL2 = {
-    "gering": {"wert": 3.26, "text": "🟢 Geringe Gefahr", "farbe": "#90EE90"},
-    "maessig": {"wert": 4.21, "text": "🟡 Mäßige Gefahr", "farbe": "#FFF176"},
-    "hoch": {"text": "🔴 Hohe Gefahr", "farbe": "#FF7F7F"}
-}
-
-# --- Definition der Fragen, Optionen und Gewichte (aus Tool 2) ---
-fragen_tool2 = [
-    ("Frage 1: Größe des Geländes", [
-        ("Sehr klein (z.B. schmaler Hangabschnitt)", 1),
-        ("Klein bis mittelgroß (einzelne Hänge oder kurze Rinnen)", 2.5),
-        ("Groß (mehrere zusammenhängende Hangbereiche)", 4.5),
-        ("Sehr groß (ausgedehntes Kar oder verbundenes Gelände)", 7)
-    ], 1.5),
-    ("Frage 2: Schneemenge und Stabilität", [
-        ("Wenig Schnee, stabil (kaum Lawinenpotenzial)", 1),
-        ("Mittlere Schneemenge, eher stabil (lokale Auslösungen möglich)", 4),
-        ("Viel Schnee, mit Schwachschichten (erhöhtes Gefahrenpotenzial)", 5),
-        ("Sehr viel Schnee, instabil - Hoher Auslösegrad (z. B. Triebschnee, Nass- Gleitschnee,  großes Schwimmschneefundament)", 8)
-    ], 2),
-    ("Frage 3: Schneemenge in der Lawinenbahn", [
-        ('Kaum Schnee – Lawine "verhungert"', 1),
-        ("Wenig Schnee – geringe Massenvergrößerung", 4),
-        ("Viel Schnee – deutliche Massenvergrößerung", 5),
-        ("Sehr viel Schnee – erhebliche Massenvergrößerung (z. B. durch Neuschnee oder Triebschnee im Verlauf)", 8)
-    ], 1.5),
-    ("Frage 4: Bodenbeschaffenheit", [
-        ("Großer Widerstand → starke Bremswirkung (z.B. vorstehende Steine, Blöcke)", 1),
-        ("Unregelmäßiger Boden → teilweiser Widerstand (z.B. Vegetation, Geländeunebenheiten", 2),
-        ("Geglätteter Boden → wenig Widerstand (z.B. verdichtete Schneedecke oder Skirinnen)", 4),
-        ("Vollständig glatt → maximale Gleitfähigkeit (z.B. Lawinengras, vereiste Altschneedecke)", 7)
-    ], 1.2),
-    ("Frage 5: Hangauslauf / Reichweite", [
-        ("Kurzer Auslauf, flach → Lawine wird rasch gebremst", 1),
-        ("Langer, steiler Auslauf mit Hindernissen (z.B. Bäume, Geländestufen)", 2),
-        ("Langer Auslauf, wenige Hindernisse/Staubereiche → große Reichweite möglich (Ø-Gefälle ~ 26–27°)", 4),
-        ("Langer, freier Auslauf – keine Hindernisse → sehr große Reichweite", 7)
-    ], 1),
-    ("Frage 6: Potenzielle Auswirkungen – Massenbewegung", [
-        ("Keine Gefahr- geringe Massenbewegung", 1),
-        ("Gefahr für Einzelpersonen → könnte Menschen erfassen", 3),
-        ("Gefahr für Objekte (z.B. Fahrzeuge, Bäume, kleine Bauwerke)", 8),
-        ("Gefahr für Infrastruktur (z.B. Straßen, Häuser, Bahnlinien)", 8)
-    ], 2),
-    ("Frage 7: Nähe zu Pisten oder Infrastruktur", [
-        ("Weit entfernt → keine relevante Gefährdung", 1),
-        ("In Sichtweite → Wahrnehmung möglich, aber keine direkte Gefährdung", 3),
-        ("Kann Pisten oder Infrastruktur erreichen → potenzielle Beeinträchtigung", 8),
-        ("Direkter Einfluss → trifft auf Pisten, Häuser, Verkehrswege", 8)
-    ], 2)
-]
+# --- Fragen, Optionen, Punktwerte und Gewichte beider Tools (aus lawinen/katalog.json) ---
+fragen_tool1 = KATALOG.tool1
+fragen_tool2 = KATALOG.tool2
 
 # --- Initialisierung des Session State (Kombiniert für beide Tools) ---
 # Tool 1 spezifisch
-for frage in fragen_definitions_tool1:
-    st.session_state.setdefault(f"tool1_radio_{frage}", "")
+for definition in fragen_tool1:
+    st.session_state.setdefault(f"tool1_radio_{definition.frage}", "")
 if "tool1_selected_final_recommendation" not in st.session_state:
     st.session_state.tool1_selected_final_recommendation = list(verhaltensempfehlungen.keys())[0]
 if "tool1_final_radio_clicked" not in st.session_state:
@@ -133,6 +86,9 @@ if "tool1_result_category" not in st.session_state: # Speichert die Kategorie (r
     st.session_state.tool1_result_category = None 
 if "tool1_open_expander" not in st.session_state: # Für die Expander-Logik
     st.session_state.tool1_open_expander = None
+if "tool1_verteilungen" not in st.session_state: # Antwortverteilungen und Setzung für die Monte-Carlo-Simulation
+    st.session_state.tool1_verteilungen = None
+    st.session_state.tool1_unsicher = False
 
 
 # Tool 2 spezifisch
@@ -147,32 +103,12 @@ if "tool2_initialisiert" not in st.session_state:
 # --- Callback-Funktionen (aus Tool 1 und Tool 2) ---
 def on_tool1_final_radio_change():
     st.session_state.tool1_final_radio_clicked = True
+    # Eine bereits gespeicherte Bewertung mit der neuen Empfehlung überschreiben
+    if "bewertung" in st.session_state:
+        st.session_state.bewertung = st.session_state.bewertung._replace(empfehlung=st.session_state.tool1_final_recommendation_radio)
+        bewertungsspeicher().speichern(st.session_state.bewertung)
     # Der Wert wird automatisch über den 'key' im Session State aktualisiert
 
-def berechne_setzung_excel(ns_val, temp_val, stunden_val):
-    if stunden_val <= 0:
-        return "", 0
-    ln_teil = math.log(min(stunden_val, 72) + 1)
-    setzungsgrad = min(100, ((0.4 * (temp_val + 5) * ln_teil) / 8) * 100)
-    
-    if setzungsgrad < 20:
-        return ("1: (fast) keine Setzung", 3.5) if ns_val > 30 else ("2: mäßige Setzung", 2)
-    elif setzungsgrad < 40:
-        return ("1: (fast) keine Setzung", 3.5) if ns_val > 50 else ("2: mäßige Setzung", 2)
-    else:
-        return ("2: mäßige Setzung", 2) if ns_val > 80 else ("3: starke Setzung", 3.5)
-
-def get_bewertung_farbe_tool2(wert):
-    """
-    Ermittelt den Gefahrentext und die entsprechende Farbe basierend auf dem berechneten Wert für Tool 2.
-    """
-    if wert <= FARB_SCHWELLENWERTE_TOOL2["gering"]["wert"]:
-        return FARB_SCHWELLENWERTE_TOOL2["gering"]["text"], FARB_SCHWELLENWERTE_TOOL2["gering"]["farbe"]
-    elif wert <= FARB_SCHWELLENWERTE_TOOL2["maessig"]["wert"]:
-        return FARB_SCHWELLENWERTE_TOOL2["maessig"]["text"], FARB_SCHWELLENWERTE_TOOL2["maessig"]["farbe"]
-    else:
-        return FARB_SCHWELLENWERTE_TOOL2["hoch"]["text"], FARB_SCHWELLENWERTE_TOOL2["hoch"]["farbe"]
-
 def handle_tool2_radio_selection(question_idx):
     """
     Diese Callback-Funktion wird ausgelöst, wenn ein Radio-Button in Tool 2 ausgewählt wird.
@@ -180,15 +116,8 @@ def handle_tool2_radio_selection(question_idx):
     key = f"tool2_frage_{question_idx}"
     selected_option_text = st.session_state[key]
 
-    current_question_options = fragen_tool2[question_idx - 1][1]
-    selected_value = None
-    for text, val in current_question_options:
-        if selected_option_text == text:
-            selected_value = val
-            break
-            
-    if selected_option_text == "": # Handle the empty option (initial state)
-        selected_value = None
+    # Punktwert der gewählten Option; die leere Option ergibt None
+    selected_value = fragen_tool2[question_idx - 1].punkte.get(selected_option_text)
 
     st.session_state[f"tool2_antwort_{question_idx}"] = selected_value
     st.session_state.tool2_submitted = False # Zurücksetzen, damit man erneut "Berechnen" klicken muss
@@ -199,14 +128,7 @@ def handle_tool2_radio_selection(question_idx):
 
 
 # --- Logo anzeigen (aus Tool 2) ---
-try:
-    # Use the uploaded file directly
-    logo = Image.open("image_7ebf12.png")
-    st.image(logo, width=200)
-except FileNotFoundError:
-    st.warning("⚠️ Logo konnte nicht geladen werden. Bitte stellen Sie sicher, dass 'image_7ebf12.png' im selben Verzeichnis wie das Skript liegt.")
-except Exception as e:
-    st.warning(f"⚠️ Fehler beim Laden des Logos: {e}")
+zeige_logo()
 
 st.title("🏔️ Lawinenbewertung")
 st.markdown("Führen Sie eine schrittweise Analyse der Lawinengefahr durch.")
@@ -214,57 +136,42 @@ st.markdown("Führen Sie eine schrittweise Analyse der Lawinengefahr durch.")
 st.header("Schritt 1: Kann sich eine Lawine lösen? (Tool 1)")
 st.markdown("Beantworten Sie die folgenden Fragen, um die Wahrscheinlichkeit einer Selbstauslösung einzuschätzen.")
 
+# --- Wetterstation (Optional für Tool 1): belegt Neuschnee, Regen, Erwärmung und Wind vor ---
+station_vorbelegen("tool1_radio_{}", "tool1")
+
+# --- Sonneneinstrahlung (Optional): belegt "Exposition/Sonneneinstrahlung" vor ---
+sonne_vorbelegen("tool1_radio_{}", "tool1")
+
 # --- Hauptformular für Tool 1 ---
 with st.form("lawinen_form_main_tool1"):
-    punkte_tool1 = []
-    auswahl_typen_tool1 = []
+    auswahlen_tool1 = {}
+
+    hang = st.text_input("Hang / Ort", key="hang")
 
     # Fragen zur Lawinenbewertung (Tool 1)
-    for frage in fragen_definitions_tool1:
-        optionen = fragen_definitions_tool1[frage]
+    for definition in fragen_tool1:
+        frage = definition.frage
         auswahl = st.radio(
             frage,
-            list(optionen.keys()),
-            index=list(optionen.keys()).index(st.session_state[f"tool1_radio_{frage}"]),
+            definition.texte,
+            index=definition.codes[st.session_state[f"tool1_radio_{frage}"]],
             key=f"tool1_radio_{frage}"
         )
 
         if frage == "SSD (vSSD)" and auswahl in ampel_icons:
             st.markdown(f"<div style='margin-top: -10px; margin-bottom: 10px;'>{ampel_icons[auswahl]}</div>", unsafe_allow_html=True)
 
-        if auswahl:
-            punkte_tool1.append(optionen[auswahl])
-            if auswahl in [item for sublist in [list(fragen_definitions_tool1[k].keys())[1:] for k in fragen_definitions_tool1] for item in sublist]:
-                auswahl_typen_tool1.append(auswahl[0])
-            else:
-                auswahl_typen_tool1.append("")
+        auswahlen_tool1[frage] = auswahl
+
+    # --- Unsichere Antworten (Optional für Tool 1) ---
+    unsicher_tool1 = unsicherheit_eingeben(fragen_tool1, auswahlen_tool1, "tool1")
 
     # --- Setzungsblock (Optional für Tool 1) ---
-    punktwert_setzung_tool1 = 0
-    with st.expander("➕ Setzung des Neuschnees eingeben (Tool 1)"):
-        ns_tool1 = st.slider("Neuschneemenge (cm)", 0, 150, 0, 5, key="ns_tool1")
-        temp_tool1 = st.slider("Temperatur (°C)", -20, 10, 0, 1, key="temp_tool1")
-        stunden_tool1 = st.slider("vergangene Stunden", 0, 72, 0, 1, key="stunden_tool1")
-
-        beschreibung_tool1, punktwert_setzung_tool1 = berechne_setzung_excel(ns_tool1, temp_tool1, stunden_tool1)
-        if beschreibung_tool1:
-            farbe_tool1 = "#ff4b4b" if beschreibung_tool1.startswith("1") else "#ffa500" if beschreibung_tool1.startswith("2") else "#4CAF50"
-            st.markdown(f"""
-                <div style='padding: 10px; background-color: {farbe_tool1}; color: white; border-radius: 8px; text-align: center;'>
-                    <strong>Automatische Setzung:</strong><br>{beschreibung_tool1}
-                </div>
-            """, unsafe_allow_html=True)
-
-    if punktwert_setzung_tool1:
-        punkte_tool1.append(punktwert_setzung_tool1)
-        if beschreibung_tool1.startswith("1"):
-            auswahl_typen_tool1.append("1")
-        elif beschreibung_tool1.startswith("2"):
-            auswahl_typen_tool1.append("2")
-        elif beschreibung_tool1.startswith("3"):
-            auswahl_typen_tool1.append("3")
-        else:
-            auswahl_typen_tool1.append("S")
+    beschreibung_tool1, punktwert_setzung_tool1, ns_tool1, temp_tool1, stunden_tool1 = setzung_eingeben(
+        "tool1", "➕ Setzung des Neuschnees eingeben (Tool 1)"
+    )
+
+    ergebnis_tool1 = bewerte_tool1(auswahlen_tool1, (beschreibung_tool1, punktwert_setzung_tool1))
 
     st.markdown("---") 
     st.markdown("🧭 **Eigene Einschätzung der Lawinengefahr (Tool 1)**")
@@ -342,31 +249,42 @@ if st.session_state.tool1_final_radio_clicked and st.session_state.tool1_selecte
     st.info(f"Sie werden **{st.session_state.tool1_selected_final_recommendation}** speichern.")
 st.markdown("---")
 
+# --- Bewertung speichern (im Hintergrund, siehe lawinen/speicher.py) ---
+if submitted_tool1 and bestaetigt_tool1:
+    st.session_state.bewertung = neue_bewertung(
+        seite="kombi2",
+        hang=hang.strip(),
+        katalog_version=KATALOG.version,
+        antworten_tool1=auswahlen_tool1,
+        ns=ns_tool1,
+        temp=temp_tool1,
+        stunden=stunden_tool1,
+        setzung=beschreibung_tool1,
+        eigene_einschaetzung=eigene_einschaetzung_tool1,
+        gefahrenindex=ergebnis_tool1.gefahrenindex if ergebnis_tool1.gueltig else None,
+        kategorie_tool1=ergebnis_tool1.kategorie,
+        empfehlung=st.session_state.tool1_selected_final_recommendation if st.session_state.tool1_final_radio_clicked else None,
+    )
+    bewertungsspeicher().speichern(st.session_state.bewertung)
+    st.caption("💾 Bewertung gespeichert.")
+
 # --- Ergebnisberechnung und Anzeige (nach dem Formular-Submit von Tool 1) ---
 if submitted_tool1 and bestaetigt_tool1: 
-    typ1_tool1 = auswahl_typen_tool1.count("1")
-    typ2_tool1 = auswahl_typen_tool1.count("2")
-    typ3_tool1 = auswahl_typen_tool1.count("3")
-
-    if len(punkte_tool1) > 0 and (typ1_tool1 >= 3 or typ2_tool1 >= 3 or typ3_tool1 >= 3):
-        summe_punkte_tool1 = sum(punkte_tool1) 
-        anzahl_fragen_tool1 = len(punkte_tool1)
-        gefahrenindex_tool1 = summe_punkte_tool1 / anzahl_fragen_tool1 if anzahl_fragen_tool1 > 0 else 0
+    if ergebnis_tool1.gueltig:
+        gefahrenindex_tool1 = ergebnis_tool1.gefahrenindex
         st.session_state.tool1_gefahrenindex = gefahrenindex_tool1 # Speichere den Index im Session State
         
         # Bestimme die Ergebnis-Kategorie für Tool 1
-        if gefahrenindex_tool1 >= 3.3:
-            st.session_state.tool1_result_category = "hoch"
+        st.session_state.tool1_result_category = ergebnis_tool1.kategorie
+        if ergebnis_tool1.kategorie == "hoch":
             farbe_box_tool1 = "#ff4b4b"
             text_box_tool1 = "🔴 <strong>Hohe Lawinengefahr</strong><br>Besondere Vorsicht notwendig!"
             verhalten_zu_anzeigen_tool1 = verhaltensempfehlungen["🔴 Hohe Lawinengefahr"]
-        elif gefahrenindex_tool1 >= 2.2:
-            st.session_state.tool1_result_category = "moderat"
+        elif ergebnis_tool1.kategorie == "moderat":
             farbe_box_tool1 = "#ffa500"
             text_box_tool1 = "🟡 <strong>Moderate Lawinengefahr</strong><br>Erhöhte Vorsicht erforderlich."
             verhalten_zu_anzeigen_tool1 = verhaltensempfehlungen["🟡 Moderate Lawinengefahr"]
         else:
-            st.session_state.tool1_result_category = "gering"
             farbe_box_tool1 = "#4CAF50"
             text_box_tool1 = "🟢 <strong>Geringe Lawinengefahr</strong>"
             verhalten_zu_anzeigen_tool1 = verhaltensempfehlungen["🟢 Geringe Lawinengefahr"]
@@ -378,25 +296,27 @@ if submitted_tool1 and bestaetigt_tool1:
         """, unsafe_allow_html=True)
 
         st.subheader("Gefahrenindex auf Skala (System-Einschätzung) (Tool 1):") 
-        fig_tool1, ax_tool1 = plt.subplots(figsize=(6, 1.5))
-        cmap_tool1 = plt.cm.colors.ListedColormap(['#4CAF50', '#ffa500', '#ff4b4b'])
-        bounds_tool1 = [1.95, 2.2, 3.3, 3.65]
-        norm_tool1 = plt.cm.colors.BoundaryNorm(bounds_tool1, cmap_tool1.N)
-
-        gradient_tool1 = np.linspace(1.0, 4.0, 400).reshape(1, -1)
-        ax_tool1.imshow(gradient_tool1, extent=[1.0, 4.0, 0, 1], aspect='auto', cmap=cmap_tool1, norm=norm_tool1)
-        ax_tool1.set_xlim(4.0, 1.0)
-        ax_tool1.axhline(0.5, color='white', linestyle='--')
-        ax_tool1.plot(gefahrenindex_tool1, 0.5, 'wo', markersize=10, markeredgecolor='black')
-        ax_tool1.axis('off')
-        st.pyplot(fig_tool1)
+        # Für die Gesamtbewertung in Schritt 2 merken
+        st.session_state.tool1_verteilungen = (
+            verteilungen(fragen_tool1, auswahlen_tool1, unsicher_tool1),
+            (beschreibung_tool1, punktwert_setzung_tool1),
+        )
+        st.session_state.tool1_unsicher = bool(unsicher_tool1)
+        if unsicher_tool1:
+            # Verteilung des Gefahrenindex bei den angegebenen Alternativen (Monte Carlo)
+            simulation_tool1 = simuliere_tool1(*st.session_state.tool1_verteilungen, seed=0)
+            st.image(skala_bild(gefahrenindex_tool1, verteilung=simulation_tool1.werte), width="stretch")
+            st.markdown("**Wahrscheinlichkeit der Gefahrenstufen bei den angegebenen Unsicherheiten (Tool 1):**")
+            zeige_unsicherheit(simulation_tool1, ["hoch", "moderat", "gering"])
+        else:
+            st.image(skala_bild(gefahrenindex_tool1), width="stretch")
         
         st.markdown("---")
         st.subheader("Ihre Verhaltensempfehlung (berechnet vom System) (Tool 1):") 
         st.markdown(verhalten_zu_anzeigen_tool1)
 
     else:
-        if len(punkte_tool1) == 0:
+        if ergebnis_tool1.anzahl == 0:
             st.warning("Bitte füllen Sie mindestens eine Frage aus, um eine Bewertung zu erhalten (Tool 1).")
         else:
             st.warning("Bitte mindestens 3 Antworten mit dem gleichen Gefahren-Typ (1, 2 oder 3) auswählen, um eine detaillierte Gefahrenindex-Berechnung zu erhalten (Tool 1).")
@@ -404,6 +324,8 @@ if submitted_tool1 and bestaetigt_tool1:
         st.session_state.tool1_submitted = False 
         st.session_state.tool1_result_category = None
         st.session_state.tool1_gefahrenindex = None # Wichtig, um Tool 2 auszublenden
+        st.session_state.tool1_verteilungen = None
+        st.session_state.tool1_unsicher = False
 
 # --- Bedingte Anzeige von Tool 2 ---
 st.markdown("---")
@@ -416,17 +338,13 @@ if st.session_state.tool1_gefahrenindex is not None and st.session_state.tool1_r
     # --- Anzeigen der Fragen und Verwalten der Auswahl (Tool 2) ---
     # Hier verwenden wir KEIN `st.form` für Tool 2, da wir die Interaktion der Radio-Buttons direkt steuern
     # und den "Berechne"-Button separat handhaben.
-    for idx, (frage, optionen, gewicht) in enumerate(fragen_tool2):
+    auswahlen_tool2 = {}
+    for idx, definition in enumerate(fragen_tool2):
         key = f"tool2_frage_{idx+1}"
-        initial_index = 0
         gespeicherter_wert = st.session_state.get(f"tool2_antwort_{idx+1}")
 
-        # Find the index of the previously selected value to set the radio button correctly
-        if gespeicherter_wert is not None:
-            for i, (text, val) in enumerate(optionen):
-                if val == gespeicherter_wert:
-                    initial_index = i + 1 # +1 because of the empty string "" at the beginning
-                    break
+        # Index der Option mit dem gespeicherten Wert (0 = leere Option)
+        initial_index = next((o.code for o in definition.optionen if o.punkte == gespeicherter_wert), 0)
         
         # Disable logic for Q6 and Q7
         disabled = False
@@ -441,15 +359,19 @@ if st.session_state.tool1_gefahrenindex is not None and st.session_state.tool1_r
                 disabled = True
 
         auswahl = st.radio(
-            frage,
-            options=[""] + [opt[0] for opt in optionen], # Add an empty string as the first option
+            definition.frage,
+            options=definition.texte, # Leere Option am Anfang
             index=initial_index, # Set the index correctly
             key=key,
             disabled=disabled,
             on_change=handle_tool2_radio_selection,
             args=(idx + 1,)
         )
-        
+        auswahlen_tool2[definition.frage] = auswahl
+
+    # --- Unsichere Antworten (Optional für Tool 2) ---
+    unsicher_tool2 = unsicherheit_eingeben(fragen_tool2, auswahlen_tool2, "tool2")
+
     # --- Buttons für Berechnung und Zurücksetzen (Tool 2) ---
     col1_tool2, col2_tool2 = st.columns(2)
 
@@ -457,57 +379,34 @@ if st.session_state.tool1_gefahrenindex is not None and st.session_state.tool1_r
         if st.button("🔍 Berechne Lawinenausmaß", key="berechne_tool2"):
             st.session_state.tool2_submitted = True # Setzt den Submitted-Flag
 
-            frage6_beantwortet_tool2 = st.session_state.get("tool2_antwort_6") is not None
-            frage7_beantwortet_tool2 = st.session_state.get("tool2_antwort_7") is not None
-
-            # Überprüfung der Pflichtfragen 1-5
-            all_mandatory_answered = True
-            for idx_q in range(5): # Check all mandatory questions (1-5)
-                if st.session_state.get(f"tool2_antwort_{idx_q+1}") is None:
-                    all_mandatory_answered = False
-                    break
-            
-            if not all_mandatory_answered:
+            antworten_tool2 = [st.session_state.get(f"tool2_antwort_{idx_q+1}") for idx_q in range(len(fragen_tool2))]
+            ergebnis_tool2 = bewerte_tool2(antworten_tool2)
+
+            # Überprüfung der Pflichtfragen 1-5 und der exklusiven Fragen 6 ODER 7
+            if ergebnis_tool2.fehler == FEHLER_PFLICHTFRAGEN:
                 st.warning("⚠️ Bitte alle Pflichtfragen (1-5) für die Massen- & Reichweitenanalyse beantworten.")
                 st.stop() # Stoppt die Ausführung hier, bis alle Pflichtfragen beantwortet sind
-
-            # Überprüfung der exklusiven Fragen 6 ODER 7
-            if frage6_beantwortet_tool2 and frage7_beantwortet_tool2:
+            if ergebnis_tool2.fehler == FEHLER_FRAGE6_UND_7:
                 st.error("❗ Bitte **nur Frage 6 oder Frage 7** für die Massen- & Reichweitenanalyse beantworten – nicht beide.")
                 st.stop()
-            if not frage6_beantwortet_tool2 and not frage7_beantwortet_tool2:
+            if ergebnis_tool2.fehler == FEHLER_FRAGE6_ODER_7:
                 st.error("❗ Bitte **Frage 6 oder Frage 7** für die Massen- & Reichweitenanalyse beantworten.")
                 st.stop()
 
-            werte_tool2 = []
-            gewichte_tool2 = []
-
-            for idx_q in range(5): # Questions 1-5
-                wert = st.session_state.get(f"tool2_antwort_{idx_q+1}")
-                gewicht = fragen_tool2[idx_q][2]
-                if wert is not None: 
-                    werte_tool2.append(wert)
-                    gewichte_tool2.append(gewicht)
+            mw_ung_tool2 = ergebnis_tool2.mw_ung
+            mw_gew_tool2 = ergebnis_tool2.mw_gew
 
-            if frage6_beantwortet_tool2:
-                wert = st.session_state.get("tool2_antwort_6")
-                gewicht = fragen_tool2[5][2] # Index 5 ist Frage 6
-            else: # frage7_beantwortet_tool2 muss True sein
-                wert = st.session_state.get("tool2_antwort_7")
-                gewicht = fragen_tool2[6][2] # Index 6 ist Frage 7
+            # Ergebnis von Tool 2 zur gespeicherten Bewertung aus Schritt 1 hinzufügen
+            if "bewertung" in st.session_state:
+                st.session_state.bewertung = st.session_state.bewertung._replace(
+                    antworten_tool2=[st.session_state.get(f"tool2_frage_{idx_q+1}", "") for idx_q in range(len(fragen_tool2))],
+                    mw_ung=mw_ung_tool2,
+                    mw_gew=mw_gew_tool2,
+                )
+                bewertungsspeicher().speichern(st.session_state.bewertung)
 
-            werte_tool2.append(wert)
-            gewichte_tool2.append(gewicht)
-
-            if not werte_tool2:
-                st.error("❌ Es konnten keine gültigen Werte zur Berechnung der Massen- & Reichweitenanalyse erfasst werden.")
-                st.stop()
-
-            mw_ung_tool2 = sum(werte_tool2) / len(werte_tool2)
-            mw_gew_tool2 = sum(v * g for v, g in zip(werte_tool2, gewichte_tool2)) / sum(gewichte_tool2)
-
-            txt_ung_tool2, farbe_ung_tool2 = get_bewertung_farbe_tool2(mw_ung_tool2)
-            txt_gew_tool2, farbe_gew_tool2 = get_bewertung_farbe_tool2(mw_gew_tool2)
+            txt_ung_tool2, farbe_ung_tool2 = get_bewertung_farbe(mw_ung_tool2)
+            txt_gew_tool2, farbe_gew_tool2 = get_bewertung_farbe(mw_gew_tool2)
 
             st.subheader("📊 Ergebnisse der Massen- & Reichweitenanalyse")
             st.info("Die Bewertung zeigt die Gefahreneinschätzung nach zwei Methoden.")
@@ -524,42 +423,10 @@ if st.session_state.tool1_gefahrenindex is not None and st.session_state.tool1_r
                 st.markdown("---")
                 st.subheader("Ihre Gesamtbewertung:")
                 
-                # Hier könnten Sie eine finale, kombinierte Risikoaussage treffen
-                # Basierend auf tool1_result_category und den gewichteten MW von Tool 2
-                final_risk_text = "Keine eindeutige Gesamtbewertung möglich."
-                final_risk_color = "#ccc"
-
-                tool1_cat = st.session_state.tool1_result_category
-                tool2_weighted_val = mw_gew_tool2
-
-                # Einfaches Beispiel für eine kombinierte Logik
-                if tool1_cat == "gering":
-                    if tool2_weighted_val <= FARB_SCHWELLENWERTE_TOOL2["gering"]["wert"]:
-                        final_risk_text = "✅ **Gesamtrisiko: GERING** (Geringe Auslösung, geringes Ausmaß)"
-                        final_risk_color = "#4CAF50"
-                    elif tool2_weighted_val <= FARB_SCHWELLENWERTE_TOOL2["maessig"]["wert"]:
-                        final_risk_text = "🟡 **Gesamtrisiko: MODERAT** (Geringe Auslösung, aber mittleres Ausmaß möglich)"
-                        final_risk_color = "#ffa500"
-                    else:
-                        final_risk_text = "🔴 **Gesamtrisiko: HOCH** (Geringe Auslösung, aber hohes Ausmaß möglich)"
-                        final_risk_color = "#ff4b4b"
-                elif tool1_cat == "moderat":
-                    if tool2_weighted_val <= FARB_SCHWELLENWERTE_TOOL2["gering"]["wert"]:
-                        final_risk_text = "🟡 **Gesamtrisiko: MODERAT** (Moderate Auslösung, aber geringes Ausmaß)"
-                        final_risk_color = "#ffa500"
-                    elif tool2_weighted_val <= FARB_SCHWELLENWERTE_TOOL2["maessig"]["wert"]:
-                        final_risk_text = "🔴 **Gesamtrisiko: HOCH** (Moderate Auslösung, mittleres Ausmaß)"
-                        final_risk_color = "#ff4b4b"
-                    else:
-                        final_risk_text = "💥 **Gesamtrisiko: SEHR HOCH** (Moderate Auslösung, hohes Ausmaß)"
-                        final_risk_color = "#8B0000" # Dunkelrot
-                elif tool1_cat == "hoch":
-                    if tool2_weighted_val <= FARB_SCHWELLENWERTE_TOOL2["gering"]["wert"]:
-                        final_risk_text = "🔴 **Gesamtrisiko: HOCH** (Hohe Auslösung, aber geringes Ausmaß)"
-                        final_risk_color = "#ff4b4b"
-                    else:
-                        final_risk_text = "🔥🔥 **Gesamtrisiko: EXTREM HOCH** (Hohe Auslösung, hohes Ausmaß)"
-                        final_risk_color = "#B22222" # Noch dunkler
+                # Kombinierte Risikoaussage aus tool1_result_category und dem gewichteten MW von Tool 2
+                risiko = gesamtrisiko(st.session_state.tool1_result_category, mw_gew_tool2)
+                final_risk_text = risiko.text
+                final_risk_color = risiko.farbe
 
                 st.markdown(f"""
                     <div style='padding: 20px; background-color: {final_risk_color}; color: white; border-radius: 10px; text-align: center;'>
@@ -570,6 +437,20 @@ if st.session_state.tool1_gefahrenindex is not None and st.session_state.tool1_r
                 """, unsafe_allow_html=True)
                 st.markdown("Bitte beachten Sie, dass dies eine automatisierte Einschätzung ist und stets durch Geländebeobachtung und Expertenwissen zu ergänzen ist.")
 
+            # --- Unsicherheiten beider Tools (Monte Carlo) ---
+            if unsicher_tool2 or st.session_state.tool1_unsicher:
+                st.markdown("---")
+                st.subheader("🎲 Bewertung bei unsicheren Antworten")
+                simulation_tool2 = simuliere_tool2(verteilungen(fragen_tool2, auswahlen_tool2, unsicher_tool2), seed=1)
+                st.markdown("**Gewichteter Mittelwert (Tool 2):**")
+                zeige_unsicherheit(simulation_tool2, ["hoch", "mäßig", "gering"])
+                if st.session_state.tool1_verteilungen is not None:
+                    simulation_tool1 = simuliere_tool1(*st.session_state.tool1_verteilungen, seed=0)
+                    st.markdown("**Gesamtrisiko:**")
+                    anteile = gesamt_anteile(simulation_tool1, simulation_tool2)
+                    stufen = [(stufe, anteil) for stufe, anteil in zip(GESAMT_STUFEN, anteile) if anteil or stufe != "keine"]
+                    zeige_anteile([stufe for stufe, _ in stufen], [anteil for _, anteil in stufen])
+
     with col2_tool2:
         if st.button("🔄 Zurücksetzen Alle Werte (Tool 2)", key="reset_tool2_values"):
             # Setze nur die Werte von Tool 2 zurück
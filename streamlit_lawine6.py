@@ -1,70 +1,18 @@
 # Lawinenbewertung – Streamlit Web-App (Final)
 import streamlit as st
 
+from lawinen import KATALOG, get_bewertung_farbe
+from lawinen.ansicht import zeige_logo
+
 st.set_page_config(page_title="Lawinenbewertung", layout="centered")
 
 # --- Logo hinzufügen ---
-# Der Pfad zum Bild relativ zur Python-Datei der App
-logo_path = "mein_logo.png" # Wenn das Bild im selben Ordner ist
-# Oder: logo_path = "bilder/mein_logo.png" # Wenn das Bild in einem Unterordner namens 'bilder' ist
-
-st.image(logo_path, caption='Dein Lawinen-Logo', width=150) # Passe width an die gewünschte Größe an
-# Optional kannst du auch einen Link zum Bild angeben, falls es online gehostet wird:
-# st.image("https://example.com/pfad/zu/deinem/logo.png", caption='Online-Logo', width=150)
+zeige_logo(caption='Dein Lawinen-Logo', breite=150)
 
 st.title("🧭 Lawinenbewertung – Massen- & Reichweitenanalyse")
 
-# --- Konstanten ---
-FARB_SCHWELLENWERTE = {
-    "gering": {"wert": 2, "text": "🟢 Geringe Gefahr", "farbe": "#90EE90"},
-    "maessig": {"wert": 4, "text": "🟡 Mäßige Gefahr", "farbe": "#FFF176"},
-    "hoch": {"text": "🔴 Hohe Gefahr", "farbe": "#FF7F7F"}
-}
-
-fragen = [
-    ("Frage 1: Größe des Geländes", [
-        ("Sehr klein (z. B. schmaler Hangabschnitt)", 1),
-        ("Klein bis mittelgroß", 2.5),
-        ("Groß (mehrere Hangbereiche)", 4.5),
-        ("Sehr groß (Kar, verbundenes Gelände)", 7)
-    ], 1.5),
-    ("Frage 2: Schneemenge / Stabilität", [
-        ("Wenig Schnee, stabil", 1),
-        ("Mittlere Schneemenge, eher stabil", 4),
-        ("Viel Schnee, mit Schwachschichten", 5),
-        ("Sehr viel Schnee, instabil (z. B. Triebschnee, Nassschnee)", 8)
-    ], 2),
-    ("Frage 3: Schneemenge innerhalb der Lawine", [
-        ("Kaum Schnee – Lawine \"verhungert\"", 1),
-        ("Wenig Schnee – geringe Massenvergrößerung", 4),
-        ("Viel Schnee – deutliche Massenvergrößerung", 5),
-        ("Sehr viel Schnee – erhebliche Massenvergrößerung", 8)
-    ], 1.5),
-    ("Frage 4: Reibung / Unterlage", [
-        ("Nein, viel Reibung → bremst Lawine", 1),
-        ("Teilweise gefüllt", 2),
-        ("Weitgehend glatt oder gefüllt → wenig Bremsung", 4),
-        ("Vollständig glatt/eingefahren → fast keine Reibung", 7)
-    ], 1.2),
-    ("Frage 5: Hangauslauf / Reichweite", [
-        ("Nur kurz steil, danach flach → bremst schnell", 1),
-        ("Langer steiler Hangauslauf mit Hindernissen", 2),
-        ("Lang steil, einige Hindernisse / Staubereiche, große Reichweite", 4),
-        ("Lang steil, keine Hindernisse im Auslauf → sehr große Reichweite", 7)
-    ], 1),
-    ("Frage 6: Potenzielle Auswirkungen – Massenbewegung", [
-        ("Keine Gefahr, kaum Massenbewegung", 1),
-        ("Könnte eine Person erfassen", 3),
-        ("Könnte Fahrzeuge zerstören / Bäume fällen", 5),
-        ("Infrastruktur gefährdet (Straßen, Häuser, Züge)", 8)
-    ], 2),
-    ("Frage 7: Entfernung zu Pisten / Infrastruktur", [
-        ("Lawine weit entfernt (keine Gefahr)", 1),
-        ("In Sichtweite von Pisten", 3),
-        ("Kann Pisten erreichen oder beeinflussen", 5),
-        ("Trifft direkt auf Pisten / Infrastruktur", 8)
-    ], 2)
-]
+# --- Fragen, Optionen und Gewichte (aus lawinen/katalog.json) ---
+fragen = KATALOG.tool2
 
 # --- Initialisierung des Session State ---
 if "initialisiert" not in st.session_state:
@@ -75,28 +23,13 @@ if "initialisiert" not in st.session_state:
     for idx, _ in enumerate(fragen):
         st.session_state[f"antwort_{idx+1}"] = None # Speichert den ausgewählten Wert
 
-# --- Funktionen ---
-def get_bewertung_farbe(wert):
-    """Gibt den Text und die Farbe basierend auf dem Wert zurück."""
-    if wert <= FARB_SCHWELLENWERTE["gering"]["wert"]:
-        return FARB_SCHWELLENWERTE["gering"]["text"], FARB_SCHWELLENWERTE["gering"]["farbe"]
-    elif wert <= FARB_SCHWELLENWERTE["maessig"]["wert"]:
-        return FARB_SCHWELLENWERTE["maessig"]["text"], FARB_SCHWELLENWERTE["maessig"]["farbe"]
-    else:
-        return FARB_SCHWELLENWERTE["hoch"]["text"], FARB_SCHWELLENWERTE["hoch"]["farbe"]
-
 # --- Fragen anzeigen ---
-for idx, (frage, optionen, gewicht) in enumerate(fragen):
+for idx, definition in enumerate(fragen):
     key = f"frage_{idx+1}"
     
     # Bestimme den Initialwert für das Radio-Widget aus dem Session State
-    initial_index = 0
     gespeicherter_wert = st.session_state.get(f"antwort_{idx+1}")
-    if gespeicherter_wert is not None:
-        for i, (text, val) in enumerate(optionen):
-            if val == gespeicherter_wert:
-                initial_index = i + 1
-                break
+    initial_index = next((o.code for o in definition.optionen if o.punkte == gespeicherter_wert), 0)
 
     # Deaktivierungslogik für Frage 6/7
     disabled = False
@@ -108,19 +41,15 @@ for idx, (frage, optionen, gewicht) in enumerate(fragen):
             disabled = True
 
     auswahl = st.radio(
-        frage,
-        options=[""] + [opt[0] for opt in optionen],
+        definition.frage,
+        options=definition.texte,
         index=initial_index,
         key=key,
         disabled=disabled
     )
 
     # Wert extrahieren und im Session State speichern
-    wert = None
-    for text, val in optionen:
-        if auswahl == text:
-            wert = val
-            break
+    wert = definition.punkte.get(auswahl)
     st.session_state[f"antwort_{idx+1}"] = wert
 
     # Aktualisiere den Zustand für Frage 6 und 7
@@ -146,7 +75,7 @@ with col1:
                 break
         
         if not alle_pflichtfragen_beantwortet:
-            st.warning(⚠️ Bitte alle Pflichtfragen (1-5) beantworten.")
+            st.warning("⚠️ Bitte alle Pflichtfragen (1-5) beantworten.")
             st.stop()
 
         # Validierung: Nur eine von Frage 6 oder 7 beantwortet?
@@ -164,7 +93,7 @@ with col1:
         # Fragen 1-5 hinzufügen
         for idx in range(5):
             wert = st.session_state.get(f"antwort_{idx+1}")
-            gewicht = fragen[idx][2]
+            gewicht = fragen[idx].gewicht
             if wert is not None:
                 werte_fuer_berechnung.append(wert)
                 gewichte_fuer_berechnung.append(gewicht)
@@ -172,13 +101,13 @@ with col1:
         # Entweder Frage 6 oder Frage 7 hinzufügen
         if frage6_ausgewaehlt:
             wert = st.session_state.get(f"antwort_6")
-            gewicht = fragen[5][2]
+            gewicht = fragen[5].gewicht
             if wert is not None:
                 werte_fuer_berechnung.append(wert)
                 gewichte_fuer_berechnung.append(gewicht)
         elif frage7_ausgewaehlt:
             wert = st.session_state.get(f"antwort_7")
-            gewicht = fragen[6][2]
+            gewicht = fragen[6].gewicht
             if wert is not None:
                 werte_fuer_berechnung.append(wert)
                 gewichte_fuer_berechnung.append(gewicht)
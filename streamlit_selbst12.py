@@ -1,8 +1,7 @@
 import streamlit as st
-import math
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+
+from lawinen import KATALOG, berechne_setzung_excel
+from lawinen.skala import skala_bild
 
 # --- Initialisierung der Session State ---
 defaults = {
@@ -15,67 +14,13 @@ for key, val in defaults.items():
     if key not in st.session_state:
         st.session_state[key] = val
 
-fragen_definitions = {
-    "Neuschneemenge (24h)": {
-        "": 0,
-        "1: > 40 cm / Tag": 4,
-        "2: 20–40 cm / Tag": 2.5,
-        "3: < 20 cm / Tag": 2
-    },
-    "Regenmenge": {
-        "": 0,
-        "1: starker Regen (> 5 mm)": 4,
-        "2: leichter Regen (< 5 mm)": 2.5,
-        "3: kein Regen": 3
-    },
-    "Erwärmung": {
-        "": 0,
-        "1: > 4 °C Erwärmung": 3.5,
-        "2: bis 4 °C Erwärmung": 2,
-        "3: kalt oder keine Erwärmung": 3
-    },
-    "Schneedecken-Stabilität": {
-        "": 0,
-        "1: Altschnee mitgerissen": 4,
-        "2: nicht tragfähiger Harschdeckel": 2.5,
-        "3: tragfähiger Harschdeckel oder keine Schwachschicht": 1
-    },
-    "Verbindung zur Altschneedecke": {
-        "": 0,
-        "1: schlecht (kaltes Einschneien)": 3,
-        "2: Beginn bei 0–2 °C": 2,
-        "3: gut (Regen, dann Temperaturabfall)": 1
-    },
-    "Wind/Verfrachtung": {
-        "": 0,
-        "1: starker Wind (> 40 km/h)": 3,
-        "2: mäßiger Wind (< 40 km/h)": 2,
-        "3: kein/wenig Wind": 1
-    },
-    "Exposition/Sonneneinstrahlung": {
-        "": 0,
-        "1: starke Sonneneinstrahlung": 3.5,
-        "2: mäßige Sonneneinstrahlung": 2.5,
-        "3: kaum oder keine Sonneneinstrahlung": 2
-    },
-    "SSD (vSSD)": {
-        "": 0,
-        "1: schlechte Struktur (große Kristalle, weiche Schicht, dünn)": 4,
-        "2: teils kritische Schwachschichten": 2.5,
-        "3: stabile Struktur (kleine Kristalle, fest, dick)": 2
-    },
-    "Hangneigung / Exposition": {
-        "": 0,
-        "1: > 35° und ungünstige Exposition": 4,
-        "2: 30–35° oder teils ungünstig": 2,
-        "3: < 30° oder günstige Exposition": 1
-    }
-}
+# --- Fragen & Punktwerte (aus lawinen/katalog.json) ---
+fragen_tool1 = KATALOG.tool1
 
 # Initialisiere Radiobutton-Auswahl
-for frage in fragen_definitions.keys():
-    if f'radio_{frage}' not in st.session_state:
-        st.session_state[f'radio_{frage}'] = ""
+for definition in fragen_tool1:
+    if f'radio_{definition.frage}' not in st.session_state:
+        st.session_state[f'radio_{definition.frage}'] = ""
 
 # --- UI: Titel ---
 st.title("Selbstauslösung von Neuschnee-Lawinen")
@@ -97,21 +42,6 @@ st.session_state.ns_value = ns
 st.session_state.temp_value = temp
 st.session_state.stunden_value = stunden
 
-# --- Berechnungsfunktion ---
-def berechne_setzung_excel(ns_val, temp_val, stunden_val):
-    if stunden_val <= 0:
-        return "", 0
-
-    ln_teil = math.log(min(stunden_val, 72) + 1)
-    setzungsgrad = min(100, ((0.4 * (temp_val + 5) * ln_teil) / 8) * 100)
-
-    if setzungsgrad < 20:
-        return ("1: (fast) keine Setzung", 3.5) if ns_val > 30 else ("2: mäßige Setzung", 2)
-    elif setzungsgrad < 40:
-        return ("1: (fast) keine Setzung", 3.5) if ns_val > 50 else ("2: mäßige Setzung", 2)
-    else:
-        return ("2: mäßige Setzung", 2) if ns_val > 80 else ("3: starke Setzung", 3.5)
-
 # --- Berechnung ausführen, auch wenn Temperatur = 0 ---
 automatische_setzung, punktwert_setzung = "", 0
 if ns > 0 and stunden > 0:
@@ -133,16 +63,17 @@ auswahl_typen = []
 faktor_namen = []
 
 with st.form("lawinen_form_main"):
-    for frage, optionen in fragen_definitions.items():
+    for definition in fragen_tool1:
+        frage = definition.frage
         auswahl = st.radio(
             frage,
-            list(optionen.keys()),
-            index=list(optionen.keys()).index(st.session_state[f'radio_{frage}']) if st.session_state[f'radio_{frage}'] in optionen else 0,
+            definition.texte,
+            index=definition.codes.get(st.session_state[f'radio_{frage}'], 0),
             key=f'radio_{frage}'
         )
         if auswahl != "":
-            punkte.append(optionen[auswahl])
-            auswahl_typen.append(auswahl[0])
+            punkte.append(definition.punkte[auswahl])
+            auswahl_typen.append(definition.typen[auswahl])
             faktor_namen.append(frage)
 
     submitted = st.form_submit_button("Bewerten")
@@ -155,9 +86,9 @@ if st.button("🔄 Zurücksetzen"):
 
 # --- Bewertung und Anzeige ---
 if submitted:
-    typ1 = auswahl_typen.count("1")
-    typ2 = auswahl_typen.count("2")
-    typ3 = auswahl_typen.count("3")
+    typ1 = auswahl_typen.count(1)
+    typ2 = auswahl_typen.count(2)
+    typ3 = auswahl_typen.count(3)
 
     if max(typ1, typ2, typ3) >= 3:
         gesamtpunkte = sum(punkte)
@@ -178,17 +109,7 @@ if submitted:
 
         # Farbskala anzeigen
         st.subheader("Gefahrenindex auf Skala")
-        fig, ax = plt.subplots(figsize=(6, 1.5))
-        cmap = plt.cm.colors.ListedColormap(['#4CAF50', '#ffa500', '#ff4b4b'])
-        bounds = [1.95, 2.2, 3.3, 3.65]
-        norm = plt.cm.colors.BoundaryNorm(bounds, cmap.N)
-        gradient = np.linspace(1.0, 4.0, 400).reshape(1, -1)
-        ax.imshow(gradient, extent=[1.0, 4.0, 0, 1], aspect='auto', cmap=cmap, norm=norm)
-        ax.set_xlim(4.0, 1.0)
-        ax.axhline(0.5, color='white', linestyle='--')
-        ax.plot(gefahrenindex, 0.5, 'wo', markersize=10, markeredgecolor='black')
-        ax.text(gefahrenindex, -0.3, f"{gefahrenindex:.2f}", ha='center', fontsize=10)
-        ax.axis('off')
-        st.pyplot(fig)
+        st.image(skala_bild(gefahrenindex), width="stretch")
+        st.caption(f"{gefahrenindex:.2f}")
     else:
         st.info("ℹ️ Bitte mindestens 3 Antworten mit dem gleichen Gefahren-Typ (1, 2 oder 3) auswählen.")
@@ -1,8 +1,17 @@
 import streamlit as st
-import math
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+
+from lawinen import KATALOG, bewerte_tool1
+from lawinen.ansicht import (
+    bewertungsspeicher,
+    setzung_eingeben,
+    sonne_vorbelegen,
+    station_vorbelegen,
+    unsicherheit_eingeben,
+    zeige_unsicherheit,
+)
+from lawinen.skala import skala_bild
+from lawinen.speicher import neue_bewertung
+from lawinen.unsicherheit import simuliere_tool1, verteilungen
 
 # Konfiguriere die Seite
 st.set_page_config(page_title="Lawinenbewertung", layout="centered")
@@ -45,27 +54,12 @@ verhaltensempfehlungen = {
 """
 }
 
-# --- Fragen & Punktwerte für die Bewertung ---
-fragen_definitions = {
-    "Neuschneemenge (24h)": {"": 0, "1: > 40 cm / Tag": 4, "2: 20–40 cm / Tag": 2.5, "3: < 20 cm / Tag": 2},
-    "Regenmenge": {"": 0, "1: starker Regen (> 5 mm)": 4, "2: leichter Regen (< 5 mm)": 2.5, "3: kein Regen": 3},
-    "Erwärmung": {"": 0, "1: > 4 °C Erwärmung": 3.5, "2: bis 4 °C Erwärmung": 2, "3: kalt oder keine Erwärmung": 3},
-    "Schneedecken-Stabilität": {"": 0, "1: Altschnee mitgerissen": 4, "2: nicht tragfähiger Harschdeckel": 2.5, "3: tragfähiger Harschdeckel oder keine Schwachschicht": 1},
-    "Verbindung zur Altschneedecke": {"": 0, "1: schlecht (kaltes Einschneien)": 3, "2: Beginn bei 0–2 °C": 2, "3: gut (Regen, dann Temperaturabfall)": 1},
-    "Wind/Verfrachtung": {"": 0, "1: starker Wind (> 40 km/h)": 3, "2: mäßiger Wind (< 40 km/h)": 2, "3: kein/wenig Wind": 1},
-    "Exposition/Sonneneinstrahlung": {"": 0, "1: starke Sonneneinstrahlung": 3.5, "2: mäßige Sonneneinstrahlung": 2.5, "3: kaum oder keine Sonneneinstrahlung": 2},
-    "SSD (vSSD)": {
-        "": 0,
-        "1: 🔴 Stabilität Sehr schlecht / schlecht": 4,
-        "2: 🟡 Stabilität mittel": 2.5,
-        "3: 🟢 Stabilität gut": 2
-    },
-    "Hangneigung / Exposition": {"": 0, "1: > 35° und ungünstige Exposition": 4, "2: 30–35° oder teils ungünstig": 2, "3: < 30° oder günstige Exposition": 1}
-}
+# --- Fragen & Punktwerte für die Bewertung (aus lawinen/katalog.json) ---
+fragen_tool1 = KATALOG.tool1
 
 # Initialisiere den Session State für Radio-Buttons, falls noch nicht vorhanden
-for frage in fragen_definitions:
-    st.session_state.setdefault(f"radio_{frage}", "")
+for definition in fragen_tool1:
+    st.session_state.setdefault(f"radio_{definition.frage}", "")
 
 # Initialisiere den Zustand für die ausgewählte Verhaltensempfehlung
 if "selected_final_recommendation" not in st.session_state:
@@ -78,6 +72,10 @@ if "final_radio_clicked" not in st.session_state:
 # Callback-Funktion für den finalen Radio-Button (jetzt außerhalb des Formulars gültig)
 def on_final_radio_change():
     st.session_state.final_radio_clicked = True
+    # Eine bereits gespeicherte Bewertung mit der neuen Empfehlung überschreiben
+    if "bewertung" in st.session_state:
+        st.session_state.bewertung = st.session_state.bewertung._replace(empfehlung=st.session_state.final_recommendation_radio)
+        bewertungsspeicher().speichern(st.session_state.bewertung)
     # Der Wert wird automatisch über den 'key' im Session State aktualisiert
     # und muss hier nicht mehr manuell zugewiesen werden.
     # st.session_state.selected_final_recommendation = st.session_state.final_recommendation_radio
@@ -85,82 +83,37 @@ def on_final_radio_change():
 st.title("Selbstauslösung von Neuschnee-Lawinen")
 st.markdown("Bewertung nach Ampelsystem")
 
+# --- Wetterstation (Optional): belegt Neuschnee, Regen, Erwärmung und Wind vor ---
+station_vorbelegen("radio_{}", "tool1")
+
+# --- Sonneneinstrahlung (Optional): belegt "Exposition/Sonneneinstrahlung" vor ---
+sonne_vorbelegen("radio_{}", "tool1")
+
 # --- Hauptformular ---
 with st.form("lawinen_form_main"):
-    punkte = []
-    auswahl_typen = []
+    auswahlen = {}
+
+    hang = st.text_input("Hang / Ort", key="hang")
 
     # Fragen zur Lawinenbewertung
-    for frage, optionen in fragen_definitions.items():
-        auswahl = st.radio(frage, list(optionen.keys()),
-                                 index=list(optionen.keys()).index(st.session_state[f"radio_{frage}"]),
+    for definition in fragen_tool1:
+        frage = definition.frage
+        auswahl = st.radio(frage, definition.texte,
+                                 index=definition.codes[st.session_state[f"radio_{frage}"]],
                                  key=f"radio_{frage}")
 
         if frage == "SSD (vSSD)" and auswahl in ampel_icons:
             st.markdown(f"<div style='margin-top: -10px; margin-bottom: 10px;'>{ampel_icons[auswahl]}</div>", unsafe_allow_html=True)
 
-        if auswahl:
-            punkte.append(optionen[auswahl])
-            # Extrahiere den Typ (1, 2, oder 3) für die Bewertung
-            if auswahl in ["1: > 40 cm / Tag", "1: starker Regen (> 5 mm)", "1: > 4 °C Erwärmung",
-                            "1: Altschnee mitgerissen", "1: schlecht (kaltes Einschneien)",
-                            "1: starker Wind (> 40 km/h)", "1: starke Sonneneinstrahlung",
-                            "1: 🔴 Stabilität Sehr schlecht / schlecht",
-                            "1: > 35° und ungünstige Exposition",
-                            "2: 20–40 cm / Tag", "2: leichter Regen (< 5 mm)", "2: bis 4 °C Erwärmung",
-                            "2: nicht tragfähiger Harschdeckel", "2: Beginn bei 0–2 °C",
-                            "2: mäßiger Wind (< 40 km/h)", "2: mäßige Sonneneinstrahlung",
-                            "2: 🟡 Stabilität mittel",
-                            "2: 30–35° oder teils ungünstig",
-                            "3: < 20 cm / Tag", "3: kein Regen", "3: kalt oder keine Erwärmung",
-                            "3: tragfähiger Harschdeckel oder keine Schwachschicht", "3: gut (Regen, dann Temperaturabfall)",
-                            "3: kein/wenig Wind", "3: kaum oder keine Sonneneinstrahlung",
-                            "3: 🟢 Stabilität gut",
-                            "3: < 30° oder günstige Exposition"]:
-                auswahl_typen.append(auswahl[0]) # Nimmt '1', '2', oder '3'
-            else:
-                auswahl_typen.append("") # Für die leere Auswahl
+        auswahlen[frage] = auswahl
+
+    # --- Unsichere Antworten (Optional) ---
+    unsicher = unsicherheit_eingeben(fragen_tool1, auswahlen, "tool1")
 
     # --- Setzungsblock (Optional) ---
-    punktwert_setzung = 0
-    with st.expander("➕ Setzung des Neuschnees eingeben"):
-        ns = st.slider("Neuschneemenge (cm)", 0, 150, 0, 5)
-        temp = st.slider("Temperatur (°C)", -20, 10, 0, 1)
-        stunden = st.slider("vergangene Stunden", 0, 72, 0, 1)
-
-        def berechne_setzung_excel(ns_val, temp_val, stunden_val):
-            if stunden_val <= 0:
-                return "", 0
-            ln_teil = math.log(min(stunden_val, 72) + 1)
-            setzungsgrad = min(100, ((0.4 * (temp_val + 5) * ln_teil) / 8) * 100)
-            
-            if setzungsgrad < 20:
-                return ("1: (fast) keine Setzung", 3.5) if ns_val > 30 else ("2: mäßige Setzung", 2)
-            elif setzungsgrad < 40:
-                return ("1: (fast) keine Setzung", 3.5) if ns_val > 50 else ("2: mäßige Setzung", 2)
-            else:
-                return ("2: mäßige Setzung", 2) if ns_val > 80 else ("3: starke Setzung", 3.5)
-
-        beschreibung, punktwert_setzung = berechne_setzung_excel(ns, temp, stunden)
-        if beschreibung:
-            farbe = "#ff4b4b" if beschreibung.startswith("1") else "#ffa500" if beschreibung.startswith("2") else "#4CAF50"
-            st.markdown(f"""
-                <div style='padding: 10px; background-color: {farbe}; color: white; border-radius: 8px; text-align: center;'>
-                    <strong>Automatische Setzung:</strong><br>{beschreibung}
-                </div>
-            """, unsafe_allow_html=True)
-
-    if punktwert_setzung:
-        punkte.append(punktwert_setzung)
-        # Hinzufügen des Typs zur auswahl_typen Liste (für die Statistik unten)
-        if beschreibung.startswith("1"):
-            auswahl_typen.append("1")
-        elif beschreibung.startswith("2"):
-            auswahl_typen.append("2")
-        elif beschreibung.startswith("3"):
-            auswahl_typen.append("3")
-        else:
-            auswahl_typen.append("S") # Für "Setzung", falls kein 1,2,3 am Anfang
+    beschreibung, punktwert_setzung, ns, temp, stunden = setzung_eingeben("tool1")
+
+    ergebnis = bewerte_tool1(auswahlen, (beschreibung, punktwert_setzung))
 
 
     # --- Schieberegler für eigene Einschätzung ---
@@ -257,24 +210,37 @@ if st.session_state.final_radio_clicked and st.session_state.selected_final_reco
 st.markdown("---")
 
 
+# --- Bewertung speichern (im Hintergrund, siehe lawinen/speicher.py) ---
+if submitted and bestaetigt:
+    st.session_state.bewertung = neue_bewertung(
+        seite="selbst14",
+        hang=hang.strip(),
+        katalog_version=KATALOG.version,
+        antworten_tool1=auswahlen,
+        ns=ns,
+        temp=temp,
+        stunden=stunden,
+        setzung=beschreibung,
+        eigene_einschaetzung=eigene_einschaetzung,
+        gefahrenindex=ergebnis.gefahrenindex if ergebnis.gueltig else None,
+        kategorie_tool1=ergebnis.kategorie,
+        empfehlung=st.session_state.selected_final_recommendation if st.session_state.final_radio_clicked else None,
+    )
+    bewertungsspeicher().speichern(st.session_state.bewertung)
+    st.caption("💾 Bewertung gespeichert.")
+
 # --- Ergebnisberechnung und Anzeige (nach dem Formular-Submit) ---
 # HINWEIS: Dieser Block wird nur ausgeführt, wenn der 'Formular speichern'-Button gedrückt wird.
 if submitted and bestaetigt: 
-    typ1 = auswahl_typen.count("1")
-    typ2 = auswahl_typen.count("2")
-    typ3 = auswahl_typen.count("3")
-
-    if len(punkte) > 0 and (typ1 >= 3 or typ2 >= 3 or typ3 >= 3):
-        summe_punkte = sum(punkte) 
-        anzahl_fragen = len(punkte)
-        gefahrenindex = summe_punkte / anzahl_fragen if anzahl_fragen > 0 else 0
-        
-        # Bestimme Text und Farbe basierend auf dem Gefahrenindex
-        if gefahrenindex >= 3.3:
+    if ergebnis.gueltig:
+        gefahrenindex = ergebnis.gefahrenindex
+
+        # Bestimme Text und Farbe basierend auf der Kategorie des Gefahrenindex
+        if ergebnis.kategorie == "hoch":
             farbe_box = "#ff4b4b"
             text_box = "🔴 <strong>Hohe Lawinengefahr</strong><br>Besondere Vorsicht notwendig!"
             verhalten_zu_anzeigen = verhaltensempfehlungen["🔴 Hohe Lawinengefahr"]
-        elif gefahrenindex >= 2.2:
+        elif ergebnis.kategorie == "moderat":
             farbe_box = "#ffa500"
             text_box = "🟡 <strong>Moderate Lawinengefahr</strong><br>Erhöhte Vorsicht erforderlich."
             verhalten_zu_anzeigen = verhaltensempfehlungen["🟡 Moderate Lawinengefahr"]
@@ -290,18 +256,14 @@ if submitted and bestaetigt:
         """, unsafe_allow_html=True)
 
         st.subheader("Gefahrenindex auf Skala (System-Einschätzung):") 
-        fig, ax = plt.subplots(figsize=(6, 1.5))
-        cmap = plt.cm.colors.ListedColormap(['#4CAF50', '#ffa500', '#ff4b4b'])
-        bounds = [1.95, 2.2, 3.3, 3.65] # Die Bereiche der Ampelfarben auf der Skala
-        norm = plt.cm.colors.BoundaryNorm(bounds, cmap.N)
-
-        gradient = np.linspace(1.0, 4.0, 400).reshape(1, -1)
-        ax.imshow(gradient, extent=[1.0, 4.0, 0, 1], aspect='auto', cmap=cmap, norm=norm)
-        ax.set_xlim(4.0, 1.0) # Skala von rechts (gering) nach links (hoch)
-        ax.axhline(0.5, color='white', linestyle='--')
-        ax.plot(gefahrenindex, 0.5, 'wo', markersize=10, markeredgecolor='black')
-        ax.axis('off') # Diese Zeile sorgt dafür, dass die Achsenbeschriftungen (wie 1 und 4) nicht angezeigt werden
-        st.pyplot(fig)
+        if unsicher:
+            # Verteilung des Gefahrenindex bei den angegebenen Alternativen (Monte Carlo)
+            simulation = simuliere_tool1(verteilungen(fragen_tool1, auswahlen, unsicher), (beschreibung, punktwert_setzung), seed=0)
+            st.image(skala_bild(gefahrenindex, verteilung=simulation.werte), width="stretch")
+            st.markdown("**Wahrscheinlichkeit der Gefahrenstufen bei den angegebenen Unsicherheiten:**")
+            zeige_unsicherheit(simulation, ["hoch", "moderat", "gering"])
+        else:
+            st.image(skala_bild(gefahrenindex), width="stretch")
         
         # --- Anzeige der spezifischen Verhaltensempfehlungen basierend auf dem Index ---
         st.markdown("---")
@@ -309,7 +271,7 @@ if submitted and bestaetigt:
         st.markdown(verhalten_zu_anzeigen)
 
     else:
-        if len(punkte) == 0:
+        if ergebnis.anzahl == 0:
             st.info("Bitte füllen Sie mindestens eine Frage aus, um eine Bewertung zu erhalten.")
         else:
             st.info("Bitte mindestens 3 Antworten mit dem gleichen Gefahren-Typ (1, 2 oder 3) auswählen, um eine detaillierte Gefahrenindex-Berechnung zu erhalten.")
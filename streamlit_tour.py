@@ -0,0 +1,136 @@
+import os
+
+import streamlit as st
+
+from lawinen import KATALOG
+from lawinen.ansicht import setzung_eingeben, zeige_logo
+from lawinen.gesamt import GESAMT_STUFEN
+
+# Konfiguriere die Seite
+st.set_page_config(page_title="Tourenmodus", layout="centered")
+
+# Gelände-Raster: Frage -> (Beschriftung, Umgebungsvariable für den Standardpfad)
+RASTER = {
+    "Hangneigung / Exposition": ("Hang-Codes (.npy aus lawinen.gelaende)", "LAWINEN_HANG_RASTER"),
+    "Exposition/Sonneneinstrahlung": ("Sonnen-Codes (.npy aus lawinen.sonne, optional)", "LAWINEN_SONNE_RASTER"),
+}
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def route_laden(daten, projektion):
+    """GPX-Datei einmal pro Inhalt und Projektion einlesen."""
+    import io
+
+    from lawinen.tour import lade_route
+
+    return lade_route(io.BytesIO(daten), projektion)
+
+
+zeige_logo()
+st.title("Tourenmodus: Gefahrenprofil entlang der Route")
+st.markdown(
+    "Die Route wird in Abschnitte geteilt. Hangneigung und Sonneneinstrahlung kommen aus den Gelände-Rastern, "
+    "alle übrigen Antworten gelten für die ganze Tour."
+)
+
+# --- Route und Gelände ---
+gpx = st.file_uploader("GPX-Datei (Track oder Route)", type=["gpx"], key="tour_gpx")
+links, rechts = st.columns(2)
+projektion = links.selectbox("Projektion der Raster", ["lv95", "utm32", "utm33"], key="tour_projektion")
+segment = rechts.slider("Abschnittslänge (m)", 20, 500, 50, 10, key="tour_segment")
+gelaende = {}
+for frage, (beschriftung, variable) in RASTER.items():
+    pfad = st.text_input(beschriftung, os.environ.get(variable, ""), key=f"tour_raster_{frage}").strip()
+    if pfad:
+        gelaende[frage] = pfad
+
+# --- Antworten für die ganze Tour ---
+with st.form("tour_form"):
+    st.subheader("Tool 1: Selbstauslösung")
+    auswahlen_tool1 = {}
+    for definition in KATALOG.tool1:
+        if definition.frage in gelaende:
+            st.caption(f"{definition.frage}: aus dem Gelände-Raster")
+            continue
+        auswahlen_tool1[definition.frage] = st.radio(definition.frage, definition.texte, key=f"tour_tool1_{definition.frage}")
+    beschreibung, punktwert_setzung, *_ = setzung_eingeben("tour")
+
+    st.subheader("Tool 2: Lawinengröße & Reichweite")
+    auswahlen_tool2 = {}
+    for idx, definition in enumerate(KATALOG.tool2):
+        auswahlen_tool2[definition.frage] = st.radio(definition.frage, definition.texte, key=f"tour_tool2_{idx + 1}")
+
+    abgeschickt = st.form_submit_button("🗺️ Route bewerten")
+
+if abgeschickt:
+    from lawinen.batch import bewerte_tool1_batch, bewerte_tool2_batch
+    from lawinen.tool1 import KAT_UNGUELTIG
+    from lawinen.tool2 import FEHLER_FRAGE6_ODER_7, FEHLER_FRAGE6_UND_7, FEHLER_PFLICHTFRAGEN
+    from lawinen.tour import FARBEN, einzelregion, passagen, profil_svg, profil_zeilen, tourprofil
+
+    if gpx is None:
+        st.warning("⚠️ Bitte eine GPX-Datei hochladen.")
+        st.stop()
+    tabellen = einzelregion(auswahlen_tool1, (beschreibung, punktwert_setzung), auswahlen_tool2)
+    # Fragen aus den Gelände-Rastern fehlen hier noch; abgelehnt wird nur, was auch mit ihnen ungültig bleibt
+    aus_raster = sum(definition.frage in gelaende for definition in KATALOG.tool1)
+    ergebnis_tool1 = bewerte_tool1_batch(tabellen[0][1:])
+    gleicher_typ = max(ergebnis_tool1.typ1[0], ergebnis_tool1.typ2[0], ergebnis_tool1.typ3[0])
+    if ergebnis_tool1.kategorie[0] == KAT_UNGUELTIG and gleicher_typ + aus_raster < 3:
+        if ergebnis_tool1.anzahl[0] == 0 and not aus_raster:
+            st.warning("Bitte füllen Sie mindestens eine Frage aus, um eine Bewertung zu erhalten (Tool 1).")
+        else:
+            st.warning("Bitte mindestens 3 Antworten mit dem gleichen Gefahren-Typ (1, 2 oder 3) auswählen, um eine detaillierte Gefahrenindex-Berechnung zu erhalten (Tool 1).")
+        st.stop()
+    fehler = bewerte_tool2_batch(tabellen[1][1:]).fehler[0]
+    if fehler == FEHLER_PFLICHTFRAGEN:
+        st.warning("⚠️ Bitte alle Pflichtfragen (1-5) für die Massen- & Reichweitenanalyse beantworten.")
+        st.stop()
+    if fehler == FEHLER_FRAGE6_UND_7:
+        st.error("❗ Bitte **nur Frage 6 oder Frage 7** für die Massen- & Reichweitenanalyse beantworten – nicht beide.")
+        st.stop()
+    if fehler == FEHLER_FRAGE6_ODER_7:
+        st.error("❗ Bitte **Frage 6 oder Frage 7** für die Massen- & Reichweitenanalyse beantworten.")
+        st.stop()
+
+    try:
+        route = route_laden(gpx.getvalue(), projektion)
+        profil = tourprofil(route, gelaende, *tabellen, segment=segment)
+    except (OSError, ValueError, SyntaxError) as e:  # ET.ParseError ist ein SyntaxError
+        st.error(f"Route nicht auswertbar: {e}")
+        st.stop()
+
+    if (profil.kategorie_tool1 == KAT_UNGUELTIG).all():
+        st.warning("An keinem Punkt der Route ergibt Tool 1 zusammen mit den Gelände-Rastern mindestens 3 Antworten "
+                   "mit dem gleichen Gefahren-Typ. Bitte die Antworten, die Raster und die Projektion prüfen.")
+        st.stop()
+
+    st.markdown("---")
+    st.subheader("Gefahrenprofil")
+    hoechste = int(profil.gesamtrisiko.max())
+    spalte1, spalte2, spalte3 = st.columns(3)
+    spalte1.metric("Länge", f"{route.distanz[-1] / 1000:.1f} km")
+    spalte2.metric("Abschnitte", len(profil.von))
+    spalte3.metric("Höchstes Gesamtrisiko", GESAMT_STUFEN[hoechste])
+    st.markdown(profil_svg(profil), unsafe_allow_html=True)
+    st.markdown(" ".join(
+        f"<span style='background-color:{farbe}; color:white; padding:2px 6px; border-radius:4px;'>{stufe}</span>"
+        for stufe, farbe in zip(GESAMT_STUFEN, FARBEN)
+    ), unsafe_allow_html=True)
+    if not gelaende:
+        st.info("Ohne Gelände-Raster gilt für alle Abschnitte dieselbe Bewertung.")
+    elif not (profil.gesamtrisiko > 0).any():
+        st.warning("Die Route liegt außerhalb der Gelände-Raster oder die Projektion passt nicht.")
+
+    kritische = passagen(profil)
+    if kritische:
+        st.markdown("**Kritische Passagen:**")
+        for passage in kritische:
+            st.markdown(f"- km {passage.von / 1000:.2f} – {passage.bis / 1000:.2f}: **{GESAMT_STUFEN[passage.stufe]}**")
+    elif (profil.gesamtrisiko > 0).all():
+        st.success("✅ Keine Abschnitte mit hohem oder höherem Gesamtrisiko.")
+    else:
+        st.warning(f"{int((profil.gesamtrisiko == 0).sum())} Abschnitte ohne gültige Bewertung – dort ist keine Aussage möglich.")
+
+    with st.expander("Alle Abschnitte"):
+        st.dataframe(profil_zeilen(profil), width="stretch")
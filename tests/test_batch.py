@@ -0,0 +1,104 @@
+"""Stapelbewertung (lawinen.batch) gegen die Einzelbewertung und ein Archiv-Durchlauf."""
+import math
+
+import numpy as np
+import pytest
+
+from lawinen import archiv
+from lawinen.batch import (
+    SPALTEN_TOOL1,
+    bewerte_tool1_batch,
+    bewerte_tool2_batch,
+    gesamtrisiko_batch,
+)
+from lawinen.gesamt import GESAMT_STUFEN, gesamtrisiko
+from lawinen.katalog import KATALOG
+from lawinen.setzung import SETZUNG_OPTIONEN
+from lawinen.tool1 import KAT_UNGUELTIG, KATEGORIEN, bewerte_tool1
+from lawinen.tool2 import (
+    FEHLER_FRAGE6_ODER_7,
+    FEHLER_FRAGE6_UND_7,
+    FEHLER_KEINER,
+    FEHLER_PFLICHTFRAGEN,
+    FRAGEN,
+    bewerte_tool2,
+)
+
+N = 2000
+
+
+def _tool1_eingaben(zeile):
+    """Codezeile -> (auswahlen, setzung) wie für bewerte_tool1."""
+    auswahlen = {}
+    for frage, code in zip(KATALOG.tool1, zeile[:-1]):
+        auswahlen[frage.frage] = next(text for text, c in frage.codes.items() if c == code)
+    beschreibung = list(SETZUNG_OPTIONEN)[zeile[-1]]
+    return auswahlen, (beschreibung, SETZUNG_OPTIONEN[beschreibung])
+
+
+def _tool2_eingaben(zeile):
+    """Codezeile -> Punktwerte der Fragen 1-7 (None = nicht beantwortet) wie für bewerte_tool2."""
+    return [optionen[code - 1][1] if code else None for (_, optionen, _), code in zip(FRAGEN, zeile)]
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def test_tool1_wie_einzelbewertung(rng):
+    codes = rng.integers(0, 4, size=(N, len(SPALTEN_TOOL1)))
+    codes[rng.random(N) < 0.3] = 0  # unbeantwortete Zeilen
+    stapel = bewerte_tool1_batch(codes)
+    for i, zeile in enumerate(codes.tolist()):
+        einzeln = bewerte_tool1(*_tool1_eingaben(zeile))
+        assert stapel.gefahrenindex[i] == pytest.approx(einzeln.gefahrenindex)
+        assert (stapel.typ1[i], stapel.typ2[i], stapel.typ3[i]) == einzeln[1:4]
+        assert stapel.anzahl[i] == einzeln.anzahl
+        assert stapel.gueltig[i] == einzeln.gueltig
+        assert KATEGORIEN[stapel.kategorie[i]] == einzeln.kategorie
+    assert (stapel.kategorie[~codes.any(axis=1)] == KAT_UNGUELTIG).all()
+
+
+def test_tool2_wie_einzelbewertung(rng):
+    codes = rng.integers(1, 5, size=(N, len(FRAGEN)))
+    # Zufällig Frage 6 oder 7 leeren, einzelne Pflichtfragen weglassen und beide bzw. keine beantworten
+    codes[np.arange(N), rng.integers(5, 7, size=N)] = 0
+    luecken = rng.random(N) < 0.1
+    codes[luecken, rng.integers(0, 5, size=luecken.sum())] = 0
+    codes[rng.random(N) < 0.05, 5:] = 0
+    codes[rng.random(N) < 0.05, 5:] = rng.integers(1, 5, size=2)
+    stapel = bewerte_tool2_batch(codes)
+    assert set(stapel.fehler.tolist()) == {FEHLER_KEINER, FEHLER_PFLICHTFRAGEN, FEHLER_FRAGE6_UND_7, FEHLER_FRAGE6_ODER_7}
+    for i, zeile in enumerate(codes.tolist()):
+        einzeln = bewerte_tool2(_tool2_eingaben(zeile))
+        assert stapel.fehler[i] == einzeln.fehler
+        if einzeln.fehler:
+            assert math.isnan(stapel.mw_ung[i]) and math.isnan(stapel.mw_gew[i])
+            assert stapel.kategorie_gew[i] == KAT_UNGUELTIG
+        else:
+            assert stapel.mw_ung[i] == pytest.approx(einzeln.mw_ung)
+            assert stapel.mw_gew[i] == pytest.approx(einzeln.mw_gew)
+
+
+def test_gesamtrisiko_wie_einzelbewertung(rng):
+    tool1 = bewerte_tool1_batch(rng.integers(0, 4, size=(N, len(SPALTEN_TOOL1))))
+    tool2 = bewerte_tool2_batch(rng.integers(0, 5, size=(N, len(FRAGEN))))
+    stufen = gesamtrisiko_batch(tool1.kategorie, tool2.kategorie_gew)
+    for kategorie1, mw_gew, stufe in zip(tool1.kategorie.tolist(), tool2.mw_gew.tolist(), stufen.tolist()):
+        einzeln = gesamtrisiko(KATEGORIEN[kategorie1], None if math.isnan(mw_gew) else mw_gew)
+        assert GESAMT_STUFEN[stufe] == einzeln.stufe
+
+
+def test_archiv_hin_und_zurueck(rng, tmp_path):
+    tool1 = rng.integers(0, 4, size=(50, len(SPALTEN_TOOL1)))
+    tool2 = rng.integers(0, 5, size=(50, len(FRAGEN)))
+    archiv.anhaengen(tmp_path, np.full(50, "2025-01-31"), tool1, tool2, haenge=["Nordhang"] * 50)
+    gelesen = archiv.Archiv(tmp_path)
+    assert len(gelesen) == 50
+    np.testing.assert_array_equal(gelesen.spalte("tool1"), tool1)
+    np.testing.assert_array_equal(gelesen.spalte("tool2"), tool2)
+    np.testing.assert_array_equal(gelesen.spalte("kategorie_tool1"), bewerte_tool1_batch(tool1).kategorie)
+    np.testing.assert_array_equal(gelesen.spalte("fehler_tool2"), bewerte_tool2_batch(tool2).fehler)
+    assert (gelesen.spalte("tag").astype("datetime64[D]") == np.datetime64("2025-01-31")).all()
+    assert gelesen.hang_maske("Nordhang").all()
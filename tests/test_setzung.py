@@ -0,0 +1,67 @@
+"""Nachschlagetabelle der Setzung gegen die Excel-Formel (lawinen.setzung)."""
+import itertools
+
+import numpy as np
+import pytest
+
+from lawinen.setzung import (
+    NS_BEREICH,
+    STUNDEN_BEREICH,
+    TEMP_BEREICH,
+    berechne_setzung_excel,
+    setzung_code,
+    setzung_codes,
+    setzung_nachschlagen,
+    setzung_tabelle,
+)
+
+NS = range(NS_BEREICH[0], NS_BEREICH[1] + 1)
+TEMPS = range(TEMP_BEREICH[0], TEMP_BEREICH[1] + 1)
+STUNDEN = range(STUNDEN_BEREICH[0], STUNDEN_BEREICH[1] + 1)
+
+
+def test_tabelle_entspricht_formel_im_ganzen_bereich():
+    tabelle = setzung_tabelle()
+    assert tabelle.shape == (len(NS), len(TEMPS), len(STUNDEN))
+    erwartet = np.array(
+        [setzung_code(ns, temp, stunden) for ns, temp, stunden in itertools.product(NS, TEMPS, STUNDEN)],
+        dtype=np.uint8,
+    ).reshape(tabelle.shape)
+    np.testing.assert_array_equal(tabelle, erwartet)
+
+
+def test_tabelle_schreibgeschuetzt():
+    with pytest.raises(ValueError):
+        setzung_tabelle()[0, 0, 0] = 1
+
+
+@pytest.mark.parametrize("ns, temp, stunden", [(0, -30, 0), (31, -5, 1), (51, 0, 24), (81, 15, 100), (200, 15, 100)])
+def test_nachschlagen_wie_excel(ns, temp, stunden):
+    assert setzung_nachschlagen(ns, temp, stunden) == berechne_setzung_excel(ns, temp, stunden)
+
+
+@pytest.mark.parametrize("ns, temp, stunden", [
+    (30.5, -5, 12),      # keine ganze Zahl
+    (45, -2.5, 30),
+    (45, 3, 12.25),
+    (250, 0, 24),        # außerhalb der Tabelle
+    (-10, 0, 24),
+    (45, -40, 24),
+    (45, 20, 24),
+    (45, 5, 150),
+    (45, 5, -3),
+])
+def test_ausserhalb_der_tabelle_mit_formel(ns, temp, stunden):
+    assert setzung_nachschlagen(ns, temp, stunden) == berechne_setzung_excel(ns, temp, stunden)
+    assert setzung_codes(ns, temp, stunden) == setzung_code(ns, temp, stunden)
+
+
+def test_codes_gemischt_tabelle_und_formel():
+    rng = np.random.default_rng(0)
+    ganz = rng.random(2000) < 0.5  # die Hälfte ganzzahlig, teils außerhalb der Tabelle
+    ns, temp, stunden = (
+        np.where(ganz, np.round(werte), werte)
+        for werte in (rng.uniform(-20, 260, 2000), rng.uniform(-40, 25, 2000), rng.uniform(-5, 130, 2000))
+    )
+    erwartet = [setzung_code(n, t, s) for n, t, s in zip(ns.tolist(), temp.tolist(), stunden.tolist())]
+    np.testing.assert_array_equal(setzung_codes(ns, temp, stunden), erwartet)